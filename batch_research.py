@@ -0,0 +1,208 @@
+"""
+批量研究模式
+从主题文件读取多个研究主题及其过滤条件，在同一进程中并发执行，
+共享HTTP会话、API密钥池（公平调度）、已下载的PDF和提取的文本。
+
+主题文件为JSONL（每行一个主题，空行和以#开头的行会被忽略），例如:
+    {"topic": "大语言模型推理加速", "conferences": ["ACL", "NeurIPS"], "time_preset": "2", "min_citations": 10}
+    {"topic": "diffusion model video generation", "start_date": "2023-01-01"}
+也可以是一行一个纯文本主题。可选的 deadline_minutes / token_budget 字段为该主题启用预算模式，
+progressive 字段为该主题启用渐进式分析（先基于摘要给出临时结果）。
+"""
+
+import argparse
+import json
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+from cancellation import CancellationToken
+from config import (
+    API_KEYS,
+    API_KEYS_2,
+    OUTPUT_DIR,
+    ENABLE_STREAMING_PIPELINE,
+    BATCH_MAX_CONCURRENT_TOPICS,
+    BATCH_SHARED_DOWNLOAD_DIR,
+)
+from deepseek_client import DeepSeekClient
+from key_scheduler import KeyPoolScheduler
+from main_DeepResearch import display_config, run_research, save_results
+from paper_searcher import EnhancedPaperSearcher
+from pdf_processor import EnhancedPDFProcessor
+from research_budget import ResearchBudget
+from research_pipeline import StreamingResearchPipeline
+from run_checkpoint import RunCheckpoint
+from text_cache import ExtractedTextCache
+
+
+def load_topic_specs(path: str) -> List[Dict]:
+    """读取主题文件，返回主题配置列表"""
+    specs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                spec = json.loads(line)
+            else:
+                spec = {'topic': line}
+            if not spec.get('topic'):
+                raise ValueError(f"{path} 第{line_num}行缺少topic字段")
+            specs.append(spec)
+    return specs
+
+
+class BatchResearchRunner:
+    """在一个进程中并发研究多个主题，共享会话、密钥池与文本缓存"""
+
+    def __init__(self, max_concurrent_topics: int = BATCH_MAX_CONCURRENT_TOPICS,
+                 download_dir: str = BATCH_SHARED_DOWNLOAD_DIR):
+        self.max_concurrent_topics = max(1, max_concurrent_topics)
+        self.download_dir = download_dir
+        Path(download_dir).mkdir(parents=True, exist_ok=True)
+
+        # 共享资源：HTTP会话保持连接复用，密钥池由调度器公平分配
+        self.api_session = requests.Session()
+        self.web_session = requests.Session()
+        self.key_scheduler = KeyPoolScheduler(API_KEYS, name="api")
+        self.summary_key_scheduler = KeyPoolScheduler(API_KEYS_2 if API_KEYS_2 else API_KEYS, name="summary")
+        self.text_cache = ExtractedTextCache()
+        # 根取消令牌：Ctrl+C时取消全部主题，每个主题使用其子令牌
+        self.cancel_token = CancellationToken()
+
+        self.searcher = EnhancedPaperSearcher(session=self.web_session)
+        self.processor = EnhancedPDFProcessor(session=self.web_session, text_cache=self.text_cache)
+
+        print(f"🔧 批量研究初始化完成")
+        print(f"   - 并发主题数: {self.max_concurrent_topics}")
+        print(f"   - 共享下载目录: {self.download_dir}")
+        print(f"   - 密钥池: {len(self.key_scheduler.keys)} 个普通密钥, {len(self.summary_key_scheduler.keys)} 个总结密钥")
+
+    def run_topic(self, spec: Dict) -> Dict:
+        """研究单个主题，返回批量汇总中的记录"""
+        research_topic = spec['topic']
+        start_time = time.time()
+        if self.cancel_token.cancelled:
+            return {'topic': research_topic, 'run_id': None, 'status': 'cancelled', 'duration_seconds': 0.0}
+        checkpoint = RunCheckpoint.create(research_topic)
+        tenant = checkpoint.run_id
+        self.key_scheduler.register(tenant)
+        self.summary_key_scheduler.register(tenant)
+        try:
+            filters = self.searcher.build_filters_from_spec(spec)
+            checkpoint.save_run_info(self.download_dir, filters)
+
+            ai_client = DeepSeekClient(
+                session=self.api_session,
+                key_scheduler=self.key_scheduler,
+                summary_key_scheduler=self.summary_key_scheduler,
+                tenant=tenant,
+            )
+            pipeline = StreamingResearchPipeline(ai_client, self.searcher, self.processor) if ENABLE_STREAMING_PIPELINE else None
+
+            results = run_research(
+                ai_client, self.searcher, self.processor, pipeline,
+                research_topic, filters, self.download_dir, checkpoint,
+                budget=ResearchBudget.from_spec(ai_client, spec),
+                cancel_token=self.cancel_token.child(),
+                progressive=spec.get('progressive')
+            )
+            output_file = save_results(results, Path(OUTPUT_DIR))
+            if results['cancelled']:
+                print(f"🛑 主题已取消: {research_topic}，部分结果 -> {output_file}")
+            else:
+                checkpoint.mark_finished(output_file)
+                print(f"✅ 主题完成: {research_topic} -> {output_file}")
+            return {
+                'topic': research_topic,
+                'run_id': checkpoint.run_id,
+                'status': 'cancelled' if results['cancelled'] else 'finished',
+                'output_file': str(output_file),
+                'papers_analyzed': results['total_papers_analyzed'],
+                'final_adequacy_score': results['final_adequacy_score'],
+                'duration_seconds': round(time.time() - start_time, 1),
+            }
+        except Exception as e:
+            print(f"❌ 主题失败: {research_topic} - {e}")
+            traceback.print_exc()
+            return {
+                'topic': research_topic,
+                'run_id': checkpoint.run_id,
+                'status': 'failed',
+                'error': str(e),
+                'duration_seconds': round(time.time() - start_time, 1),
+            }
+        finally:
+            self.key_scheduler.unregister(tenant)
+            self.summary_key_scheduler.unregister(tenant)
+
+    def run(self, specs: List[Dict]) -> Dict:
+        """并发研究全部主题，返回批量汇总"""
+        started_at = datetime.now()
+        topic_results = []
+        print(f"\n🚀 开始批量研究: {len(specs)} 个主题")
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_topics) as executor:
+            pending = {executor.submit(self.run_topic, spec) for spec in specs}
+            while pending:
+                try:
+                    done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    # 取消全部主题后继续等待，各主题会尽快停止并保存部分结果
+                    print("\n🛑 批量研究被中断，正在停止全部主题并保存部分结果...")
+                    self.cancel_token.cancel("用户中断")
+                    continue
+                for future in done:
+                    topic_results.append(future.result())
+                    print(f"📊 批量进度: {len(topic_results)}/{len(specs)}")
+
+        return {
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'topics': topic_results,
+            'finished': sum(1 for r in topic_results if r['status'] == 'finished'),
+            'failed': sum(1 for r in topic_results if r['status'] == 'failed'),
+            'cancelled': sum(1 for r in topic_results if r['status'] == 'cancelled'),
+            'text_cache': self.text_cache.stats(),
+            'key_pools': [self.key_scheduler.stats(), self.summary_key_scheduler.stats()],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="深研星图-批量研究模式")
+    parser.add_argument('topics_file', help='主题文件（JSONL，每行一个主题及其过滤条件）')
+    parser.add_argument('--max-concurrent', type=int, default=BATCH_MAX_CONCURRENT_TOPICS, help='同时研究的主题数')
+    args = parser.parse_args()
+
+    specs = load_topic_specs(args.topics_file)
+    if not specs:
+        print(f"⚠️ 主题文件中没有主题: {args.topics_file}")
+        return
+
+    display_config()
+    runner = BatchResearchRunner(max_concurrent_topics=args.max_concurrent)
+    summary = runner.run(specs)
+
+    output_dir = Path(OUTPUT_DIR)
+    output_dir.mkdir(exist_ok=True)
+    summary_file = output_dir / f"batch_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+
+    print(f"\n🎉 批量研究完成: 成功 {summary['finished']} 个, 失败 {summary['failed']} 个, 取消 {summary['cancelled']} 个")
+    print(f"♻️ 共享文本缓存: 命中 {summary['text_cache']['hits']} 次, 独立论文 {summary['text_cache']['unique_papers']} 篇")
+    print(f"💾 批量汇总已保存到: {summary_file}")
+    for result in summary['topics']:
+        if result['status'] in ('failed', 'cancelled') and result['run_id']:
+            print(f"🔄 未完成主题可恢复: python main_DeepResearch.py --resume {result['run_id']}")
+
+
+if __name__ == "__main__":
+    main()
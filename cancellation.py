@@ -0,0 +1,117 @@
+"""
+协作式取消
+一旦做出停止决定（不再继续搜索、预算耗尽或用户中断），通过取消令牌通知
+搜索、下载、分析与重试退避尽快结束，而不是等待整批任务自然完成。
+"""
+
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+# 轮询取消状态的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.2
+
+
+class OperationCancelled(Exception):
+    """操作因取消令牌被触发而中止"""
+
+
+class CancellationToken:
+    """可层级传播的取消令牌：取消父令牌会同时取消全部子令牌"""
+
+    def __init__(self, parent: Optional['CancellationToken'] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        # 只弱引用子令牌：子任务结束、令牌不再被引用后自动移除，长时间运行的父令牌不会无限累积
+        self._children: 'weakref.WeakSet[CancellationToken]' = weakref.WeakSet()
+        self.reason: Optional[str] = None
+        if parent is not None:
+            parent._add_child(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def _add_child(self, child: 'CancellationToken'):
+        with self._lock:
+            self._children.add(child)
+            already_cancelled = self.cancelled
+        if already_cancelled:
+            child.cancel(self.reason)
+
+    def child(self) -> 'CancellationToken':
+        """创建子令牌（可单独取消，不影响父令牌）"""
+        return CancellationToken(parent=self)
+
+    def cancel(self, reason: Optional[str] = None):
+        """触发取消（重复调用无副作用）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason or "已取消"
+            self._event.set()
+            children = list(self._children)
+        for child in children:
+            child.cancel(self.reason)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelled(self.reason)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待至取消或超时，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds: float):
+        """可被取消打断的sleep，取消时抛出OperationCancelled"""
+        try:
+            if self._event.wait(max(0.0, seconds)):
+                raise OperationCancelled(self.reason)
+        except KeyboardInterrupt:
+            self.cancel("用户中断")
+            raise OperationCancelled(self.reason)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        在后台线程中执行阻塞调用（如HTTP请求），取消时立即返回并抛出OperationCancelled。
+        被放弃的调用会在其自身超时后结束，结果被丢弃。
+        """
+        self.raise_if_cancelled()
+        done = threading.Event()
+        outcome = {}
+
+        def runner():
+            try:
+                outcome['result'] = fn(*args, **kwargs)
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=runner, name="cancellable-call", daemon=True).start()
+        try:
+            while not done.wait(CANCEL_POLL_INTERVAL):
+                if self.cancelled:
+                    raise OperationCancelled(self.reason)
+        except KeyboardInterrupt:
+            self.cancel("用户中断")
+            raise OperationCancelled(self.reason)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+
+def cancellable_sleep(seconds: float, token: Optional[CancellationToken] = None):
+    """有令牌时可被取消打断，否则等同time.sleep"""
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def cancellable_call(token: Optional[CancellationToken], fn: Callable, *args, **kwargs):
+    """有令牌时可被取消打断，否则直接调用"""
+    if token is None:
+        return fn(*args, **kwargs)
+    return token.call(fn, *args, **kwargs)
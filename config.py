@@ -71,4 +71,142 @@ MAX_ANAYLISE_OUTPUT_LENGTH = 32000*2  # 最大分析输出长度
 # 深度搜索评估配置
 ADEQUACY_EVALUATION_THRESHOLD = 0.90  # 资料充分性评估阈值 (0-1, 1表示完全充分)
 MIN_DEPTH_SEARCH_SCORE = 0.3  # 进行深度搜索的最低分数阈值
-MAX_NEW_KEYWORDS_PER_DEPTH = 5  # 每轮深度搜索生成的最大新关键词数量
\ No newline at end of file
+MAX_NEW_KEYWORDS_PER_DEPTH = 5  # 每轮深度搜索生成的最大新关键词数量
+
+# 流水线配置（搜索、下载提取、分析三个阶段重叠执行）
+ENABLE_STREAMING_PIPELINE = True  # 是否启用流水线模式，False则按阶段串行执行
+PIPELINE_SEARCH_WORKERS = 2  # 搜索阶段并发数（同时执行的查询数）
+PIPELINE_DOWNLOAD_WORKERS = 4  # 下载/提取阶段并发数
+PIPELINE_ANALYSIS_WORKERS = max(1, MAX_CONCURRENT_ANALYSIS)  # 分析阶段并发数（受API密钥数量限制）
+PIPELINE_QUEUE_SIZE = 8  # 阶段之间队列的最大长度，队列满时上游阻塞（背压）
+
+# 检查点配置（每轮每个阶段完成后保存，可通过 --resume <run-id> 恢复）
+CHECKPOINT_DIR = "./output/checkpoints"
+
+# 批量模式配置（python batch_research.py topics.jsonl）
+BATCH_MAX_CONCURRENT_TOPICS = 3  # 同时研究的主题数，API密钥池由调度器在主题之间公平分配
+BATCH_SHARED_DOWNLOAD_DIR = "./downloads/batch_shared"  # 所有主题共享的PDF下载目录（已下载的PDF直接复用）
+
+# 常驻研究服务配置（python research_service.py）
+SERVICE_HOST = "127.0.0.1"  # 仅监听本机
+SERVICE_PORT = 8765
+SERVICE_MAX_CONCURRENT_JOBS = 1  # 同时执行的研究任务数，其余任务排队等待
+SERVICE_FINISHED_JOB_TTL = 24 * 3600  # 已结束的任务（含事件与结果）在内存中保留的秒数，结果文件不受影响
+SERVICE_MAX_FINISHED_JOBS = 200  # 最多保留的已结束任务数，超出时先移除最早结束的
+
+# 推测式预取配置（本轮分析仍在进行时草拟下一轮查询并提前搜索、下载）
+ENABLE_SPECULATIVE_PREFETCH = True
+SPECULATIVE_MIN_ANALYSES = 5  # 本轮完成多少篇分析后开始草拟下一轮查询
+SPECULATIVE_PREFETCH_PAPERS = 12  # 推测搜索结果中提前下载提取的论文数
+SPECULATIVE_ACCEPT_OVERLAP = 0.5  # 真实缺失领域被草拟领域覆盖的比例达到该值时保留推测结果
+
+# 截止时间与token预算模式配置（--deadline-minutes / --token-budget）
+BUDGET_FINAL_SUMMARY_RESERVE_SECONDS = SUMMARY_API_TIMEOUT  # 始终为最终研究总结预留的时间（秒）
+BUDGET_FINAL_SUMMARY_RESERVE_TOKENS = MAX_ANAYLISE_OUTPUT_LENGTH + SUMMARY_MAX_TOKENS_PER_REQUEST  # 为最终研究总结预留的token
+BUDGET_DEFAULT_SECONDS_PER_PAPER = 30  # 尚无实测数据时，每篇论文（下载+分析+轮次开销）的预估耗时
+BUDGET_DEFAULT_TOKENS_PER_PAPER = 20000  # 尚无实测数据时，每篇论文的预估token消耗
+BUDGET_SKIP_FALLBACK_BELOW = 0.5  # 剩余预算比例低于该值时跳过备用PDF获取策略
+BUDGET_ABSTRACT_ONLY_BELOW = 0.25  # 剩余预算比例低于该值时只基于摘要分析
+BUDGET_ROUND_PROCESSING_SHARE = 0.6  # 每轮分配时间中用于下载提取的比例，其余留给分析与评估
+
+# 边际收益提前终止配置（充分性评分进入平台期时不再为剩余轮次付费）
+ENABLE_MARGINAL_GAIN_STOPPING = True
+MARGINAL_GAIN_MIN_PER_100K_TOKENS = 0.01  # 每10万token的预期充分性提升低于该值时结束搜索
+MARGINAL_GAIN_MIN_ROUNDS = 2  # 至少完成几轮评估后才按边际收益判断（需要评分变化趋势）
+MARGINAL_GAIN_SMOOTHING = 0.7  # 评分增量与每轮token开销的指数平滑系数（越大越看重最近一轮）
+
+# 论文全文存储配置（热点全文留在内存，超出预算的溢出到磁盘，分析时按需加载文本块）
+ENABLE_PAPER_STORE = True
+PAPER_STORE_RAM_BUDGET_MB = 512  # 内存中保留的论文全文总量上限（MB）
+PAPER_STORE_SPILL_DIR = "./output/paper_store"  # 溢出全文的临时目录（进程结束时删除）
+
+# 渐进式分析配置（--progressive：先基于摘要快速分析并生成临时总结，全文分析完成后逐篇替换）
+ENABLE_PROGRESSIVE_ANALYSIS = False
+
+# 运行估算配置（python main_DeepResearch.py --estimate）
+ESTIMATE_HISTORY_RUNS = 10  # 使用最近多少次运行的实测统计校准估算
+ESTIMATE_API_RPM_PER_KEY = 60  # 每个API密钥每分钟允许的请求数（按API平台的限额填写）
+ESTIMATE_API_TPM_PER_KEY = 100000  # 每个API密钥每分钟允许的token数（按API平台的限额填写）
+ESTIMATE_SCHOLAR_SAFE_REQUESTS_PER_HOUR = 60  # Google Scholar每小时请求数超过该值时容易触发验证码/封禁
+
+# 多节点任务队列配置（--distributed：下载提取与单篇分析交给 python task_worker.py 执行）
+TASK_QUEUE_DB = "./output/task_queue.sqlite3"  # 任务队列数据库，多台机器运行时放在共享文件系统上
+TASK_LEASE_SECONDS = 900  # 任务租约时长（秒），工作进程失联超过该时间后任务重新排队
+TASK_MAX_ATTEMPTS = 3  # 单个任务最多尝试次数（含工作进程失联后的重试）
+TASK_POLL_INTERVAL = 2.0  # 协调进程与空闲工作进程轮询队列的间隔（秒）
+
+# 论文状态机与延迟重试配置（下载/分析的临时失败进入延迟重试队列，工作线程先处理其他论文）
+PAPER_RETRY_MAX_ATTEMPTS = 3  # 每篇论文下载或分析的最多尝试次数（最后一次在线程内重试，下载失败时回退到摘要）
+PAPER_RETRY_BASE_DELAY = 5.0  # 第一次重试前的等待时间（秒），之后按指数退避
+PAPER_RETRY_MAX_DELAY = 120.0  # 单次重试等待时间上限（秒）
+
+# 增量更新配置（--incremental：只搜索、下载、分析上次运行之后发表的论文，并在上次研究总结的基础上更新）
+INCREMENTAL_OVERLAP_DAYS = 7  # 起始日期比上次运行提前的天数（覆盖搜索源的收录延迟，已处理过的论文由注册表跳过）
+
+# 持久化研究缓存配置（论文元数据、全文与分析跨运行复用，python research_cache.py 导入历史输出）
+ENABLE_RESEARCH_CACHE = True
+RESEARCH_CACHE_DB = "./output/research_cache.sqlite3"  # 缓存数据库路径
+
+# 自动降载配置（LLM或网络延迟/错误率恶化时逐级降级，情况好转后自动恢复）
+ENABLE_LOAD_SHEDDING = True
+LOAD_SHED_WINDOW_SIZE = 20  # 每个阶段参与统计的最近请求数
+LOAD_SHED_WINDOW_SECONDS = 300  # 只统计最近多少秒内的请求（降级后请求变少时旧样本过期，自动恢复试探）
+LOAD_SHED_MIN_SAMPLES = 5  # 样本少于该数量时不降级
+LOAD_SHED_LLM_LATENCY = 60.0  # LLM请求延迟中位数超过该秒数视为恶化
+LOAD_SHED_DOWNLOAD_LATENCY = 20.0  # 下载请求延迟中位数超过该秒数视为恶化
+LOAD_SHED_ERROR_RATE = 0.3  # 错误率（超时、连接错误、429/5xx）超过该比例视为恶化
+LOAD_SHED_SEVERE_FACTOR = 2.0  # 延迟或错误率达到阈值的该倍数时视为严重恶化
+LOAD_SHED_RECOVERY_FACTOR = 0.7  # 回落到阈值的该比例以下才解除降级（避免在阈值附近反复切换）
+LOAD_SHED_PAPER_FACTOR = 0.5  # LLM恶化时每轮最多处理论文数的缩减比例
+LOAD_SHED_MAX_CHUNKS = 3  # LLM恶化时累积式分析最多处理的文本块数
+
+# 多源并发搜索配置（同时查询全部启用的来源，按到达顺序合并，过滤后的论文达到PAPERS_PER_QUERY即返回）
+ENABLE_SEARCH_FANOUT = True  # False时按 Google Scholar → scholarly → DBLP → arXiv 依次补充搜索
+SEARCH_SOURCE_TIME_BUDGETS = {  # 各来源单次查询的时间预算（秒），超时后取消该来源并使用其已取得的部分结果
+    'google_scholar': 45.0,
+    'scholarly': 30.0,
+    'dblp': 15.0,
+    'arxiv': 20.0,
+}
+SEARCH_FANOUT_GRACE_SECONDS = 2.0  # 来源被取消后等待其返回部分结果的时间（秒）
+
+# 按主机的请求调度配置（令牌桶限速只作用于需要限速的主机，不同主机、不同查询之间并发执行）
+HOST_RATE_LIMITS = {  # 主机 -> 每秒请求数、突发容量与每次排队额外增加的随机等待上限（秒），未列出的主机不限速
+    'scholar.google.com': {'rate': 0.3, 'burst': 1, 'jitter': 1.5},  # 请求过密容易触发验证码/封禁（scholarly库也访问该主机）
+    'dblp.org': {'rate': 1.0, 'burst': 2},
+    'export.arxiv.org': {'rate': 1 / 3, 'burst': 1},  # arXiv API要求请求间隔不少于3秒
+}
+SEARCH_QUERY_CONCURRENCY = 4  # 多查询搜索时同时执行的查询数
+
+# 搜索结果缓存配置（重复查询直接从缓存返回，不发出请求、不占用Google Scholar的限速额度）
+ENABLE_SEARCH_CACHE = True
+SEARCH_CACHE_DB = "./output/search_cache.sqlite3"  # 缓存数据库路径
+SEARCH_CACHE_TTL_HOURS = {  # 各来源结果的有效期（小时）
+    'google_scholar': 72,
+    'scholarly': 72,
+    'dblp': 168,
+    'arxiv': 24,  # arXiv每天有新论文，有效期较短
+}
+
+# 标题近重复检测配置（字符n-gram倒排索引生成候选，只对候选执行模糊匹配）
+DEDUP_GRAM_SIZE = 4  # n-gram长度：越长每个标题的特征越少、去重越快，但拼写差异对共享比例的影响越大
+DEDUP_MIN_GRAM_OVERLAP = 0.5  # 字符级候选：共享n-gram的IDF权重至少占两者中较小标题的该比例（越小越接近逐对比较，候选越多、越慢；0.6时 --verify 2000 已出现遗漏）
+
+# 候选论文排序配置（各特征的权重，默认与原有的相关性排序一致）
+RANKING_WEIGHTS = {
+    'citations': 1.0,  # min(引用数/100, 10)
+    'recency': 1.0,  # max(0, 5 - 发表年数)
+    'source': 1.0,  # 来源权重（见RANKING_SOURCE_WEIGHTS）
+    'venue_match': 5.0,  # 属于所选会议
+    'abstract_length': 0.0,  # min(摘要长度/1000, 1)
+}
+RANKING_SOURCE_WEIGHTS = {  # Google Scholar > scholarly > DBLP > arXiv
+    'google_scholar': 4,
+    'scholarly': 3,
+    'dblp': 2,
+    'arxiv': 1,
+}
+
+# scholarly结果补全配置（先按search_pubs返回的标题、年份、引用数、会议初筛，只对通过的结果调用fill）
+SCHOLARLY_FILL_WORKERS = 2  # 同时进行的补全数（请求仍按scholar.google.com的令牌桶限速）
+SCHOLARLY_FILL_TIMEOUT = 20.0  # 单次补全的超时（秒），超时后使用未补全的信息
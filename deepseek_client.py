@@ -1,10 +1,19 @@
+import copy
 import requests
 import time
 import re
 import threading
 import json
-from typing import List, Dict, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from cancellation import OperationCancelled, cancellable_sleep, cancellable_call
+from paper_state import (
+    RetryableError, RetryQueue, PaperStateTracker, run_with_retries,
+    ANALYZING, ANALYZED, FAILED_RETRYABLE, FAILED_FINAL,
+)
+from research_cache import ResearchCache
+from load_shedding import STAGE_LLM
 from config import (
     API_KEYS, 
     API_KEYS_2,
@@ -31,21 +40,53 @@ from config import (
     ADEQUACY_EVALUATION_THRESHOLD,
     MIN_DEPTH_SEARCH_SCORE,
     MAX_NEW_KEYWORDS_PER_DEPTH,
+    PAPER_RETRY_MAX_ATTEMPTS,
+    ENABLE_RESEARCH_CACHE,
 )
 
+
+class RetryableAPIError(RetryableError):
+    """API请求的临时失败（限流、5xx、超时或连接错误），延迟重试模式下由ask抛出"""
+
+
 class DeepSeekClient:
-    def __init__(self):
+    def __init__(self, session: requests.Session = None, key_scheduler=None,
+                 summary_key_scheduler=None, tenant: str = None, research_cache: ResearchCache = None):
         self.api_keys = API_KEYS
         self.summary_api_keys = API_KEYS_2 if API_KEYS_2 else API_KEYS  # 如果没有专用密钥，使用普通密钥
         self.endpoint = API_ENDPOINT
         self.summary_endpoint = SUMMARY_API_ENDPOINT
         self.model = MODEL_NAME
         self.summary_model = SUMMARY_MODEL_NAME
-        self.current_key_index = 0
-        self.current_summary_key_index = 0
+        self.key_cursor = {'api': 0, 'summary': 0}  # 密钥轮换位置（绑定取消令牌的副本共享）
         self.key_lock = threading.Lock()  # 线程安全的密钥轮换
         self.summary_key_lock = threading.Lock()  # 总结API密钥锁
         
+        # 批量模式下多个主题共享HTTP会话和密钥池，由调度器在主题之间公平分配密钥
+        self.session = session or requests.Session()
+        self.key_scheduler = key_scheduler
+        self.summary_key_scheduler = summary_key_scheduler
+        self.tenant = tenant or 'default'
+        
+        # token用量统计（优先使用API返回的usage字段，缺失时按文本估算；绑定取消令牌的副本共享同一统计）
+        self.usage_lock = threading.Lock()
+        self.usage = {'prompt_tokens': 0, 'completion_tokens': 0}
+        self.model_stats: Dict[str, Dict] = {}  # 模型 -> 调用次数、token、耗时与限流次数（供运行估算使用）
+        
+        # 取消令牌（通过with_cancel_token绑定），触发后请求、重试退避和排队的分析尽快结束
+        self.cancel_token = None
+        
+        # 跨运行的持久化研究缓存（可选），同一模型分析过的论文直接复用分析结果
+        if research_cache is None and ENABLE_RESEARCH_CACHE:
+            research_cache = ResearchCache()
+        self.research_cache = research_cache
+        
+        # 自动降载（通过with_load_shedder绑定），记录每次请求的延迟与成败，LLM恶化时缩减分析的文本量
+        self.load_shedder = None
+        
+        # 延迟重试模式（通过with_deferred_retries绑定）：请求失败时不在原地退避重试，而是抛出RetryableAPIError
+        self.defer_retries = False
+        
         # 从配置文件读取设置
         self.max_tokens_per_request = MAX_TOKENS_PER_REQUEST
         self.max_content_length = MAX_CONTENT_LENGTH
@@ -65,17 +106,90 @@ class DeepSeekClient:
     def _get_next_api_key(self):
         """线程安全的API密钥轮换"""
         with self.key_lock:
-            key = self.api_keys[self.current_key_index]
-            self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
+            key = self.api_keys[self.key_cursor['api']]
+            self.key_cursor['api'] = (self.key_cursor['api'] + 1) % len(self.api_keys)
             return key
     
     def _get_next_summary_api_key(self):
         """线程安全的总结API密钥轮换"""
         with self.summary_key_lock:
-            key = self.summary_api_keys[self.current_summary_key_index]
-            self.current_summary_key_index = (self.current_summary_key_index + 1) % len(self.summary_api_keys)
+            key = self.summary_api_keys[self.key_cursor['summary']]
+            self.key_cursor['summary'] = (self.key_cursor['summary'] + 1) % len(self.summary_api_keys)
             return key
     
+    def _acquire_api_key(self, use_summary_api: bool = False) -> str:
+        """获取本次请求使用的密钥（有调度器时占用直到释放）"""
+        scheduler = self.summary_key_scheduler if use_summary_api else self.key_scheduler
+        if scheduler is not None:
+            return scheduler.acquire(self.tenant, self.cancel_token)
+        return self._get_next_summary_api_key() if use_summary_api else self._get_next_api_key()
+    
+    def _release_api_key(self, api_key: str, use_summary_api: bool = False):
+        """归还调度器分配的密钥"""
+        scheduler = self.summary_key_scheduler if use_summary_api else self.key_scheduler
+        if scheduler is not None:
+            scheduler.release(self.tenant, api_key)
+    
+    def _model_stats(self, model: str) -> Dict:
+        if model not in self.model_stats:
+            self.model_stats[model] = {
+                'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'seconds': 0.0, 'rate_limited': 0
+            }
+        return self.model_stats[model]
+    
+    def _record_usage(self, prompt: str, content: str, usage: Dict = None, model: str = None, seconds: float = 0.0):
+        """累计一次成功调用的token用量"""
+        usage = usage or {}
+        prompt_tokens = usage.get('prompt_tokens') or self._estimate_tokens(prompt)
+        completion_tokens = usage.get('completion_tokens') or self._estimate_tokens(content)
+        with self.usage_lock:
+            self.usage['prompt_tokens'] += prompt_tokens
+            self.usage['completion_tokens'] += completion_tokens
+            stats = self._model_stats(model or self.model)
+            stats['calls'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+            stats['seconds'] += seconds
+    
+    def _record_rate_limit(self, model: str):
+        with self.usage_lock:
+            self._model_stats(model)['rate_limited'] += 1
+    
+    def get_model_stats(self) -> Dict[str, Dict]:
+        """按模型统计的调用次数、token用量、累计耗时（秒）与429限流次数"""
+        with self.usage_lock:
+            return {model: dict(stats) for model, stats in self.model_stats.items()}
+    
+    def get_tokens_used(self) -> int:
+        """客户端创建以来消耗的token总数"""
+        with self.usage_lock:
+            return self.usage['prompt_tokens'] + self.usage['completion_tokens']
+    
+    def with_cancel_token(self, token) -> 'DeepSeekClient':
+        """返回绑定取消令牌的客户端副本（共享会话、密钥轮换与用量统计）"""
+        bound = copy.copy(self)
+        bound.cancel_token = token
+        return bound
+    
+    def with_deferred_retries(self) -> 'DeepSeekClient':
+        """返回延迟重试模式的客户端副本：每次请求只尝试一次，临时失败抛出RetryableAPIError交给调用方的重试队列"""
+        bound = copy.copy(self)
+        bound.defer_retries = True
+        return bound
+    
+    def with_load_shedder(self, load_shedder) -> 'DeepSeekClient':
+        """返回绑定自动降载统计的客户端副本"""
+        bound = copy.copy(self)
+        bound.load_shedder = load_shedder
+        return bound
+    
+    def _record_load(self, seconds: float, ok: bool):
+        if self.load_shedder is not None:
+            self.load_shedder.record(STAGE_LLM, seconds, ok)
+    
+    def _cancelled(self) -> bool:
+        return self.cancel_token is not None and self.cancel_token.cancelled
+    
     def _estimate_tokens(self, text: str) -> int:
         """估算文本的token数量"""
         # 粗略估算：英文约4字符=1token，中文约1.5字符=1token
@@ -120,14 +234,12 @@ class DeepSeekClient:
         
         # 根据是否使用总结API选择配置
         if use_summary_api:
-            api_key = self._get_next_summary_api_key()
             endpoint = self.summary_endpoint
             model = self.summary_model
             max_tokens = SUMMARY_MAX_TOKENS_PER_REQUEST
             timeout = SUMMARY_API_TIMEOUT
             max_input_tokens = int(MAX_INPUT_TOKENS * 1.5)  # 总结API可以处理更多token
         else:
-            api_key = self._get_next_api_key()
             endpoint = self.endpoint
             model = self.model
             max_tokens = self.max_tokens_per_request
@@ -144,6 +256,9 @@ class DeepSeekClient:
         if len(prompt) > self.max_content_length:
             prompt = self._truncate_content_if_needed(prompt)
         
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        api_key = self._acquire_api_key(use_summary_api)
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -157,35 +272,56 @@ class DeepSeekClient:
             "temperature": temperature,
         }
         
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(
-                    endpoint, 
-                    json=payload, 
-                    headers=headers, 
-                    timeout=timeout
-                )
+        try:
+            for attempt in range(max_retries):
+                try:
+                    request_start = time.time()
+                    response = cancellable_call(
+                        self.cancel_token,
+                        self.session.post,
+                        endpoint, 
+                        json=payload, 
+                        headers=headers, 
+                        timeout=timeout
+                    )
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    return result['choices'][0]['message']['content'].strip()
-                elif response.status_code == 429:
-                    # Rate limit exceeded
-                    print(f"⚠️ API调用频率限制，切换密钥...")
-                    if use_summary_api:
-                        api_key = self._get_next_summary_api_key()
+                    if response.status_code == 200:
+                        result = response.json()
+                        content = result['choices'][0]['message']['content'].strip()
+                        self._record_usage(prompt, content, result.get('usage'), model, time.time() - request_start)
+                        self._record_load(time.time() - request_start, True)
+                        return content
+                    
+                    self._record_load(time.time() - request_start, response.status_code < 500 and response.status_code != 429)
+                    if response.status_code == 429:
+                        # Rate limit exceeded
+                        self._record_rate_limit(model)
+                        if self.defer_retries:
+                            raise RetryableAPIError("API调用频率限制", retry_after=2)
+                        print(f"⚠️ API调用频率限制，切换密钥...")
+                        self._release_api_key(api_key, use_summary_api)
+                        api_key = None  # 重新获取被取消时不再重复归还
+                        api_key = self._acquire_api_key(use_summary_api)
+                        headers["Authorization"] = f"Bearer {api_key}"
+                        cancellable_sleep(2, self.cancel_token)
+                        continue
+                    elif response.status_code >= 500 and self.defer_retries:
+                        raise RetryableAPIError(f"API错误: {response.status_code}")
                     else:
-                        api_key = self._get_next_api_key()
-                    headers["Authorization"] = f"Bearer {api_key}"
-                    time.sleep(2)
-                    continue
-                else:
-                    print(f"API错误: {response.status_code} - {response.text}")
+                        print(f"API错误: {response.status_code} - {response.text}")
                     
-            except Exception as e:
-                print(f"请求失败 (尝试 {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+                except (OperationCancelled, RetryableAPIError):
+                    raise
+                except Exception as e:
+                    self._record_load(time.time() - request_start, False)
+                    if self.defer_retries:
+                        raise RetryableAPIError(f"请求失败: {e}") from e
+                    print(f"请求失败 (尝试 {attempt + 1}): {e}")
+                    if attempt < max_retries - 1:
+                        cancellable_sleep(2 ** attempt, self.cancel_token)
+        finally:
+            if api_key is not None:
+                self._release_api_key(api_key, use_summary_api)
         
         return "错误: 无法获取响应"
     
@@ -391,19 +527,41 @@ self attention transformer
         
         return keywords[:5]
     
-    def analyze_paper_text(self, title: str, abstract: str, text_chunks: List[str] = None) -> str:
+    def analyze_paper_text(self, title: str, abstract: str, text_chunks: List[str] = None,
+                           paper: Dict = None) -> str:
         """
         分析单篇论文，使用累积式分析处理多个chunks
         
         Args:
             title: 论文标题
             abstract: 论文摘要
-            text_chunks: PDF处理器提供的文本块列表
+            text_chunks: PDF处理器提供的文本块列表（或按需加载文本块的LazyTextChunks句柄）
+            paper: 论文记录，研究缓存按其身份（arXiv ID、DOI、规范化标题）查找和保存分析
         
         Returns:
             分析结果
         """
-        
+        if self.load_shedder is not None:
+            text_chunks = self.load_shedder.analysis_chunks(abstract, text_chunks)
+        if self.research_cache is None:
+            return self._analyze_paper_text_uncached(title, abstract, text_chunks)
+        
+        # 只复用同一模型基于不少于本次文本量的分析（摘要分析不会顶替全文分析）
+        if text_chunks:
+            text_length = getattr(text_chunks, 'text_length', None) or sum(len(chunk) for chunk in text_chunks)
+        else:
+            text_length = len(abstract or '')
+        identity = paper or {'title': title}
+        cached = self.research_cache.lookup_analysis(identity, self.model, text_length)
+        if cached is not None:
+            print(f"♻️ 使用研究缓存中的分析: {title[:50]}")
+            return cached
+        analysis = self._analyze_paper_text_uncached(title, abstract, text_chunks)
+        self.research_cache.put_analysis(identity, self.model, analysis, text_length)
+        return analysis
+    
+    def _analyze_paper_text_uncached(self, title: str, abstract: str, text_chunks: List[str] = None) -> str:
+        """分析单篇论文，不查询研究缓存"""
         # 如果没有提供chunks或只有一个chunk，直接分析
         if not text_chunks or len(text_chunks) == 1:
             content_to_analyze = text_chunks[0] if text_chunks else abstract
@@ -467,8 +625,8 @@ self attention transformer
         
         current_analysis = self.ask(first_chunk_prompt, temperature=0.2)
         
-        # 逐步累积分析后续chunks
-        for i, chunk in enumerate(text_chunks[1:], 2):
+        # 逐步累积分析后续chunks（逐块读取，兼容按需加载的文本块句柄）
+        for i, chunk in enumerate(islice(text_chunks, 1, None), 2):
             print(f"  📝 分析第{i}个块...")
             
             cumulative_prompt = f"""
@@ -494,7 +652,9 @@ self attention transformer
             
             try:
                 current_analysis = self.ask(cumulative_prompt, temperature=0.2)
-                time.sleep(0.3)  # 避免请求过快
+                cancellable_sleep(0.3, self.cancel_token)  # 避免请求过快
+            except OperationCancelled:
+                raise
             except Exception as e:
                 print(f"    ⚠️ 第{i}块分析失败: {e}")
                 # 如果某个块分析失败，继续使用之前的分析结果
@@ -526,16 +686,20 @@ self attention transformer
             final_analysis = self.ask(final_prompt, temperature=0.2)
             print(f"  ✅ 累积式分析完成")
             return final_analysis
+        except OperationCancelled:
+            raise
         except Exception as e:
             print(f"  ❌ 最终分析失败: {e}")
             # 如果最终分析失败，返回最后的累积结果
             return current_analysis + "\n\n[注: 最终整理步骤失败，使用累积分析结果]"
     
-    def analyze_papers_concurrently(self, papers: List[Dict]) -> List[Dict]:
-        """并发分析多篇论文"""
+    def analyze_papers_concurrently(self, papers: List[Dict], on_result: Callable[[Dict], None] = None,
+                                    state_tracker: PaperStateTracker = None) -> List[Dict]:
+        """并发分析多篇论文，on_result可选，每完成一篇论文的分析即被调用；state_tracker可选，记录每篇论文的状态转换"""
+        state_tracker = state_tracker or PaperStateTracker()
         if not ENABLE_CONCURRENT_ANALYSIS or len(papers) <= 1:
             # 如果禁用并发或论文数量太少，使用串行处理
-            return self._analyze_papers_sequentially(papers)
+            return self._analyze_papers_sequentially(papers, on_result, state_tracker)
         
         print(f"🚀 开始并发分析{len(papers)}篇论文...")
         print(f"   - 最大并发数: {MAX_CONCURRENT_ANALYSIS}")
@@ -546,57 +710,120 @@ self attention transformer
         
         # 分批处理论文
         for batch_start in range(0, total_papers, CONCURRENT_BATCH_SIZE):
+            if self._cancelled():
+                print(f"🛑 分析已取消，跳过剩余 {total_papers - batch_start} 篇论文")
+                break
             batch_end = min(batch_start + CONCURRENT_BATCH_SIZE, total_papers)
             batch_papers = papers[batch_start:batch_end]
             
             print(f"📊 处理批次 {batch_start//CONCURRENT_BATCH_SIZE + 1}: 论文 {batch_start+1}-{batch_end}")
             
-            batch_analyses = self._analyze_batch_concurrently(batch_papers, batch_start)
+            batch_analyses = self._analyze_batch_concurrently(batch_papers, batch_start, on_result, state_tracker)
             analyses.extend(batch_analyses)
             
             # 批次之间添加延迟
             if batch_end < total_papers:
-                time.sleep(ANALYSIS_RATE_LIMIT_DELAY * 2)
+                if self.cancel_token is not None:
+                    self.cancel_token.wait(ANALYSIS_RATE_LIMIT_DELAY * 2)
+                else:
+                    time.sleep(ANALYSIS_RATE_LIMIT_DELAY * 2)
         
         print(f"✅ 并发分析完成，成功分析{len(analyses)}篇论文")
         return analyses
     
-    def _analyze_batch_concurrently(self, papers: List[Dict], batch_offset: int = 0) -> List[Dict]:
-        """并发分析一批论文"""
+    def _analyze_batch_concurrently(self, papers: List[Dict], batch_offset: int = 0,
+                                    on_result: Callable[[Dict], None] = None,
+                                    state_tracker: PaperStateTracker = None) -> List[Dict]:
+        """
+        并发分析一批论文（取消时丢弃排队任务，只返回已完成的分析）
+        
+        临时失败的论文放入延迟重试队列，工作线程继续分析其他论文，到期后重新提交；
+        最后一次尝试使用原地退避重试的客户端
+        """
+        state_tracker = state_tracker or PaperStateTracker()
         analyses = []
         max_workers = min(MAX_CONCURRENT_ANALYSIS, len(self.api_keys), len(papers))
+        deferred = self.with_deferred_retries()
+        retries = RetryQueue()
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有分析任务
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
             future_to_paper = {}
+            pending = set()
+            
+            def submit(paper: Dict, paper_index: int):
+                attempt = state_tracker.attempts(paper, ANALYZING) + 1
+                state_tracker.transition(paper, ANALYZING)
+                client = self if attempt >= PAPER_RETRY_MAX_ATTEMPTS else deferred
+                future = executor.submit(client._analyze_single_paper_with_retry, paper, paper_index)
+                future_to_paper[future] = (paper, paper_index, attempt)
+                pending.add(future)
+            
+            # 提交所有分析任务
             for i, paper in enumerate(papers):
-                future = executor.submit(self._analyze_single_paper_with_retry, paper, batch_offset + i + 1)
-                future_to_paper[future] = paper
+                submit(paper, batch_offset + i + 1)
             
-            # 收集结果
-            for future in as_completed(future_to_paper):
-                paper = future_to_paper[future]
+            # 收集结果（定时醒来检查取消令牌并重新提交到期的重试）
+            while pending or len(retries):
+                if self._cancelled():
+                    print(f"🛑 分析已取消，放弃 {len(pending) + len(retries)} 个未完成的分析任务")
+                    break
+                for paper, paper_index in iter(retries.pop_ready, None):
+                    submit(paper, paper_index)
                 try:
-                    analysis = future.result()
+                    if not pending:
+                        cancellable_sleep(min(retries.wait_time(), 0.5), self.cancel_token)
+                        continue
+                    done, still_pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                except OperationCancelled:
+                    continue
+                except KeyboardInterrupt:
+                    if self.cancel_token is None:
+                        raise
+                    self.cancel_token.cancel("用户中断")
+                    continue
+                pending.intersection_update(still_pending)
+                for future in done:
+                    paper, paper_index, attempt = future_to_paper.pop(future)
+                    try:
+                        analysis = future.result()
+                    except RetryableError as e:
+                        if attempt >= PAPER_RETRY_MAX_ATTEMPTS:
+                            state_tracker.transition(paper, FAILED_FINAL, str(e))
+                            print(f"  ❌ 分析失败: {paper['title']} - {e}")
+                        else:
+                            delay = retries.schedule((paper, paper_index), attempt, e.retry_after)
+                            state_tracker.transition(paper, FAILED_RETRYABLE, f"{e} ({delay:.0f}秒后重试)")
+                            print(f"  ⏳ 分析暂时失败，{delay:.0f}秒后重试: {paper['title']} - {e}")
+                        continue
+                    except Exception as e:
+                        state_tracker.transition(paper, FAILED_FINAL, str(e))
+                        print(f"  ❌ 分析异常: {paper['title']} - {e}")
+                        continue
                     if analysis:
+                        state_tracker.transition(paper, ANALYZED)
                         analyses.append(analysis)
                         print(f"  ✅ 完成分析: {paper['title']}")
+                        if on_result:
+                            on_result(analysis)
                     else:
+                        state_tracker.transition(paper, FAILED_FINAL)
                         print(f"  ❌ 分析失败: {paper['title']}")
-                except Exception as e:
-                    print(f"  ❌ 分析异常: {paper['title']} - {e}")
+        finally:
+            # 取消时不等待进行中的请求（它们会在令牌触发后自行中止）
+            executor.shutdown(wait=not self._cancelled(), cancel_futures=True)
         
         return analyses
     
     def _analyze_single_paper_with_retry(self, paper: Dict, paper_index: int) -> Dict:
-        """分析单篇论文并包含重试机制"""
+        """分析单篇论文（延迟重试模式下临时失败抛出RetryableAPIError，由调用方放入重试队列）"""
         try:
             # 添加小的随机延迟以避免同时请求
-            time.sleep(ANALYSIS_RATE_LIMIT_DELAY * (paper_index % 4))
+            cancellable_sleep(ANALYSIS_RATE_LIMIT_DELAY * (paper_index % 4), self.cancel_token)
             
             # 使用新的分析方法
             text_chunks = paper.get('text_chunks', [])
-            analysis = self.analyze_paper_text(paper['title'], paper['abstract'], text_chunks)
+            analysis = self.analyze_paper_text(paper['title'], paper['abstract'], text_chunks, paper=paper)
             
             return {
                 'paper': paper['title'],
@@ -605,33 +832,46 @@ self attention transformer
                 'text_length': paper.get('text_length', 0),
                 'chunks_count': len(text_chunks) if text_chunks else 0
             }
+        except OperationCancelled:
+            return None
+        except RetryableError:
+            raise
         except Exception as e:
             print(f"⚠️ 论文分析失败: {paper['title'][:50]}... - {e}")
             return None
     
-    def _analyze_papers_sequentially(self, papers: List[Dict]) -> List[Dict]:
-        """串行分析论文（fallback方法）"""
+    def _analyze_papers_sequentially(self, papers: List[Dict], on_result: Callable[[Dict], None] = None,
+                                     state_tracker: PaperStateTracker = None) -> List[Dict]:
+        """串行分析论文（fallback方法，临时失败的论文延后重试）"""
         print(f"📝 开始串行分析{len(papers)}篇论文...")
-        analyses = []
+        deferred = self.with_deferred_retries()
         
-        for i, paper in enumerate(papers, 1):
-            print(f"  分析论文 {i}/{len(papers)}: {paper['title'][:50]}...")
-            
+        def analyze(paper: Dict, final_attempt: bool) -> Dict:
+            print(f"  分析论文: {paper['title'][:50]}...")
+            client = self if final_attempt else deferred
             try:
                 text_chunks = paper.get('text_chunks', [])
-                analysis = self.analyze_paper_text(paper['title'], paper['abstract'], text_chunks)
-                
-                analyses.append({
-                    'paper': paper['title'],
-                    'paper_id': paper.get('arxiv_id', ''),
-                    'analysis': analysis,
-                    'text_length': paper.get('text_length', 0),
-                    'chunks_count': len(text_chunks) if text_chunks else 0
-                })
-                print(f"  ✅ 完成分析")
+                analysis = client.analyze_paper_text(paper['title'], paper['abstract'], text_chunks, paper=paper)
+            except (OperationCancelled, RetryableError):
+                raise
             except Exception as e:
                 print(f"  ❌ 分析失败: {e}")
-        
+                return None
+            result = {
+                'paper': paper['title'],
+                'paper_id': paper.get('arxiv_id', ''),
+                'analysis': analysis,
+                'text_length': paper.get('text_length', 0),
+                'chunks_count': len(text_chunks) if text_chunks else 0
+            }
+            print(f"  ✅ 完成分析")
+            if on_result:
+                on_result(result)
+            return result
+        
+        analyses = run_with_retries(papers, analyze, state_tracker or PaperStateTracker(), ANALYZING, self.cancel_token)
+        if self._cancelled():
+            print(f"🛑 分析已取消，保留已完成的 {len(analyses)} 篇分析")
         return analyses
     
     def analyze_multiple_papers_summary(self, paper_analyses: List[Dict], research_topic: str, depth_round: int = 1) -> str:
@@ -671,6 +911,43 @@ self attention transformer
         print(f"🧠 正在使用专用总结API生成研究综述...")
         return self.ask(prompt, temperature=SUMMARY_TEMPERATURE, use_summary_api=True)
     
+    def update_research_summary(self, previous_summary: str, new_analyses: List[Dict], research_topic: str,
+                                since: str = "") -> str:
+        """基于上次的研究综述与新增论文的分析更新综述（增量更新模式），使用专用总结API"""
+        if not new_analyses:
+            return previous_summary
+        if not previous_summary:
+            return self.analyze_multiple_papers_summary(new_analyses, research_topic)
+        
+        analyses_text = ""
+        for i, analysis in enumerate(new_analyses[:MAX_ANAYLISE_PAPERS], 1):
+            analyses_text += f"\n新论文 {i}: {analysis['paper']}\n"
+            analyses_text += f"分析: {analysis['analysis'][:SINGLE_ANAYLISE_LENTH]}...\n"
+        analyses_text = self._truncate_content_if_needed(analyses_text, max_tokens=MAX_ANAYLISE_OUTPUT_LENGTH)
+        since_info = f"（{since}之后发表）" if since else ""
+        
+        prompt = f"""
+以下是关于"{research_topic}"的已有研究综述，以及{len(new_analyses)}篇新增论文{since_info}的分析。
+请在已有综述的基础上整合新论文，输出更新后的完整研究综述:
+
+已有研究综述:
+{previous_summary}
+
+新增论文分析:
+{analyses_text}
+
+要求:
+1. 保持原综述的章节结构（研究现状、技术方法、创新突破、研究空白、未来方向、应用意义）
+2. 把新论文的贡献补充到对应章节，新的趋势或突破需要明确指出
+3. 新论文推翻或修正原有结论时，更新相应内容
+4. 在开头用2-3句话概括本次更新的主要变化
+
+请用清晰的章节格式回应，具体、技术化且可操作。
+"""
+        
+        print(f"🧠 正在使用专用总结API更新研究综述 (新增{len(new_analyses)}篇论文)...")
+        return self.ask(prompt, temperature=SUMMARY_TEMPERATURE, use_summary_api=True)
+    
     def evaluate_research_adequacy(self, research_summary: str, research_topic: str, total_papers_analyzed: int) -> Tuple[float, str, List[str]]:
         """
         评估研究资料的充分性，返回(评分, 评估报告, 缺失领域列表)
@@ -798,6 +1075,35 @@ self attention transformer
         
         return missing_areas[:MAX_NEW_KEYWORDS_PER_DEPTH]  # 限制数量
     
+    def draft_missing_areas(self, research_topic: str, paper_analyses: List[Dict],
+                            max_areas: int = MAX_NEW_KEYWORDS_PER_DEPTH) -> List[str]:
+        """基于已完成的部分论文分析，用普通模型快速草拟可能的缺失研究领域（用于推测下一轮查询）"""
+        if not paper_analyses:
+            return []
+        
+        analyses_text = ""
+        for i, analysis in enumerate(paper_analyses[:MAX_ANAYLISE_PAPERS], 1):
+            analyses_text += f"\n论文 {i}: {analysis['paper']}\n"
+            analyses_text += f"分析要点: {analysis['analysis'][:800]}...\n"
+        analyses_text = self._truncate_content_if_needed(analyses_text)
+        
+        prompt = f"""
+以下是关于"{research_topic}"的部分论文分析要点，请快速判断现有资料最可能缺失的研究领域。
+
+论文分析:
+{analyses_text}
+
+请只按以下格式返回，不要其他内容:
+
+**缺失的研究领域**:
+1. [具体的缺失领域1]
+2. [具体的缺失领域2]
+3. [具体的缺失领域3]
+"""
+        
+        response = self.ask(prompt, temperature=0.3)
+        return self._extract_missing_areas(response)[:max_areas]
+    
     def generate_depth_search_queries(self, research_topic: str, missing_areas: List[str], previous_queries: List[str], num_queries: int = 2) -> List[str]:
         """
         基于缺失领域生成深度搜索查询
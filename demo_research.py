@@ -232,7 +232,8 @@ def demo_fixed_research():
                 analysis = ai_client.analyze_paper_text(
                     paper['title'], 
                     paper.get('abstract', ''), 
-                    text_chunks
+                    text_chunks,
+                    paper=paper
                 )
                 
                 all_analyses.append({
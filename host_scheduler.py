@@ -0,0 +1,97 @@
+"""
+按主机的请求调度
+每个需要限速的主机（Google Scholar、DBLP、arXiv API）一个令牌桶：同一主机的请求按配置的速率排队，
+不同主机之间、不同查询之间互不等待。未配置的主机不限速。
+同一进程内的全部搜索器（包括批量研究的多个主题）共享同一个调度器，对每个主机的总请求速率受控。
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+from cancellation import cancellable_sleep
+from config import HOST_RATE_LIMITS
+
+
+class TokenBucket:
+    """单个主机的令牌桶：rate为每秒补充的令牌数，burst为桶容量，jitter为每次等待额外增加的随机秒数上限"""
+
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self.requests = 0
+        self.wait_seconds = 0.0
+
+    def reserve(self) -> float:
+        """预留一个令牌，返回需要等待的秒数（令牌可以透支，后到的请求依次排在后面）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self.rate)
+            if wait > 0 and self.jitter:
+                wait += random.uniform(0, self.jitter)
+            self.requests += 1
+            self.wait_seconds += wait
+            return wait
+
+    def refund(self, wait: float):
+        """等待被取消时归还预留的令牌"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+            self.requests -= 1
+            self.wait_seconds -= wait
+
+
+class HostScheduler:
+    """为每个主机维护令牌桶，请求前调用acquire（线程安全）"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict]] = None):
+        limits = HOST_RATE_LIMITS if limits is None else limits
+        self._buckets = {host: TokenBucket(**limit) for host, limit in limits.items()}
+
+    def _bucket(self, host: str) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(host)
+        if bucket is None and host.startswith('www.'):
+            bucket = self._buckets.get(host[4:])
+        return bucket
+
+    def acquire(self, host: str, cancel_token=None) -> float:
+        """等待到该主机允许发出下一个请求（可被取消令牌打断），返回实际等待的秒数"""
+        bucket = self._bucket(host)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve()
+        if wait > 0:
+            try:
+                cancellable_sleep(wait, cancel_token)
+            except BaseException:
+                bucket.refund(wait)
+                raise
+        return wait
+
+    def stats(self) -> Dict[str, Dict]:
+        """各主机经调度的请求数与累计排队等待时间"""
+        return {
+            host: {'requests': bucket.requests, 'wait_seconds': round(bucket.wait_seconds, 1)}
+            for host, bucket in self._buckets.items() if bucket.requests
+        }
+
+
+_shared_scheduler: Optional[HostScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_host_scheduler() -> HostScheduler:
+    """进程内共享的调度器"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = HostScheduler()
+        return _shared_scheduler
@@ -0,0 +1,132 @@
+"""
+增量更新
+同一主题定期重新运行时，加载上次运行的论文身份、分析结果与研究总结：
+只搜索上次运行之后发表的论文（起始日期下推到各搜索源的查询参数），已处理过的论文由注册表跳过，
+只下载、分析新增论文，最后基于上次的研究总结与新增论文的分析更新总结。
+上次运行的论文元数据与分析作为第0轮写入本次的结果目录，下一次增量更新可以继续以本次为基线。
+"""
+
+import copy
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import OUTPUT_DIR, CHECKPOINT_DIR, INCREMENTAL_OVERLAP_DAYS
+from result_store import ResultStore
+from run_checkpoint import deserialize_filters
+
+# 上次运行的论文与分析在本次结果目录中的轮次编号
+CARRIED_ROUND = 0
+
+
+def find_latest_run(research_topic: str, output_dir: str = OUTPUT_DIR) -> Optional[str]:
+    """查找同一主题最近一次完成（未取消）的运行ID"""
+    latest = None
+    for index_file in (Path(output_dir) / "runs").glob("*/index.json"):
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        if index.get('research_topic') != research_topic or index.get('cancelled'):
+            continue
+        run_date = _run_date(index, index_file)
+        if latest is None or run_date > latest[0]:
+            latest = (run_date, index.get('run_id') or index_file.parent.name)
+    return latest[1] if latest else None
+
+
+def _run_date(index: Dict, index_file: Path) -> datetime:
+    """运行开始时间：优先使用索引中的started_at，旧运行使用检查点创建时间，最后退回索引文件修改时间"""
+    if index.get('started_at'):
+        return datetime.fromisoformat(index['started_at'])
+    state_file = Path(CHECKPOINT_DIR) / index_file.parent.name / "state.json"
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return datetime.fromisoformat(json.load(f)['created_at'])
+    except (OSError, KeyError, ValueError):
+        return datetime.fromtimestamp(index_file.stat().st_mtime)
+
+
+class PreviousRun:
+    """上一次运行的结果（论文元数据、分析、研究总结与查询），作为增量更新的基线"""
+
+    def __init__(self, run_id: str, output_dir: str = OUTPUT_DIR):
+        store = ResultStore(run_id, output_dir=output_dir, save_texts=False)
+        if not store.index_file.exists():
+            raise FileNotFoundError(f"未找到运行 {run_id} 的结果索引: {store.index_file}")
+        with open(store.index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        self.run_id = run_id
+        self.research_topic: str = index.get('research_topic', '')
+        self.run_date = _run_date(index, store.index_file)
+        self.summary: str = index.get('final_research_summary', '')
+        self.queries: List[str] = index.get('all_queries_used', [])
+        self.adequacy_score: float = index.get('final_adequacy_score', 0.0)
+        self.evaluation_report: str = index.get('final_evaluation_report', '')
+        self.filters: Optional[Dict] = index.get('filters_used')
+        # 全文留在上次的结果目录中，本次只保留元数据（text_file改为指向上次目录的路径）
+        self.papers = [self._carried_paper(paper, store) for paper in store.iter_papers()]
+        self.analyses = [dict({'carried_from': run_id}, **analysis) for analysis in store.iter_analyses()]
+
+    def _carried_paper(self, paper: Dict, store: ResultStore) -> Dict:
+        carried = dict(paper)
+        carried.setdefault('carried_from', self.run_id)
+        text_file = carried.pop('text_file', None)
+        if text_file:
+            carried['carried_text_file'] = str(store.run_dir / text_file)
+        return carried
+
+    def _checkpoint_state(self) -> Dict:
+        state_file = Path(CHECKPOINT_DIR) / self.run_id / "state.json"
+        if not state_file.exists():
+            return {}
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def search_filters(self):
+        """上次运行使用的搜索过滤器（从其检查点读取，没有检查点时返回None）"""
+        return deserialize_filters(self._checkpoint_state().get('filters'))
+
+    def download_dir(self) -> Optional[str]:
+        """上次运行的下载目录（仍存在时复用，已下载的PDF不再重复下载）"""
+        download_dir = self._checkpoint_state().get('download_dir')
+        return download_dir if download_dir and Path(download_dir).is_dir() else None
+
+    @property
+    def since(self) -> datetime:
+        """本次搜索的最早发表时间（上次运行开始时间提前INCREMENTAL_OVERLAP_DAYS天）"""
+        return self.run_date - timedelta(days=INCREMENTAL_OVERLAP_DAYS)
+
+    def narrow_filters(self, filters):
+        """返回起始日期不早于since的过滤器副本（用户设置了更晚的起始日期时保持不变）"""
+        narrowed = copy.copy(filters)
+        if narrowed.start_date is None or narrowed.start_date < self.since:
+            narrowed.start_date = self.since
+        return narrowed
+
+    def seed_registry(self, registry):
+        """把上次运行的论文登记到注册表，本次搜索到的同一论文直接跳过"""
+        registry.restore_round(self.papers, self.analyses, CARRIED_ROUND)
+
+    def summary_info(self, new_analyses: List[Dict]) -> Dict:
+        """写入结果的增量更新信息"""
+        return {
+            'previous_run_id': self.run_id,
+            'previous_run_date': self.run_date.isoformat(),
+            'since': self.since.isoformat(),
+            'carried_papers': len(self.papers),
+            'carried_analyses': len(self.analyses),
+            'new_analyses': len(new_analyses),
+        }
+
+
+def load_previous_run(research_topic: str, run_id: Optional[str] = None,
+                      output_dir: str = OUTPUT_DIR) -> Optional[PreviousRun]:
+    """加载指定运行（或同一主题最近一次运行）作为增量基线，找不到时返回None"""
+    run_id = run_id or find_latest_run(research_topic, output_dir)
+    if not run_id:
+        return None
+    return PreviousRun(run_id, output_dir)
@@ -0,0 +1,106 @@
+"""
+API密钥池调度器
+多个研究主题（租户）在同一进程中并发运行时共享同一个密钥池：
+每个租户同时占用的密钥数不超过公平份额，没有其他租户等待时可以借用空闲密钥。
+"""
+
+import threading
+from collections import deque
+from typing import Dict, List
+
+from cancellation import CANCEL_POLL_INTERVAL
+
+
+class KeyPoolScheduler:
+    """在多个租户之间公平分配API密钥（线程安全）"""
+
+    def __init__(self, keys: List[str], name: str = "api"):
+        self.name = name
+        self.keys = list(keys)
+        self._free = deque(self.keys)  # 空闲密钥，按最近释放顺序排列（最久未用的在前）
+        self._cond = threading.Condition()
+        self._tenants = set()
+        self._in_use: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+        self._acquired: Dict[str, int] = {}
+
+    def register(self, tenant: str):
+        """登记租户，公平份额随之重新计算"""
+        with self._cond:
+            self._tenants.add(tenant)
+            self._in_use.setdefault(tenant, 0)
+            self._waiting.setdefault(tenant, 0)
+            self._acquired.setdefault(tenant, 0)
+            self._cond.notify_all()
+
+    def unregister(self, tenant: str):
+        """租户结束后释放其份额给其他租户"""
+        with self._cond:
+            self._tenants.discard(tenant)
+            self._cond.notify_all()
+
+    def fair_share(self) -> int:
+        with self._cond:
+            return self._fair_share()
+
+    def _fair_share(self) -> int:
+        return max(1, len(self.keys) // max(1, len(self._tenants)))
+
+    def _can_acquire(self, tenant: str) -> bool:
+        if not self._free:
+            return False
+        share = self._fair_share()
+        if self._in_use.get(tenant, 0) < share:
+            return True
+        # 工作守恒：没有其他租户在份额内等待时，允许借用空闲密钥
+        return not any(
+            waiting > 0 and self._in_use.get(other, 0) < share
+            for other, waiting in self._waiting.items()
+            if other != tenant
+        )
+
+    def acquire(self, tenant: str, cancel_token=None) -> str:
+        """为租户获取一个密钥，超出份额且有其他租户等待时阻塞（可被取消令牌打断）"""
+        if not self.keys:
+            raise RuntimeError(f"密钥池 {self.name} 为空，请在config.py中配置API密钥")
+        with self._cond:
+            if tenant not in self._in_use:
+                self._tenants.add(tenant)
+                self._in_use[tenant] = 0
+                self._acquired[tenant] = 0
+            self._waiting[tenant] = self._waiting.get(tenant, 0) + 1
+            try:
+                while not self._can_acquire(tenant):
+                    if cancel_token is None:
+                        self._cond.wait()
+                        continue
+                    cancel_token.raise_if_cancelled()
+                    self._cond.wait(CANCEL_POLL_INTERVAL)
+            finally:
+                self._waiting[tenant] -= 1
+            key = self._free.popleft()
+            self._in_use[tenant] += 1
+            self._acquired[tenant] += 1
+            self._cond.notify_all()
+            return key
+
+    def release(self, tenant: str, key: str):
+        """归还密钥"""
+        with self._cond:
+            self._free.append(key)
+            self._in_use[tenant] = max(0, self._in_use.get(tenant, 0) - 1)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """各租户的密钥使用统计"""
+        with self._cond:
+            return {
+                'pool': self.name,
+                'keys': len(self.keys),
+                'free': len(self._free),
+                'fair_share': self._fair_share(),
+                'tenants': {
+                    tenant: {'in_use': self._in_use.get(tenant, 0), 'acquired': count}
+                    for tenant, count in self._acquired.items()
+                },
+            }
@@ -0,0 +1,186 @@
+"""
+自动降载
+按阶段（LLM请求、PDF下载请求）统计最近一段时间的请求延迟与错误率，超过阈值时逐级降级：
+    下载恶化 → 跳过备用PDF获取策略；严重恶化 → 不再下载PDF，直接使用摘要
+    LLM恶化  → 缩减每轮论文数、累积式分析只处理前N个文本块；严重恶化 → 已提取全文的论文也只分析摘要
+降级在每篇论文处理/分析时实时判断，统计回落到阈值以下后自动恢复，降级的启用与解除记录随结果导出。
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import (
+    LOAD_SHED_WINDOW_SIZE,
+    LOAD_SHED_WINDOW_SECONDS,
+    LOAD_SHED_MIN_SAMPLES,
+    LOAD_SHED_LLM_LATENCY,
+    LOAD_SHED_DOWNLOAD_LATENCY,
+    LOAD_SHED_ERROR_RATE,
+    LOAD_SHED_SEVERE_FACTOR,
+    LOAD_SHED_RECOVERY_FACTOR,
+    LOAD_SHED_PAPER_FACTOR,
+    LOAD_SHED_MAX_CHUNKS,
+)
+
+# 统计的阶段
+STAGE_LLM = 'llm'
+STAGE_DOWNLOAD = 'download'
+
+# 降级措施
+SKIP_FALLBACK = 'skip_fallback'  # 跳过备用PDF获取策略（_intelligent_search_fallback等）
+ABSTRACT_ONLY = 'abstract_only'  # 不下载PDF，直接使用摘要
+ABSTRACT_ANALYSIS = 'abstract_analysis'  # 只基于摘要分析（不分析已提取的全文）
+REDUCE_PAPERS = 'reduce_papers'  # 缩减每轮最多处理的论文数
+CAP_CHUNKS = 'cap_chunks'  # 累积式分析只处理前LOAD_SHED_MAX_CHUNKS个文本块
+
+# 各阶段在恶化（1）与严重恶化（2）时启用的降级措施
+STAGE_DEGRADATIONS = {
+    STAGE_DOWNLOAD: {1: (SKIP_FALLBACK,), 2: (SKIP_FALLBACK, ABSTRACT_ONLY)},
+    STAGE_LLM: {1: (REDUCE_PAPERS, CAP_CHUNKS), 2: (REDUCE_PAPERS, CAP_CHUNKS, ABSTRACT_ANALYSIS)},
+}
+STAGE_LATENCY_THRESHOLDS = {STAGE_LLM: LOAD_SHED_LLM_LATENCY, STAGE_DOWNLOAD: LOAD_SHED_DOWNLOAD_LATENCY}
+
+
+class LoadShedder:
+    """滚动统计各阶段的延迟与错误率，并据此决定当前启用的降级措施（线程安全）"""
+
+    def __init__(self, window_size: int = LOAD_SHED_WINDOW_SIZE, window_seconds: float = LOAD_SHED_WINDOW_SECONDS,
+                 min_samples: int = LOAD_SHED_MIN_SAMPLES):
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._samples = {stage: deque(maxlen=window_size) for stage in STAGE_LATENCY_THRESHOLDS}
+        self._levels = {stage: 0 for stage in STAGE_LATENCY_THRESHOLDS}
+        self._active_since: Dict[str, float] = {}  # 降级措施 -> 启用时刻
+        self._seconds_active: Dict[str, float] = {}
+        self.events: List[Dict] = []
+        self.round_num = None
+
+    def record(self, stage: str, seconds: float, ok: bool):
+        """记录一次请求的耗时与是否成功"""
+        with self._lock:
+            self._samples[stage].append((time.time(), seconds, ok))
+            self._update(stage)
+
+    def _stage_metrics(self, stage: str) -> Dict:
+        """最近窗口内的延迟中位数、错误率与样本数（调用方持有锁）"""
+        samples = self._samples[stage]
+        cutoff = time.time() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        if not samples:
+            return {'samples': 0, 'latency_p50': 0.0, 'error_rate': 0.0}
+        return {
+            'samples': len(samples),
+            'latency_p50': statistics.median(seconds for _, seconds, _ in samples),
+            'error_rate': sum(1 for _, _, ok in samples if not ok) / len(samples),
+        }
+
+    def _update(self, stage: str):
+        """按当前统计重新计算阶段的恶化级别（带回落滞后），级别变化时更新降级措施（调用方持有锁）"""
+        metrics = self._stage_metrics(stage)
+        current = self._levels[stage]
+        if metrics['samples'] < self.min_samples:
+            level, ratio = 0, 0.0
+        else:
+            ratio = max(metrics['latency_p50'] / STAGE_LATENCY_THRESHOLDS[stage],
+                        metrics['error_rate'] / LOAD_SHED_ERROR_RATE)
+            level = 2 if ratio >= LOAD_SHED_SEVERE_FACTOR else 1 if ratio >= 1 else 0
+            # 已降级时需要回落到阈值的LOAD_SHED_RECOVERY_FACTOR以下才解除
+            thresholds = {1: 1.0, 2: LOAD_SHED_SEVERE_FACTOR}
+            if level < current and ratio >= thresholds[current] * LOAD_SHED_RECOVERY_FACTOR:
+                level = current
+        if level == current:
+            return
+        self._levels[stage] = level
+        reason = (f"{stage}: 延迟中位数 {metrics['latency_p50']:.1f}秒, 错误率 {metrics['error_rate']:.0%}, "
+                  f"样本 {metrics['samples']}")
+        self._apply_levels(reason)
+
+    def _apply_levels(self, reason: str):
+        """根据各阶段级别启用/解除降级措施并记录事件（调用方持有锁）"""
+        wanted = set()
+        for stage, level in self._levels.items():
+            wanted.update(STAGE_DEGRADATIONS[stage].get(level, ()))
+        now = time.time()
+        for degradation in sorted(wanted - set(self._active_since)):
+            self._active_since[degradation] = now
+            self._log_event(degradation, True, reason, now)
+        for degradation in sorted(set(self._active_since) - wanted):
+            started = self._active_since.pop(degradation)
+            self._seconds_active[degradation] = self._seconds_active.get(degradation, 0.0) + now - started
+            self._log_event(degradation, False, reason, now)
+
+    def _log_event(self, degradation: str, active: bool, reason: str, now: float):
+        self.events.append({
+            'at': round(now - self._start, 1), 'round': self.round_num,
+            'degradation': degradation, 'active': active, 'reason': reason
+        })
+        if active:
+            print(f"🪫 自动降载: 启用 {degradation} ({reason})")
+        else:
+            print(f"🔋 自动降载: 解除 {degradation} ({reason})")
+
+    def active(self, degradation: str) -> bool:
+        """某项降级措施当前是否启用（样本过期后重新评估，实现自动恢复）"""
+        with self._lock:
+            for stage in self._levels:
+                if self._levels[stage]:
+                    self._update(stage)
+            return degradation in self._active_since
+
+    def active_degradations(self) -> List[str]:
+        with self._lock:
+            for stage in self._levels:
+                if self._levels[stage]:
+                    self._update(stage)
+            return sorted(self._active_since)
+
+    def plan_round(self, round_num: int, max_papers: int) -> int:
+        """开始新一轮：LLM恶化时按LOAD_SHED_PAPER_FACTOR缩减本轮最多处理的论文数"""
+        self.round_num = round_num
+        if not self.active(REDUCE_PAPERS):
+            return max_papers
+        reduced = max(1, int(max_papers * LOAD_SHED_PAPER_FACTOR))
+        print(f"🪫 自动降载: 第{round_num}轮最多处理 {reduced} 篇论文 (原 {max_papers} 篇)")
+        return reduced
+
+    def process_options(self, process_options: Optional[Dict]) -> Optional[Dict]:
+        """把当前启用的下载降级合并到process_options（用于无法逐篇判断的分布式任务）"""
+        skip_fallback = self.active(SKIP_FALLBACK)
+        abstract_only = self.active(ABSTRACT_ONLY)
+        if not skip_fallback and not abstract_only:
+            return process_options
+        options = dict(process_options or {})
+        options['skip_fallback'] = options.get('skip_fallback', False) or skip_fallback
+        options['abstract_only'] = options.get('abstract_only', False) or abstract_only
+        return options
+
+    def analysis_chunks(self, abstract: str, text_chunks):
+        """本次分析使用的文本块：LLM严重恶化时改为只分析摘要，恶化时只保留前LOAD_SHED_MAX_CHUNKS个文本块"""
+        if text_chunks and abstract and self.active(ABSTRACT_ANALYSIS):
+            return None
+        if text_chunks and len(text_chunks) > LOAD_SHED_MAX_CHUNKS and self.active(CAP_CHUNKS):
+            print(f"🪫 自动降载: 累积式分析只处理前 {LOAD_SHED_MAX_CHUNKS}/{len(text_chunks)} 个文本块")
+            return text_chunks[:LOAD_SHED_MAX_CHUNKS]
+        return text_chunks
+
+    def summary(self) -> Dict:
+        """降级事件、各降级措施的累计启用时长与各阶段当前统计"""
+        now = time.time()
+        with self._lock:
+            seconds_active = dict(self._seconds_active)
+            for degradation, started in self._active_since.items():
+                seconds_active[degradation] = seconds_active.get(degradation, 0.0) + now - started
+            return {
+                'active': sorted(self._active_since),
+                'events': list(self.events),
+                'seconds_active': {name: round(seconds, 1) for name, seconds in seconds_active.items()},
+                'stages': {stage: {name: round(value, 3) for name, value in self._stage_metrics(stage).items()}
+                           for stage in self._levels},
+                'levels': dict(self._levels),
+            }
@@ -4,13 +4,40 @@ Academic Deep Research Demo - Enhanced Version with Paper Searcher
 统一使用增强模式：Google Scholar优先、arXiv备用、会议筛选、引用数过滤、每轮充分性评估
 """
 
-import json
+import argparse
 import os
 from pathlib import Path
 from datetime import datetime
 from deepseek_client import DeepSeekClient
 from paper_searcher import EnhancedPaperSearcher, SearchFilters
 from pdf_processor import EnhancedPDFProcessor
+from research_pipeline import StreamingResearchPipeline
+from paper_registry import GlobalPaperRegistry
+from speculative_prefetch import SpeculativePrefetcher
+from research_budget import ResearchBudget
+from stopping_policy import MarginalGainStoppingPolicy
+from text_cache import ExtractedTextCache
+from result_store import ResultStore
+from progressive_analysis import ProgressiveAnalyzer, merge_provisional_analyses, count_levels
+from paper_state import PaperStateTracker, RetryableError, run_with_retries, CANDIDATE, ACQUIRING, ANALYZING
+from run_estimator import RunEstimator, capture_telemetry, telemetry_delta, print_estimate
+from task_queue import TaskQueue, DistributedTaskExecutor
+from incremental_update import PreviousRun, load_previous_run, CARRIED_ROUND
+from research_cache import cache_hits
+from load_shedding import LoadShedder
+from cancellation import CancellationToken, OperationCancelled
+from run_checkpoint import (
+    RunCheckpoint,
+    restore_datetimes,
+    strip_paper_texts,
+    STAGE_QUERIES,
+    STAGE_SEARCH,
+    STAGE_PROVISIONAL,
+    STAGE_PROCESS,
+    STAGE_ANALYZE,
+    STAGE_EVALUATE,
+    STAGE_FINAL_SUMMARY,
+)
 import time
 from config import (
     OUTPUT_DIR, 
@@ -28,6 +55,17 @@ from config import (
     PAPERS_PER_DEPTH_QUERY,
     ADEQUACY_EVALUATION_THRESHOLD,
     MIN_DEPTH_SEARCH_SCORE,
+    ENABLE_STREAMING_PIPELINE,
+    ENABLE_SPECULATIVE_PREFETCH,
+    ENABLE_MARGINAL_GAIN_STOPPING,
+    MARGINAL_GAIN_MIN_PER_100K_TOKENS,
+    ENABLE_PROGRESSIVE_ANALYSIS,
+    PIPELINE_SEARCH_WORKERS,
+    PIPELINE_DOWNLOAD_WORKERS,
+    PIPELINE_ANALYSIS_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    ENABLE_LOAD_SHEDDING,
+    TASK_QUEUE_DB,
 )
 
 # 演示程序配置参数
@@ -80,10 +118,18 @@ def display_config():
         print(f"  🚀 并发分析: {'启用' if ENABLE_CONCURRENT_ANALYSIS else '禁用'}")
         if ENABLE_CONCURRENT_ANALYSIS:
             print(f"  ⚡ 最大并发数: {MAX_CONCURRENT_ANALYSIS}")
+        print(f"  🔀 流水线模式: {'启用' if ENABLE_STREAMING_PIPELINE else '禁用'}")
+        if ENABLE_STREAMING_PIPELINE:
+            print(f"  ⚡ 阶段并发 (搜索/下载/分析): {PIPELINE_SEARCH_WORKERS}/{PIPELINE_DOWNLOAD_WORKERS}/{PIPELINE_ANALYSIS_WORKERS}")
+            print(f"  📦 阶段队列长度: {PIPELINE_QUEUE_SIZE}")
+        print(f"  🔮 推测式预取下一轮: {'启用' if ENABLE_SPECULATIVE_PREFETCH else '禁用'}")
         print(f"  🎚️ 充分性评估阈值: {ADEQUACY_EVALUATION_THRESHOLD}")
         print(f"  📊 最小论文数要求: {MIN_PAPERS_FOR_CONTINUE} (每轮)")
         print(f"  🔄 每轮后进行充分性评估: 是")
         print(f"  🧠 智能终止: 启用")
+        if ENABLE_MARGINAL_GAIN_STOPPING:
+            print(f"  📉 边际收益终止: 每10万token预期提升 < {MARGINAL_GAIN_MIN_PER_100K_TOKENS} 时结束")
+        print(f"  ⚡ 渐进式分析（摘要优先）: {'启用' if ENABLE_PROGRESSIVE_ANALYSIS else '按需 (--progressive)'}")
         print("="*60)
 
 def create_download_folder(research_topic: str):
@@ -96,23 +142,32 @@ def create_download_folder(research_topic: str):
     print(f"📁 已创建文件夹：{result_dir}")
     return result_dir
 
-def process_papers_batch(papers_to_process, processor, download_dir, batch_name="论文"):
-    """处理一批论文的通用函数"""
+def process_papers_batch(papers_to_process, processor, download_dir, batch_name="论文",
+                         process_options=None, admission_open=None, state_tracker=None):
+    """处理一批论文的通用函数（process_options与admission_open供预算模式降级使用）
+    
+    PDF因临时网络故障下载失败的论文进入延迟重试队列，先处理其余论文，重试次数用尽时退回摘要
+    """
     print(f"\n📥 正在处理{batch_name}...")
-    processed_papers = []
+    total = len(papers_to_process)
     
-    for i, paper in enumerate(papers_to_process):
+    def process(paper, final_attempt):
         if SHOW_PROGRESS_DETAILS:
-            print(f"\n📄 正在处理{batch_name} {i+1}/{len(papers_to_process)}: {paper['title']}")
+            print(f"\n📄 正在处理{batch_name} ({total}篇): {paper['title']}")
             if paper.get('citations', 0) > 0:
                 print(f"    引用数: {paper['citations']}")
             print(f"    来源: {paper.get('source', 'unknown')}")
         else:
-            print(f"📄 正在处理{batch_name} {i+1}/{len(papers_to_process)}...")
+            print(f"📄 正在处理{batch_name}: {paper['title'][:60]}...")
         
-        processed_paper = processor.process_paper(paper, download_dir=download_dir)
+        try:
+            processed_paper = processor.process_paper(
+                paper, download_dir=download_dir, defer_retries=not final_attempt, **(process_options or {})
+            )
+        except RetryableError as e:
+            print(f"⏳ 暂时失败，稍后重试: {e}")
+            raise
         if processed_paper:
-            processed_papers.append(processed_paper)
             if SHOW_PROGRESS_DETAILS:
                 text_len = processed_paper.get('text_length', 0)
                 chunks = len(processed_paper.get('text_chunks', []))
@@ -121,43 +176,73 @@ def process_papers_batch(papers_to_process, processor, download_dir, batch_name=
                 print("✅ 处理成功")
         else:
             print("❌ 处理失败")
+        return processed_paper
     
+    processed_papers = run_with_retries(
+        papers_to_process, process, state_tracker or PaperStateTracker(), ACQUIRING,
+        cancel_token=processor.cancel_token, admission_open=admission_open
+    )
+    if processor.cancel_token is not None and processor.cancel_token.cancelled:
+        print(f"🛑 处理已取消，保留已完成的 {len(processed_papers)} 篇{batch_name}")
+    elif admission_open is not None and not admission_open():
+        print(f"⏱️ 本轮下载时间预算已用完，停止处理剩余{batch_name}")
     return processed_papers
 
-def analyze_papers_batch(processed_papers, ai_client, batch_name="论文"):
-    """分析一批论文的通用函数"""
+def analyze_papers_batch(processed_papers, ai_client, batch_name="论文", on_analysis=None, state_tracker=None):
+    """分析一批论文的通用函数，on_analysis可选，每完成一篇分析即被调用（临时失败的论文延后重试）"""
     analyses = []
+    state_tracker = state_tracker or PaperStateTracker()
     
     if ENABLE_DETAILED_ANALYSIS and processed_papers:
         papers_to_analyze = processed_papers[:MAX_ANALYSIS_PAPERS]
         
         if ENABLE_CONCURRENT_ANALYSIS and len(papers_to_analyze) > 1:
             print(f"\n🚀 正在使用并发模式分析{len(papers_to_analyze)}篇{batch_name}...")
-            analyses = ai_client.analyze_papers_concurrently(papers_to_analyze)
+            analyses = ai_client.analyze_papers_concurrently(
+                papers_to_analyze, on_result=on_analysis, state_tracker=state_tracker
+            )
         else:
             print(f"\n🧠 正在使用串行模式分析{len(papers_to_analyze)}篇{batch_name}...")
-            for i, paper in enumerate(papers_to_analyze):
+            deferred_client = ai_client.with_deferred_retries()
+            
+            def analyze(paper, final_attempt):
                 if SHOW_PROGRESS_DETAILS:
-                    print(f"  正在分析 {i+1}/{len(papers_to_analyze)}: {paper['title']}...")
+                    print(f"  正在分析: {paper['title']}...")
                 else:
-                    print(f"  正在分析{batch_name} {i+1}/{len(papers_to_analyze)}...")
+                    print(f"  正在分析{batch_name}: {paper['title'][:60]}...")
                 
+                client = ai_client if final_attempt else deferred_client
                 try:
                     text_chunks = paper.get('text_chunks', [])
-                    analysis = ai_client.analyze_paper_text(paper['title'], paper['abstract'], text_chunks)
-                    
-                    analyses.append({
-                        'paper': paper['title'],
-                        'paper_id': paper.get('arxiv_id', ''),
-                        'analysis': analysis,
-                        'text_length': paper.get('text_length', 0),
-                        'citations': paper.get('citations', 0),
-                        'source': paper.get('source', 'unknown')
-                    })
-                    if SHOW_PROGRESS_DETAILS:
-                        print(f"  ✅ 分析完成")
+                    analysis = client.analyze_paper_text(paper['title'], paper['abstract'], text_chunks, paper=paper)
+                except RetryableError as e:
+                    print(f"  ⏳ 暂时失败，稍后重试: {e}")
+                    raise
+                except OperationCancelled:
+                    raise
                 except Exception as e:
                     print(f"  ❌ 分析失败: {e}")
+                    return None
+                
+                record = {
+                    'paper': paper['title'],
+                    'paper_id': paper.get('arxiv_id', ''),
+                    'analysis': analysis,
+                    'text_length': paper.get('text_length', 0),
+                    'citations': paper.get('citations', 0),
+                    'source': paper.get('source', 'unknown')
+                }
+                if on_analysis:
+                    on_analysis(record)
+                if SHOW_PROGRESS_DETAILS:
+                    print(f"  ✅ 分析完成")
+                return record
+            
+            analyses = run_with_retries(
+                papers_to_analyze, analyze, state_tracker, ANALYZING, cancel_token=ai_client.cancel_token
+            )
+            if ai_client.cancel_token is not None and ai_client.cancel_token.cancelled:
+                print(f"🛑 分析已取消，保留已完成的 {len(analyses)} 篇分析")
     
     return analyses
 
@@ -167,7 +252,7 @@ def perform_adequacy_evaluation_after_round(ai_client, all_analyses, research_to
     
     if not all_analyses:
         print("⚠️ 没有分析数据，无法进行充分性评估")
-        return 0.0, "没有分析数据进行评估", []
+        return 0.0, "没有分析数据进行评估", [], ""
     
     # 生成当前研究总结用于评估
     print(f"📝 正在生成第{round_num}轮研究总结用于充分性评估...")
@@ -184,14 +269,14 @@ def perform_adequacy_evaluation_after_round(ai_client, all_analyses, research_to
         
         print(f"📊 第{round_num}轮充分性评估结果: {adequacy_score:.2f}/1.0")
         
-        return adequacy_score, evaluation_report, missing_areas
+        return adequacy_score, evaluation_report, missing_areas, current_summary
         
     except Exception as e:
         print(f"❌ 充分性评估失败: {e}")
-        return 0.0, f"评估失败: {e}", []
+        return 0.0, f"评估失败: {e}", [], ""
 
-def should_continue_search(round_num, papers_found, adequacy_score):
-    """判断是否应该继续搜索"""
+def should_continue_search(round_num, papers_found, adequacy_score, stopping_signals=None):
+    """判断是否应该继续搜索（stopping_signals为边际收益策略本轮给出的信号，可选）"""
     print(f"\n🤔 判断是否继续搜索...")
     print(f"   第{round_num}轮论文数量: {papers_found}")
     print(f"   充分性评分: {adequacy_score:.2f}")
@@ -203,8 +288,11 @@ def should_continue_search(round_num, papers_found, adequacy_score):
         print(f"✅ 继续搜索 - 论文数量不足({papers_found} < {MIN_PAPERS_FOR_CONTINUE})")
         return True, "论文数量不足"
     
-    # 条件2: 充分性评分不足
+    # 条件2: 充分性评分不足，但再搜索一轮的边际收益过低时提前结束
     if adequacy_score < ADEQUACY_EVALUATION_THRESHOLD:
+        if stopping_signals and stopping_signals['stop']:
+            print(f"🛑 结束搜索 - 充分性评分进入平台期: {stopping_signals['reason']}")
+            return False, stopping_signals['reason']
         print(f"✅ 继续搜索 - 充分性评分不足({adequacy_score:.2f} < {ADEQUACY_EVALUATION_THRESHOLD})")
         return True, "充分性评分不足"
     
@@ -212,10 +300,8 @@ def should_continue_search(round_num, papers_found, adequacy_score):
     print(f"🛑 结束搜索 - 论文数量充足且充分性评分达标")
     return False, "论文数量和充分性都达标"
 
-def perform_search_round(ai_client, searcher, research_topic, filters, round_num, previous_missing_areas=None, all_queries_used=None):
-    """执行搜索轮次"""
-    print(f"\n🔍 第{round_num}轮搜索 ...")
-    
+def generate_round_queries(ai_client, research_topic, round_num, previous_missing_areas=None, all_queries_used=None):
+    """生成本轮搜索查询"""
     if round_num == 1:
         print(f"🧠 正在使用DeepSeek生成{NUM_SEARCH_QUERIES}个初始搜索查询...")
         queries = ai_client.generate_search_queries(research_topic, num_queries=NUM_SEARCH_QUERIES)
@@ -240,12 +326,13 @@ def perform_search_round(ai_client, searcher, research_topic, filters, round_num
         for i, query in enumerate(queries, 1):
             print(f"  {i}. {query}")
     
-    # 使用增强搜索器
-    papers = searcher.search_multiple_queries_enhanced(queries, filters)
-    
+    return queries
+
+def report_round_papers(papers, round_num):
+    """显示本轮找到论文的来源与引用统计"""
     if not papers:
         print(f"❌ 第{round_num}轮未找到任何论文!")
-        return [], queries
+        return
     
     print(f"📚 第{round_num}轮找到{len(papers)}篇符合条件的论文")
     
@@ -263,42 +350,159 @@ def perform_search_round(ai_client, searcher, research_topic, filters, round_num
     
     if citation_stats:
         print(f"📈 引用数统计: 范围 {min(citation_stats)}-{max(citation_stats)}, 平均 {sum(citation_stats)/len(citation_stats):.1f}")
-    
-    return papers, queries
 
-def main():
-    print_banner()
+def build_round_result(round_num, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+                       registry_report, adequacy_score=0.0, evaluation_report="", missing_areas=None,
+                       should_continue=False, continue_reason="", source_distribution=None):
+    """构建单轮结果记录"""
+    return {
+        'round': round_num,
+        'queries': queries,
+        'papers_found': len(papers),
+        'papers_processed': len(processed_papers),
+        'papers_analyzed': len(analyses),
+        'adequacy_score': adequacy_score,
+        'evaluation_report': evaluation_report,
+        'missing_areas': missing_areas or [],
+        'should_continue': should_continue,
+        'continue_reason': continue_reason,
+        'source_distribution': source_distribution or {},
+        'cumulative_papers_analyzed': len(all_analyses),
+        'cumulative_papers_processed': len(all_processed_papers),
+        'papers_skipped_known': registry_report['skipped_known'],
+        'estimated_tokens_saved': registry_report['estimated_tokens_saved']
+    }
+
+def restore_completed_round(checkpoint, round_num, registry, result_store):
+    """从检查点恢复已完成的轮次，返回(轮次结果, 处理论文, 分析结果, 是否结束搜索)"""
+    evaluate_state = checkpoint.load_stage(STAGE_EVALUATE, round_num)
+    analyze_state = checkpoint.load_stage(STAGE_ANALYZE, round_num) or {}
+    analyses = analyze_state.get('analyses', [])
     
-    # 初始化组件
-    print("🚀 正在初始搜索系统...")
-    ai_client = DeepSeekClient()
-    searcher = EnhancedPaperSearcher()
-    processor = EnhancedPDFProcessor()
+    # 结果目录中已有该轮的论文记录（含text_file全文路径）时直接沿用，不改写已写入的结果；
+    # 结果目录缺失该轮时从检查点载入全文重新写入
+    stored_papers = result_store.load_papers(round_num)
+    if stored_papers is not None:
+        processed_papers = restore_datetimes(stored_papers)
+    else:
+        processed_papers = store_round_outputs(
+            result_store, round_num, checkpoint.load_paper_stage(STAGE_PROCESS, round_num) or [], analyses
+        )
+    round_result = evaluate_state['round_result']
+    registry.restore_round(processed_papers, analyses, round_num, {
+        'skipped_known': round_result.get('papers_skipped_known', 0),
+        'estimated_tokens_saved': round_result.get('estimated_tokens_saved', 0)
+    })
     
-    print("✅ 学术搜索系统初始化完成")
-    print("   - 主要搜索源: Google Scholar")
-    print("   - 备用搜索源: arXiv")
-    print("   - 智能过滤: 会议、引用数、时间范围")
-    print("   - 充分性评估: 每轮自动评估")
-    print("   - 智能终止: 基于评估结果决定")
+    print(f"♻️ 第{round_num}轮已完成，从检查点恢复 (处理 {len(processed_papers)} 篇, 分析 {len(analyses)} 篇)")
+    return round_result, processed_papers, analyses, evaluate_state.get('stop_search', False)
+
+def store_round_outputs(result_store, round_num, processed_papers, analyses):
+    """把本轮论文与分析写入结果目录，返回去掉全文的论文记录（全文只保存在文本文件中）"""
+    light_papers = result_store.save_papers(round_num, processed_papers)
+    result_store.save_analyses(round_num, analyses)
+    return light_papers
+
+def run_provisional_analysis(progressive_analyzer, checkpoint, papers, all_analyses, round_num,
+                             progress_callback=None, on_analysis=None, cancel_token=None):
+    """渐进模式：基于摘要快速分析本轮候选论文并推送临时总结，返回(摘要分析, 全文分析完成回调)
     
-    # 输出目录
-    output_dir = Path(OUTPUT_DIR)
-    output_dir.mkdir(exist_ok=True)
+    返回的回调在每篇全文分析完成时推送升级事件，再调用原有的on_analysis
+    """
+    state = checkpoint.load_stage(STAGE_PROVISIONAL, round_num)
+    if state is not None:
+        provisional = state['analyses']
+        print(f"♻️ 从检查点恢复第{round_num}轮摘要分析: {len(provisional)} 篇")
+    else:
+        try:
+            provisional, summary = progressive_analyzer.provisional_pass(papers, all_analyses, round_num)
+        except OperationCancelled:
+            return [], on_analysis
+        if cancel_token is not None and cancel_token.cancelled:
+            return provisional, on_analysis  # 不完整的摘要分析不写入检查点
+        checkpoint.save_stage(STAGE_PROVISIONAL, {'analyses': provisional, 'provisional_summary': summary}, round_num)
+        notify_progress(progress_callback, 'provisional_summary', round=round_num,
+                        analyses=provisional, provisional_summary=summary)
+    if not provisional:
+        return provisional, on_analysis
     
-    # 获取研究主题
-    research_topic = get_research_topic()
-    # 开始计时
-    start_time = time.time()
+    def on_upgrade(record):
+        notify_progress(progress_callback, 'analysis_upgraded', round=round_num, analysis=record)
+        if on_analysis:
+            on_analysis(record)
+    return provisional, on_upgrade
+
+def record_cancelled_round(round_num, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+                           registry, cancel_reason, result_store=None, accumulated=False):
+    """运行被取消时保留本轮已完成的部分工作（不写入评估检查点，恢复时重新执行本轮）"""
+    if not accumulated:
+        if result_store is not None:
+            processed_papers = store_round_outputs(result_store, round_num, processed_papers, analyses)
+        all_processed_papers.extend(processed_papers)
+        all_analyses.extend(analyses)
+    round_result = build_round_result(
+        round_num, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+        registry.round_report(round_num), evaluation_report="运行已取消，未进行充分性评估",
+        continue_reason=f"已取消: {cancel_reason}"
+    )
+    round_result['cancelled'] = True
+    print(f"🛑 第{round_num}轮已取消 ({cancel_reason})，保留已处理 {len(processed_papers)} 篇、已分析 {len(analyses)} 篇")
+    return round_result
 
-    print(f"\n📋 研究主题: {research_topic}")
-    download_dir = create_download_folder(research_topic)
+def notify_progress(progress_callback, event, **data):
+    """向调用方报告研究进度（服务模式下用于推送部分结果）"""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(event, data)
+    except Exception as e:
+        print(f"⚠️ 进度回调失败: {e}")
+
+def run_research(ai_client, searcher, processor, pipeline, research_topic, filters, download_dir, checkpoint,
+                 progress_callback=None, budget=None, cancel_token=None, progressive=None, task_executor=None,
+                 previous_run=None):
+    """执行多轮搜索、处理、分析与充分性评估，每个阶段完成后写入检查点，返回结果字典
     
-    # 获取搜索过滤器（增强模式）
-    filters = searcher.get_user_search_preferences()
+    progress_callback(event, data) 可选，在查询生成、分析完成、每轮结束和最终总结时被调用
+    budget 可选的ResearchBudget，按剩余时间/token预算缩减每轮规模、降级处理或提前结束
+    cancel_token 可选的CancellationToken，触发后进行中的请求、下载与分析尽快停止，已完成的部分仍写入结果
+    progressive 是否先基于摘要快速分析并生成临时总结，全文分析完成后逐篇替换（默认取ENABLE_PROGRESSIVE_ANALYSIS）
+    task_executor 可选的DistributedTaskExecutor，下载提取与单篇分析提交到共享任务队列由task_worker.py执行
+    previous_run 可选的PreviousRun，增量更新：沿用其查询只搜索一轮、跳过已处理的论文，并在其研究总结基础上更新
+    """
+    registry = GlobalPaperRegistry()  # 跨轮次论文注册表，避免重复下载与分析
+    state_tracker = PaperStateTracker()  # 每篇论文的状态转换历史（下载、分析、延迟重试），随结果导出
+    # 每轮的论文、分析与全文在阶段完成时写入结果目录，内存中只保留元数据
+    result_store = ResultStore(checkpoint.run_id, save_texts=SAVE_FULL_TEXT)
+    if previous_run is not None:
+        # 上次运行的论文与分析作为第0轮登记并写入本次结果目录，本次只处理新增论文
+        previous_run.seed_registry(registry)
+        result_store.save_papers(CARRIED_ROUND, previous_run.papers)
+        result_store.save_analyses(CARRIED_ROUND, previous_run.analyses)
+        print(f"📚 增量更新基线: 运行 {previous_run.run_id} ({len(previous_run.papers)} 篇论文, "
+              f"{len(previous_run.analyses)} 篇分析)，只搜索 {previous_run.since:%Y-%m-%d} 之后发表的论文")
     
-    # 显示配置
-    display_config()
+    # 所有网络请求、重试退避与分析都绑定运行级取消令牌
+    cancel_token = cancel_token or CancellationToken()
+    ai_client = ai_client.with_cancel_token(cancel_token)
+    searcher = searcher.with_cancel_token(cancel_token)
+    processor = processor.with_cancel_token(cancel_token)
+    if task_executor is not None:
+        # 分布式模式下下载与分析由工作进程完成，不使用本地流水线
+        task_executor = task_executor.with_cancel_token(cancel_token)
+        pipeline = None
+    
+    # 自动降载：按LLM与下载请求的滚动延迟/错误率逐级降级，情况好转后自动恢复
+    load_shedder = LoadShedder() if ENABLE_LOAD_SHEDDING else None
+    if load_shedder is not None:
+        ai_client = ai_client.with_load_shedder(load_shedder)
+        processor = processor.with_load_shedder(load_shedder)
+    
+    # 记录本次运行的实测统计（耗时、各来源请求、各模型调用与token），供 --estimate 校准
+    run_start_time = time.time()
+    started_at = datetime.now()
+    telemetry_start = capture_telemetry(ai_client, searcher, processor)
+    cache_hits_start = cache_hits(ai_client, processor)
     
     # 初始化多轮搜索变量
     all_processed_papers = []
@@ -307,353 +511,808 @@ def main():
     search_rounds_results = []
     final_adequacy_score = 0.0
     final_evaluation_report = ""
+    budget_stop_reason = None
     
-    try:
-        # 多轮搜索循环
-        for search_round in range(1, SEARCH_DEPTH + 1):
-            print(f"\n{'='*80}")
-            print(f"🔄 开始第 {search_round}/{SEARCH_DEPTH} 轮搜索")
-            print(f"{'='*80}")
-            
-            # 获取上一轮的缺失领域（如果有）
-            previous_missing_areas = None
-            if len(search_rounds_results) > 0:
-                previous_missing_areas = search_rounds_results[-1].get('missing_areas', [])
-            
-            # 执行搜索
-            papers, queries = perform_search_round(
-                ai_client, searcher, research_topic, filters, search_round, 
-                previous_missing_areas, all_queries_used
+    # 推测式预取：本轮分析期间草拟下一轮查询并提前搜索、下载
+    prefetcher = None
+    if ENABLE_SPECULATIVE_PREFETCH and SEARCH_DEPTH > 1 and task_executor is None and previous_run is None:
+        prefetcher = SpeculativePrefetcher(
+            ai_client, searcher, processor, research_topic, filters, download_dir, registry=registry,
+            cancel_token=cancel_token
+        )
+    speculation = None  # 上一轮评估后保留的推测结果
+    
+    # 渐进式分析：候选论文先基于摘要分析，充分性评估与最终总结使用当时可用的全文/摘要混合分析
+    if progressive is None:
+        progressive = ENABLE_PROGRESSIVE_ANALYSIS
+    progressive_analyzer = ProgressiveAnalyzer(ai_client, research_topic) if progressive else None
+    
+    # 边际收益提前终止：评分增长放缓且新论文减少时不再跑满全部轮次
+    stopping_policy = None
+    if ENABLE_MARGINAL_GAIN_STOPPING and SEARCH_DEPTH > 1 and previous_run is None:
+        stopping_policy = MarginalGainStoppingPolicy(ai_client)
+    
+    # 多轮搜索循环
+    for search_round in range(1, SEARCH_DEPTH + 1):
+        if cancel_token.cancelled:
+            break
+        print(f"\n{'='*80}")
+        print(f"🔄 开始第 {search_round}/{SEARCH_DEPTH} 轮搜索")
+        print(f"{'='*80}")
+        notify_progress(progress_callback, 'round_started', round=search_round)
+        
+        # 已完成的轮次直接从检查点恢复
+        if checkpoint.is_stage_done(STAGE_EVALUATE, search_round):
+            round_result, processed_papers, analyses, stop_search = restore_completed_round(
+                checkpoint, search_round, registry, result_store
             )
+            all_queries_used.extend(round_result['queries'])
+            all_processed_papers.extend(processed_papers)
+            all_analyses.extend(analyses)
+            search_rounds_results.append(round_result)
+            if stopping_policy:
+                stopping_policy.restore_round(round_result.get('stopping_signals'))
+            notify_progress(progress_callback, 'round_completed', round=search_round, round_result=round_result)
+            if round_result['papers_analyzed'] > 0:
+                final_adequacy_score = round_result['adequacy_score']
+                final_evaluation_report = round_result['evaluation_report']
+            if stop_search:
+                break
+            continue
+        
+        # 预算模式：按剩余预算规划本轮规模与降级策略
+        round_max_papers = MAX_PAPERS_PER_DEPTH
+        process_options = None
+        admission_open = None
+        if budget is not None:
+            plan = budget.plan_round(search_round)
+            if plan['stop']:
+                budget_stop_reason = plan['reason']
+                break
+            round_max_papers = plan['max_papers']
+            process_options = {'abstract_only': plan['abstract_only'], 'skip_fallback': plan['skip_fallback']}
+            admission_open = budget.processing_open
+        if load_shedder is not None:
+            round_max_papers = load_shedder.plan_round(search_round, round_max_papers)
+        if stopping_policy:
+            stopping_policy.begin_round()
+        
+        # 获取上一轮的缺失领域（如果有）
+        previous_missing_areas = None
+        if len(search_rounds_results) > 0:
+            previous_missing_areas = search_rounds_results[-1].get('missing_areas', [])
+        
+        # 阶段1: 生成查询
+        queries_state = checkpoint.load_stage(STAGE_QUERIES, search_round)
+        if queries_state is not None:
+            queries = queries_state['queries']
+            print(f"♻️ 从检查点恢复第{search_round}轮查询: {queries}")
+        elif speculation is not None:
+            queries = speculation['queries']
+            print(f"🔮 使用推测生成的第{search_round}轮查询: {queries}")
+            checkpoint.save_stage(STAGE_QUERIES, {'queries': queries}, search_round)
+        elif previous_run is not None and previous_run.queries:
+            # 增量更新沿用上次运行的全部查询，新增论文由发表时间过滤
+            queries = list(dict.fromkeys(previous_run.queries))
+            print(f"♻️ 增量更新沿用上次运行的 {len(queries)} 个查询")
+            checkpoint.save_stage(STAGE_QUERIES, {'queries': queries}, search_round)
+        else:
+            try:
+                queries = generate_round_queries(
+                    ai_client, research_topic, search_round, previous_missing_areas, all_queries_used
+                )
+            except OperationCancelled:
+                break
+            checkpoint.save_stage(STAGE_QUERIES, {'queries': queries}, search_round)
+        
+        # 记录使用的查询
+        all_queries_used.extend(queries)
+        notify_progress(progress_callback, 'queries_generated', round=search_round, queries=queries)
+        
+        # 还有下一轮且预算充足时，本轮分析期间开始推测下一轮
+        on_analysis = None
+        speculating = False
+        if prefetcher and search_round < SEARCH_DEPTH and not (process_options and process_options['skip_fallback']):
+            prefetcher.begin_round(search_round, all_queries_used, all_analyses)
+            on_analysis = prefetcher.observe_analysis
+            speculating = True
+        prefetched_papers = speculation['papers'] if speculation is not None else None
+        speculation = None
+        # 预算只够基于摘要分析时，常规分析已是摘要级别，不再单独做摘要快速分析
+        run_provisional = progressive_analyzer is not None and not (process_options and process_options['abstract_only'])
+        provisional_analyses = []
+        
+        search_state = checkpoint.load_stage(STAGE_SEARCH, search_round)
+        restored_processed = checkpoint.load_paper_stage(STAGE_PROCESS, search_round, processor.paper_store)
+        analyze_state = checkpoint.load_stage(STAGE_ANALYZE, search_round)
+        
+        if pipeline and search_state is None:
+            # 阶段2-4: 流水线模式下搜索、处理与分析重叠执行
+            print(f"\n🔍 第{search_round}轮搜索 (流水线模式) ...")
+            if run_provisional and analyze_state is None:
+                # 渐进模式：先完成搜索并做摘要快速分析，再把候选论文交给流水线下载与全文分析
+                if prefetched_papers is None:
+                    try:
+                        prefetched_papers = searcher.search_multiple_queries_enhanced(queries, filters)
+                    except OperationCancelled:
+                        break
+                candidates = [paper for paper in prefetched_papers if not registry.is_known(paper)]
+                provisional_analyses, on_analysis = run_provisional_analysis(
+                    progressive_analyzer, checkpoint, candidates[:round_max_papers], all_analyses, search_round,
+                    progress_callback, on_analysis, cancel_token
+                )
+                if cancel_token.cancelled:
+                    search_rounds_results.append(record_cancelled_round(
+                        search_round, queries, prefetched_papers, [], provisional_analyses, all_analyses,
+                        all_processed_papers, registry, cancel_token.reason, result_store=result_store
+                    ))
+                    break
+            papers, processed_papers, analyses = pipeline.run_round(
+                queries, filters, download_dir, round_max_papers,
+                analyze=ENABLE_DETAILED_ANALYSIS, batch_name=f"第{search_round}轮论文",
+                registry=registry, round_num=search_round,
+                on_analysis=on_analysis, prefetched_papers=prefetched_papers,
+                process_options=process_options, admission_open=admission_open,
+                cancel_token=cancel_token, load_shedder=load_shedder, state_tracker=state_tracker
+            )
+            analyses = merge_provisional_analyses(analyses, provisional_analyses)
+            if cancel_token.cancelled:
+                search_rounds_results.append(record_cancelled_round(
+                    search_round, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+                    registry, cancel_token.reason, result_store=result_store
+                ))
+                break
+            report_round_papers(papers, search_round)
+            registry_report = registry.round_report(search_round)
+            checkpoint.save_stage(STAGE_SEARCH, {
+                'papers': strip_paper_texts(papers), 'registry_report': registry_report
+            }, search_round)
+            checkpoint.save_paper_stage(STAGE_PROCESS, processed_papers, search_round)
+            checkpoint.save_stage(STAGE_ANALYZE, {'analyses': analyses}, search_round)
+        else:
+            # 阶段2: 搜索
+            if search_state is not None:
+                papers = search_state['papers']
+                registry_report = search_state['registry_report']
+                registry.restore_round([], [], search_round, registry_report)
+                print(f"♻️ 从检查点恢复第{search_round}轮候选论文: {len(papers)} 篇")
+            else:
+                if prefetched_papers is not None:
+                    print(f"\n🔮 第{search_round}轮使用推测阶段已搜索到的 {len(prefetched_papers)} 篇论文")
+                    papers = prefetched_papers
+                else:
+                    print(f"\n🔍 第{search_round}轮搜索 ...")
+                    try:
+                        papers = searcher.search_multiple_queries_enhanced(queries, filters)
+                    except OperationCancelled:
+                        break
+                report_round_papers(papers, search_round)
+                # 在截取本轮名额之前过滤掉之前轮次已处理的论文
+                papers = registry.filter_new(papers, search_round)
+                registry_report = registry.round_report(search_round)
+                checkpoint.save_stage(STAGE_SEARCH, {
+                    'papers': papers, 'registry_report': registry_report
+                }, search_round)
             
-            # 记录使用的查询
-            all_queries_used.extend(queries)
+            # 渐进模式：下载前先基于摘要快速分析本轮将要处理的论文
+            if run_provisional and analyze_state is None and papers:
+                provisional_analyses, on_analysis = run_provisional_analysis(
+                    progressive_analyzer, checkpoint, papers[:round_max_papers], all_analyses, search_round,
+                    progress_callback, on_analysis, cancel_token
+                )
+                if cancel_token.cancelled:
+                    search_rounds_results.append(record_cancelled_round(
+                        search_round, queries, papers, [], provisional_analyses, all_analyses, all_processed_papers,
+                        registry, cancel_token.reason, result_store=result_store
+                    ))
+                    break
             
-            if not papers:
-                print(f"⚠️ 第{search_round}轮未找到论文，跳过此轮")
+            # 阶段3: 下载与文本提取
+            if restored_processed is not None:
+                processed_papers = restored_processed
+                registry.restore_round(processed_papers, [], search_round)
+                print(f"♻️ 从检查点恢复第{search_round}轮已处理论文: {len(processed_papers)} 篇")
+            elif papers:
+                # 显示搜索结果摘要
+                if SHOW_PROGRESS_DETAILS:
+                    searcher.display_search_results(papers, max_display=15)
                 
-                # 即使没找到论文，也记录本轮结果
-                round_result = {
-                    'round': search_round,
-                    'queries': queries,
-                    'papers_found': 0,
-                    'papers_processed': 0,
-                    'papers_analyzed': 0,
-                    'adequacy_score': 0.0,
-                    'evaluation_report': "本轮未找到论文",
-                    'missing_areas': [],
-                    'should_continue': False,
-                    'continue_reason': "未找到论文",
-                    'source_distribution': {},
-                    'cumulative_papers_analyzed': len(all_analyses),
-                    'cumulative_papers_processed': len(all_processed_papers)
-                }
-                search_rounds_results.append(round_result)
-                continue
-            
-            # 显示搜索结果摘要
-            if SHOW_PROGRESS_DETAILS:
-                searcher.display_search_results(papers, max_display=15)
-            
-            # 限制处理的论文数量
-            papers_to_process = papers[:MAX_PAPERS_PER_DEPTH]
-            print(f"📄 第{search_round}轮将处理{len(papers_to_process)}篇论文")
-            
-            # 处理论文
-            processed_papers = process_papers_batch(
-                papers_to_process, processor, download_dir, f"第{search_round}轮论文"
-            )
-            
-            if not processed_papers:
-                print(f"❌ 第{search_round}轮没有论文能够成功处理!")
+                # 限制处理的论文数量
+                papers_to_process = registry.claim_many(papers[:round_max_papers], search_round)
+                print(f"📄 第{search_round}轮将处理{len(papers_to_process)}篇论文")
+                for paper in papers_to_process:
+                    state_tracker.transition(paper, CANDIDATE)
                 
-                # 记录失败的轮次
-                round_result = {
-                    'round': search_round,
-                    'queries': queries,
-                    'papers_found': len(papers),
-                    'papers_processed': 0,
-                    'papers_analyzed': 0,
-                    'adequacy_score': 0.0,
-                    'evaluation_report': "论文处理失败",
-                    'missing_areas': [],
-                    'should_continue': False,
-                    'continue_reason': "论文处理失败",
-                    'source_distribution': {},
-                    'cumulative_papers_analyzed': len(all_analyses),
-                    'cumulative_papers_processed': len(all_processed_papers)
-                }
-                search_rounds_results.append(round_result)
-                continue
-            
-            print(f"\n🎉 第{search_round}轮成功处理了{len(processed_papers)}篇论文!")
-            
-            # 分析论文
-            analyses = analyze_papers_batch(processed_papers, ai_client, f"第{search_round}轮论文")
+                # 处理论文
+                if task_executor is not None:
+                    # 工作进程不共享降载统计，按提交时启用的下载降级处理
+                    shed_options = load_shedder.process_options(process_options) if load_shedder else process_options
+                    processed_papers = task_executor.process_papers(papers_to_process, download_dir, shed_options)
+                else:
+                    processed_papers = process_papers_batch(
+                        papers_to_process, processor, download_dir, f"第{search_round}轮论文",
+                        process_options=process_options, admission_open=admission_open, state_tracker=state_tracker
+                    )
+                if cancel_token.cancelled:
+                    search_rounds_results.append(record_cancelled_round(
+                        search_round, queries, papers, processed_papers, provisional_analyses, all_analyses,
+                        all_processed_papers, registry, cancel_token.reason, result_store=result_store
+                    ))
+                    break
+                checkpoint.save_paper_stage(STAGE_PROCESS, processed_papers, search_round)
+            else:
+                processed_papers = []
             
-            # 累积结果
-            all_processed_papers.extend(processed_papers)
-            all_analyses.extend(analyses)
+            # 阶段4: 分析
+            if analyze_state is not None:
+                analyses = analyze_state['analyses']
+                registry.restore_round(processed_papers, analyses, search_round)
+                print(f"♻️ 从检查点恢复第{search_round}轮分析结果: {len(analyses)} 篇")
+            elif processed_papers:
+                if task_executor is not None:
+                    papers_to_analyze = processed_papers[:MAX_ANALYSIS_PAPERS] if ENABLE_DETAILED_ANALYSIS else []
+                    analyses = task_executor.analyze_papers(papers_to_analyze, on_analysis=on_analysis)
+                else:
+                    analyses = analyze_papers_batch(
+                        processed_papers, ai_client, f"第{search_round}轮论文", on_analysis=on_analysis,
+                        state_tracker=state_tracker
+                    )
+                analysis_by_title = {a['paper']: a['analysis'] for a in analyses}
+                for paper in processed_papers:
+                    if paper['title'] in analysis_by_title:
+                        registry.record_analysis(paper, analysis_by_title[paper['title']])
+                analyses = merge_provisional_analyses(analyses, provisional_analyses)
+                if cancel_token.cancelled:
+                    search_rounds_results.append(record_cancelled_round(
+                        search_round, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+                        registry, cancel_token.reason, result_store=result_store
+                    ))
+                    break
+                checkpoint.save_stage(STAGE_ANALYZE, {'analyses': analyses}, search_round)
+            else:
+                # 没有论文处理成功时保留摘要分析（非渐进模式下为空）
+                analyses = provisional_analyses
+                if analyses:
+                    checkpoint.save_stage(STAGE_ANALYZE, {'analyses': analyses}, search_round)
+        
+        if not papers:
+            print(f"⚠️ 第{search_round}轮未找到论文，跳过此轮")
             
-            # 每轮后立即进行充分性评估
-            adequacy_score, evaluation_report, missing_areas = perform_adequacy_evaluation_after_round(
-                ai_client, all_analyses, research_topic, search_round
+            # 即使没找到论文，也记录本轮结果
+            round_result = build_round_result(
+                search_round, queries, papers, [], [], all_analyses, all_processed_papers, registry_report,
+                evaluation_report="本轮未找到论文", continue_reason="未找到论文"
             )
+            search_rounds_results.append(round_result)
+            # 增量更新只执行一轮搜索：没有新论文是正常结果，不再用同样的查询重复搜索
+            incremental = previous_run is not None
+            checkpoint.save_stage(STAGE_EVALUATE, {'round_result': round_result, 'stop_search': incremental}, search_round)
+            notify_progress(progress_callback, 'round_completed', round=search_round, round_result=round_result)
+            if incremental:
+                break
+            continue
+        
+        if not processed_papers and not analyses:
+            print(f"❌ 第{search_round}轮没有论文能够成功处理!")
             
-            # 判断是否应该继续搜索
-            should_continue, continue_reason = should_continue_search(
-                search_round, len(papers), adequacy_score
+            # 记录失败的轮次
+            round_result = build_round_result(
+                search_round, queries, papers, [], [], all_analyses, all_processed_papers, registry_report,
+                evaluation_report="论文处理失败", continue_reason="论文处理失败"
             )
-            
-            # 统计来源分布
-            source_distribution = {}
-            for paper in papers:
-                source = paper.get('source', 'unknown')
-                source_distribution[source] = source_distribution.get(source, 0) + 1
-            
-            # 记录本轮详细结果
-            round_result = {
-                'round': search_round,
-                'queries': queries,
-                'papers_found': len(papers),
-                'papers_processed': len(processed_papers),
-                'papers_analyzed': len(analyses),
-                'adequacy_score': adequacy_score,
-                'evaluation_report': evaluation_report,
-                'missing_areas': missing_areas,
-                'should_continue': should_continue,
-                'continue_reason': continue_reason,
-                'source_distribution': source_distribution,
-                'cumulative_papers_analyzed': len(all_analyses),
-                'cumulative_papers_processed': len(all_processed_papers)
-            }
             search_rounds_results.append(round_result)
-            
-            print(f"\n📊 第{search_round}轮详细统计:")
-            print(f"   找到论文: {len(papers)}")
-            print(f"   成功处理: {len(processed_papers)}")
-            print(f"   完成分析: {len(analyses)}")
-            print(f"   来源分布: {source_distribution}")
-            print(f"   充分性评分: {adequacy_score:.2f}/1.0")
-            print(f"   累计已分析: {len(all_analyses)} 篇")
-            
-            # 显示引用数统计（如果有的话）
-            if analyses:
-                citations_data = [a.get('citations', 0) for a in analyses if a.get('citations', 0) > 0]
-                if citations_data:
-                    print(f"   引用数范围: {min(citations_data)} - {max(citations_data)}")
-                    print(f"   平均引用数: {sum(citations_data) / len(citations_data):.1f}")
-            
-            # 根据充分性评估结果决定是否继续
-            if not should_continue:
-                print(f"\n🎯 第{search_round}轮后决定结束搜索")
-                print(f"   原因: {continue_reason}")
-                print(f"   最终充分性评分: {adequacy_score:.2f}")
-                final_adequacy_score = adequacy_score
-                final_evaluation_report = evaluation_report
+            incremental = previous_run is not None
+            checkpoint.save_stage(STAGE_EVALUATE, {'round_result': round_result, 'stop_search': incremental}, search_round)
+            notify_progress(progress_callback, 'round_completed', round=search_round, round_result=round_result)
+            if incremental:
                 break
-            elif search_round < SEARCH_DEPTH:
-                print(f"\n➡️ 第{search_round}轮后决定继续搜索")
-                print(f"   原因: {continue_reason}")
-                if missing_areas:
-                    print(f"   将重点关注: {', '.join(missing_areas[:3])}...")
-                final_adequacy_score = adequacy_score
-                final_evaluation_report = evaluation_report
-            else:
-                print(f"\n🔚 已达到最大搜索深度 {SEARCH_DEPTH}")
-                final_adequacy_score = adequacy_score
-                final_evaluation_report = evaluation_report
-        
-        # 生成最终研究总结
-        final_research_summary = ""
-        if GENERATE_RESEARCH_SUMMARY and all_analyses:
-            print(f"\n📝 正在生成最终研究总结 (基于{len(all_analyses)}篇论文的分析)...")
-            final_research_summary = ai_client.analyze_multiple_papers_summary(
-                all_analyses, research_topic, depth_round=len(search_rounds_results)
-            )
+            continue
         
-        # 保存结果
-        results = {
-            'research_topic': research_topic,
-            'search_mode': 'enhanced',
-            'search_source': 'google_scholar_arxiv',
-            'search_depth': SEARCH_DEPTH,
-            'actual_rounds_completed': len(search_rounds_results),
-            'early_termination': len(search_rounds_results) < SEARCH_DEPTH,
-            'termination_reason': search_rounds_results[-1].get('continue_reason', 'Unknown') if search_rounds_results else 'Unknown',
-            'total_papers_found': sum(r['papers_found'] for r in search_rounds_results),
-            'total_papers_processed': len(all_processed_papers),
-            'total_papers_analyzed': len(all_analyses),
-            'final_adequacy_score': final_adequacy_score,
-            'final_evaluation_report': final_evaluation_report,
-            'adequacy_threshold_used': ADEQUACY_EVALUATION_THRESHOLD,
-            'search_rounds_results': search_rounds_results,  # 包含每轮的充分性评估
-            'all_queries_used': all_queries_used,
-            'filters_used': filters.__dict__ if filters else None,
-            'adequacy_evaluation_timeline': [  # 充分性评估时间线
-                {
-                    'round': r['round'],
-                    'adequacy_score': r['adequacy_score'],
-                    'missing_areas': r['missing_areas'],
-                    'cumulative_papers': r['cumulative_papers_analyzed'],
-                    'should_continue': r['should_continue'],
-                    'continue_reason': r['continue_reason']
-                }
-                for r in search_rounds_results
-            ],
-            'configuration': {
-                'search_depth': SEARCH_DEPTH,
-                'num_search_queries': NUM_SEARCH_QUERIES,
-                'papers_per_query': PAPERS_PER_QUERY,
-                'depth_search_queries': DEPTH_SEARCH_QUERIES,
-                'papers_per_depth_query': PAPERS_PER_DEPTH_QUERY,
-                'max_papers_per_depth': MAX_PAPERS_PER_DEPTH,
-                'extract_full_pdf': EXTRACT_FULL_PDF,
-                'max_analysis_papers': MAX_ANALYSIS_PAPERS,
-                'concurrent_analysis_enabled': ENABLE_CONCURRENT_ANALYSIS,
-                'max_concurrent_analysis': MAX_CONCURRENT_ANALYSIS if ENABLE_CONCURRENT_ANALYSIS else 0,
-                'adequacy_evaluation_threshold': ADEQUACY_EVALUATION_THRESHOLD,
-                'min_papers_for_continue': MIN_PAPERS_FOR_CONTINUE
-            },
-            'paper_analyses': all_analyses if ENABLE_DETAILED_ANALYSIS else [],
-            'final_research_summary': final_research_summary
-        }
-        
-        # 可选：保存完整文本
-        if SAVE_FULL_TEXT:
-            results['processed_papers'] = []
-            for paper in all_processed_papers:
-                paper_data = paper.copy()
-                if not EXTRACT_FULL_PDF:
-                    pass
-                else:
-                    if 'extracted_text' in paper_data and len(paper_data['extracted_text']) > 10000:
-                        paper_data['extracted_text_preview'] = paper_data['extracted_text'][:5000] + "..."
-                        paper_data['extracted_text_full'] = paper_data['extracted_text']
-                
-                results['processed_papers'].append(paper_data)
-        
-        # 保存到文件
-        safe_topic = "".join(c for c in research_topic if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
-        output_file = output_dir / f"research_results_{safe_topic}_enhanced_depth{SEARCH_DEPTH}.json"
-        
-        print(f"\n💾 正在保存结果到 {output_file}...")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
-        
-        # 显示最终结果
-        print("\n" + "="*80)
-        print("📊 学术深度研究结果总结")
-        print("="*80)
-        print(f"🎯 主题: {research_topic}")
-        print(f"🔧 搜索模式: 默认为增强模式 (Google Scholar + arXiv + 智能过滤)")
-        print(f"🔄 搜索深度: {SEARCH_DEPTH} 轮 (实际完成: {len(search_rounds_results)} 轮)")
-        
-        # 显示是否提前终止
-        if len(search_rounds_results) < SEARCH_DEPTH:
-            print(f"⏹️ 提前终止: 是 (原因: {results['termination_reason']})")
+        print(f"\n🎉 第{search_round}轮成功处理了{len(processed_papers)}篇论文!")
+        
+        # 累积结果（全文写入结果目录后不再保留在内存中）
+        processed_papers = store_round_outputs(result_store, search_round, processed_papers, analyses)
+        all_processed_papers.extend(processed_papers)
+        all_analyses.extend(analyses)
+        notify_progress(progress_callback, 'papers_analyzed', round=search_round, analyses=analyses)
+        
+        # 阶段5: 每轮后立即进行充分性评估（推测工作在评估的LLM调用期间后台进行）
+        if speculating:
+            prefetcher.launch()
+        if budget is not None and budget.exhausted():
+            # 评估需要两次总结模型调用，预算用尽时跳过，剩余预算留给最终总结
+            print(f"⏱️ 预算用尽，跳过第{search_round}轮充分性评估")
+            adequacy_score, evaluation_report, missing_areas, round_summary = (
+                final_adequacy_score, "预算用尽，跳过充分性评估", [], ""
+            )
+            should_continue, continue_reason = False, "预算用尽"
+            stopping_signals = None
+        elif previous_run is not None:
+            # 增量更新只执行一轮搜索，充分性评估沿用上次运行的结果，新增论文体现在更新后的总结中
+            adequacy_score, evaluation_report, missing_areas, round_summary = (
+                previous_run.adequacy_score, previous_run.evaluation_report, [], ""
+            )
+            should_continue, continue_reason = False, "增量更新只执行一轮搜索"
+            stopping_signals = None
         else:
-            print(f"⏹️ 提前终止: 否 (完成全部搜索轮次)")
-        
-        print(f"📝 使用的搜索查询总数: {len(all_queries_used)}")
-        print(f"📚 找到的论文总数: {sum(r['papers_found'] for r in search_rounds_results)}")
-        print(f"✅ 成功处理的论文: {len(all_processed_papers)}")
-        print(f"🧠 已分析的论文: {len(all_analyses)}")
-        print(f"📊 最终充分性评分: {final_adequacy_score:.2f}/1.0 (阈值: {ADEQUACY_EVALUATION_THRESHOLD})")
-        
-        # 显示总体来源分布
-        total_source_stats = {}
-        for round_result in search_rounds_results:
-            for source, count in round_result.get('source_distribution', {}).items():
-                total_source_stats[source] = total_source_stats.get(source, 0) + count
-        
-        if total_source_stats:
-            print(f"\n📊 总体来源分布:")
-            for source, count in total_source_stats.items():
-                percentage = (count / sum(total_source_stats.values())) * 100
-                print(f"   {source}: {count}篇 ({percentage:.1f}%)")
-        
-        if filters:
-            print(f"\n🔧 使用的过滤条件:")
-            if filters.conferences:
-                print(f"   会议筛选: {', '.join(filters.conferences)}")
-            if filters.exclude_conferences:
-                print(f"   排除会议: {', '.join(filters.exclude_conferences)}")
-            if filters.min_citations > 0:
-                print(f"   最小引用数: {filters.min_citations}")
-            if filters.max_citations:
-                print(f"   最大引用数: {filters.max_citations}")
-            if filters.start_date:
-                print(f"   开始日期: {filters.start_date.strftime('%Y-%m-%d')}")
-            if filters.end_date:
-                print(f"   结束日期: {filters.end_date.strftime('%Y-%m-%d')}")
-        
-        # 显示引用数统计
-        if all_analyses:
-            citations_data = [a.get('citations', 0) for a in all_analyses if a.get('citations', 0) > 0]
+            try:
+                adequacy_score, evaluation_report, missing_areas, round_summary = perform_adequacy_evaluation_after_round(
+                    ai_client, all_analyses, research_topic, search_round
+                )
+            except OperationCancelled:
+                # 本轮处理与分析已写入检查点，恢复时只需重新评估
+                search_rounds_results.append(record_cancelled_round(
+                    search_round, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+                    registry, cancel_token.reason, accumulated=True
+                ))
+                break
+            
+            # 判断是否应该继续搜索（评估失败时不计入边际收益趋势）
+            stopping_signals = None
+            if stopping_policy and round_summary:
+                stopping_signals = stopping_policy.observe_round(
+                    search_round, adequacy_score, registry.round_report(search_round)
+                )
+            should_continue, continue_reason = should_continue_search(
+                search_round, len(papers), adequacy_score, stopping_signals
+            )
+        if budget is not None:
+            budget.finish_round(len(processed_papers))
+        
+        # 真实评估完成后决定保留或丢弃推测结果
+        if speculating:
+            speculation = prefetcher.resolve(missing_areas, should_continue)
+        
+        # 统计来源分布
+        source_distribution = {}
+        for paper in papers:
+            source = paper.get('source', 'unknown')
+            source_distribution[source] = source_distribution.get(source, 0) + 1
+        
+        # 记录本轮详细结果
+        round_result = build_round_result(
+            search_round, queries, papers, processed_papers, analyses, all_analyses, all_processed_papers,
+            registry_report, adequacy_score, evaluation_report, missing_areas,
+            should_continue, continue_reason, source_distribution
+        )
+        if prefetcher and prefetcher.history and prefetcher.history[-1]['round'] == search_round:
+            round_result['speculative_prefetch'] = prefetcher.history[-1]
+        if stopping_signals:
+            round_result['stopping_signals'] = stopping_signals
+        if progressive_analyzer is not None:
+            round_result['analysis_levels'] = count_levels(analyses)
+        if load_shedder is not None:
+            round_result['active_degradations'] = load_shedder.active_degradations()
+        search_rounds_results.append(round_result)
+        checkpoint.save_stage(STAGE_EVALUATE, {
+            'round_result': round_result,
+            'round_summary': round_summary,
+            'stop_search': not should_continue
+        }, search_round)
+        notify_progress(progress_callback, 'round_completed', round=search_round, round_result=round_result)
+        
+        print(f"\n📊 第{search_round}轮详细统计:")
+        print(f"   找到论文: {len(papers)}")
+        print(f"   成功处理: {len(processed_papers)}")
+        print(f"   完成分析: {len(analyses)}")
+        if 'analysis_levels' in round_result:
+            levels = round_result['analysis_levels']
+            print(f"   分析级别: 全文 {levels['full_text']} 篇, 仅摘要 {levels['abstract']} 篇")
+        print(f"   跳过已处理论文: {registry_report['skipped_known']} (约节省 {registry_report['estimated_tokens_saved']:,} tokens)")
+        print(f"   来源分布: {source_distribution}")
+        print(f"   充分性评分: {adequacy_score:.2f}/1.0")
+        print(f"   累计已分析: {len(all_analyses)} 篇")
+        
+        # 显示引用数统计（如果有的话）
+        if analyses:
+            citations_data = [a.get('citations', 0) for a in analyses if a.get('citations', 0) > 0]
             if citations_data:
-                print(f"\n📊 引用数统计:")
-                print(f"   有引用数的论文: {len(citations_data)}/{len(all_analyses)}")
                 print(f"   引用数范围: {min(citations_data)} - {max(citations_data)}")
                 print(f"   平均引用数: {sum(citations_data) / len(citations_data):.1f}")
-                print(f"   高引用论文 (>100): {len([c for c in citations_data if c > 100])}")
-        
-        # 显示各轮充分性评估结果
-        print(f"\n📈 各轮搜索与充分性评估统计:")
-        for round_result in search_rounds_results:
-            round_num = round_result['round']
-            print(f"  第{round_num}轮:")
-            print(f"    📚 论文: 找到{round_result['papers_found']}篇 | 处理{round_result['papers_processed']}篇 | 分析{round_result['papers_analyzed']}篇")
-            print(f"    📊 充分性评分: {round_result['adequacy_score']:.2f}/1.0")
-            print(f"    🤔 继续搜索: {'是' if round_result['should_continue'] else '否'} ({round_result['continue_reason']})")
-            
-            if round_result.get('missing_areas'):
-                print(f"    🎯 缺失领域: {', '.join(round_result['missing_areas'][:3])}{'...' if len(round_result['missing_areas']) > 3 else ''}")
-            
-            source_dist = round_result.get('source_distribution', {})
-            if source_dist:
-                print(f"    🔍 来源分布: {', '.join([f'{k}:{v}' for k, v in source_dist.items()])}")
-            print()
-        
-        # 显示充分性评估时间线
-        print(f"📈 充分性评估时间线:")
-        for eval_point in results['adequacy_evaluation_timeline']:
-            print(f"  第{eval_point['round']}轮后: 评分 {eval_point['adequacy_score']:.2f} | 累计分析 {eval_point['cumulative_papers']}篇 | {'继续' if eval_point['should_continue'] else '结束'}")
-        
-        if final_research_summary:
-            print(f"\n📝 最终研究总结:")
-            print("-" * 60)
-            print(final_research_summary)
-        
-        if final_evaluation_report:
-            print(f"\n🔍 最终充分性评估报告:")
-            print("-" * 60)
-            print(final_evaluation_report)
-        
-        print(f"\n💾 完整结果已保存到: {output_file}")
-        
-        print("\n🎉 学术深度研究系统运行完成!")
-        end_time = time.time()
-        duration = end_time - start_time
-        # 智能格式化
-        hours = int(duration // 3600)
-        minutes = int((duration % 3600) // 60)
-        seconds = duration % 60
-
-        if hours > 0:
-            formatted = f"{hours}小时{minutes}分钟{seconds:.2f}秒"
-        elif minutes > 0:
-            formatted = f"{minutes}分钟{seconds:.2f}秒"
+        
+        final_adequacy_score = adequacy_score
+        final_evaluation_report = evaluation_report
+        
+        # 根据充分性评估结果决定是否继续
+        if not should_continue:
+            print(f"\n🎯 第{search_round}轮后决定结束搜索")
+            print(f"   原因: {continue_reason}")
+            print(f"   最终充分性评分: {adequacy_score:.2f}")
+            break
+        elif search_round < SEARCH_DEPTH:
+            print(f"\n➡️ 第{search_round}轮后决定继续搜索")
+            print(f"   原因: {continue_reason}")
+            if missing_areas:
+                print(f"   将重点关注: {', '.join(missing_areas[:3])}...")
         else:
-            formatted = f"{seconds:.2f}秒"
+            print(f"\n🔚 已达到最大搜索深度 {SEARCH_DEPTH}")
+    
+    # 生成最终研究总结（运行被取消时跳过）
+    final_research_summary = ""
+    final_state = checkpoint.load_stage(STAGE_FINAL_SUMMARY)
+    if final_state is not None:
+        final_research_summary = final_state['final_research_summary']
+        print(f"♻️ 从检查点恢复最终研究总结")
+    elif GENERATE_RESEARCH_SUMMARY and previous_run is not None and not cancel_token.cancelled:
+        print(f"\n📝 正在基于上次的研究总结与 {len(all_analyses)} 篇新增论文更新研究总结...")
+        try:
+            final_research_summary = ai_client.update_research_summary(
+                previous_run.summary, all_analyses, research_topic, since=f"{previous_run.since:%Y-%m-%d}"
+            )
+            checkpoint.save_stage(STAGE_FINAL_SUMMARY, {'final_research_summary': final_research_summary})
+        except OperationCancelled:
+            final_research_summary = previous_run.summary
+    elif GENERATE_RESEARCH_SUMMARY and all_analyses and not cancel_token.cancelled:
+        print(f"\n📝 正在生成最终研究总结 (基于{len(all_analyses)}篇论文的分析)...")
+        try:
+            final_research_summary = ai_client.analyze_multiple_papers_summary(
+                all_analyses, research_topic, depth_round=len(search_rounds_results)
+            )
+            checkpoint.save_stage(STAGE_FINAL_SUMMARY, {'final_research_summary': final_research_summary})
+        except OperationCancelled:
+            final_research_summary = ""
+    if cancel_token.cancelled:
+        print(f"🛑 运行已取消 ({cancel_token.reason})，已保留 {len(all_analyses)} 篇论文的分析结果")
+    notify_progress(progress_callback, 'final_summary', final_research_summary=final_research_summary)
+    
+    termination_reason = budget_stop_reason or (search_rounds_results[-1].get('continue_reason', 'Unknown') if search_rounds_results else 'Unknown')
+    if cancel_token.cancelled:
+        termination_reason = f"已取消: {cancel_token.reason}"
+    
+    # 汇总结果
+    results = {
+        'research_topic': research_topic,
+        'run_id': checkpoint.run_id,
+        'started_at': started_at.isoformat(),  # 下一次增量更新以此时间为基线
+        'incremental': previous_run.summary_info(all_analyses) if previous_run else None,
+        'search_mode': 'enhanced',
+        'search_source': 'google_scholar_arxiv',
+        'search_depth': SEARCH_DEPTH,
+        'actual_rounds_completed': len(search_rounds_results),
+        'early_termination': len(search_rounds_results) < SEARCH_DEPTH,
+        'termination_reason': termination_reason,
+        'cancelled': cancel_token.cancelled,
+        'total_papers_found': sum(r['papers_found'] for r in search_rounds_results),
+        'total_papers_processed': len(all_processed_papers),
+        'total_papers_analyzed': len(all_analyses),
+        'analysis_levels': count_levels(all_analyses) if progressive_analyzer else None,  # 渐进模式下全文/仅摘要分析的数量
+        'final_adequacy_score': final_adequacy_score,
+        'final_evaluation_report': final_evaluation_report,
+        'adequacy_threshold_used': ADEQUACY_EVALUATION_THRESHOLD,
+        'search_rounds_results': search_rounds_results,  # 包含每轮的充分性评估
+        'all_queries_used': all_queries_used,
+        'paper_registry': registry.summary(),  # 跨轮次去重统计
+        'paper_states': state_tracker.export(),  # 每篇论文的状态历史与各状态耗时（本次运行中实际下载/分析的论文）
+        # 本次运行命中持久化研究缓存的全文与分析数（跳过的下载与LLM调用）
+        'research_cache_hits': {kind: count - cache_hits_start[kind] for kind, count in cache_hits(ai_client, processor).items()},
+        'speculative_prefetch': prefetcher.history if prefetcher else [],  # 推测式预取的保留/丢弃记录
+        'load_shedding': load_shedder.summary() if load_shedder else None,  # 自动降载的启用/解除记录与各降级的累计时长
+        'budget': budget.summary() if budget else None,  # 预算模式的规划与实际开销
+        'filters_used': filters.__dict__ if filters else None,
+        'adequacy_evaluation_timeline': [  # 充分性评估时间线
+            {
+                'round': r['round'],
+                'adequacy_score': r['adequacy_score'],
+                'missing_areas': r['missing_areas'],
+                'cumulative_papers': r['cumulative_papers_analyzed'],
+                'should_continue': r['should_continue'],
+                'continue_reason': r['continue_reason'],
+                'stopping_signals': r.get('stopping_signals')  # 边际收益策略的判断依据（评分变化、新论文比例、token开销）
+            }
+            for r in search_rounds_results
+        ],
+        'configuration': {
+            'search_depth': SEARCH_DEPTH,
+            'num_search_queries': NUM_SEARCH_QUERIES,
+            'papers_per_query': PAPERS_PER_QUERY,
+            'depth_search_queries': DEPTH_SEARCH_QUERIES,
+            'papers_per_depth_query': PAPERS_PER_DEPTH_QUERY,
+            'max_papers_per_depth': MAX_PAPERS_PER_DEPTH,
+            'extract_full_pdf': EXTRACT_FULL_PDF,
+            'max_analysis_papers': MAX_ANALYSIS_PAPERS,
+            'concurrent_analysis_enabled': ENABLE_CONCURRENT_ANALYSIS,
+            'max_concurrent_analysis': MAX_CONCURRENT_ANALYSIS if ENABLE_CONCURRENT_ANALYSIS else 0,
+            'adequacy_evaluation_threshold': ADEQUACY_EVALUATION_THRESHOLD,
+            'min_papers_for_continue': MIN_PAPERS_FOR_CONTINUE,
+            'marginal_gain_stopping': ENABLE_MARGINAL_GAIN_STOPPING,
+            'marginal_gain_min_per_100k_tokens': MARGINAL_GAIN_MIN_PER_100K_TOKENS,
+            'progressive_analysis': progressive,
+            'distributed': task_executor is not None,
+            'analysis_model': ai_client.model,  # 单篇分析使用的模型（导入研究缓存时作为分析的归属模型）
+            'load_shedding': ENABLE_LOAD_SHEDDING,
+            'incremental': previous_run is not None
+        },
+        # 增量更新时包含沿用的上次分析（结果目录第0轮），统计数字只计本次新增
+        'paper_analyses': ((previous_run.analyses if previous_run else []) + all_analyses) if ENABLE_DETAILED_ANALYSIS else [],
+        'final_research_summary': final_research_summary,
+        'result_dir': str(result_store.run_dir),  # 论文/分析JSONL与全文文件所在目录
+        # 论文元数据，全文通过text_file引用（相对result_dir）
+        'processed_papers': all_processed_papers
+    }
+    results['telemetry'] = telemetry_delta(
+        telemetry_start, capture_telemetry(ai_client, searcher, processor), time.time() - run_start_time, results
+    )
+    
+    return results
 
-        print(f"✨ 智能搜索 + 过滤 + 每轮充分性评估 + 自动终止决策总用时: {formatted}")
-            
+def save_results(results, output_dir):
+    """写入运行索引（论文、分析与全文已在各轮完成时写入结果目录），返回索引文件路径"""
+    result_store = ResultStore(results['run_id'], output_dir=output_dir, save_texts=SAVE_FULL_TEXT)
+    print(f"\n💾 正在保存结果索引到 {result_store.index_file}...")
+    return result_store.write_index(results)
+
+def print_research_report(results, filters, output_file, start_time):
+    """显示最终结果"""
+    research_topic = results['research_topic']
+    search_rounds_results = results['search_rounds_results']
+    all_analyses = results['paper_analyses']
+    final_adequacy_score = results['final_adequacy_score']
+    final_research_summary = results['final_research_summary']
+    final_evaluation_report = results['final_evaluation_report']
+    
+    print("\n" + "="*80)
+    print("📊 学术深度研究结果总结")
+    print("="*80)
+    print(f"🎯 主题: {research_topic}")
+    print(f"🔧 搜索模式: 默认为增强模式 (Google Scholar + arXiv + 智能过滤)")
+    print(f"🔄 搜索深度: {SEARCH_DEPTH} 轮 (实际完成: {len(search_rounds_results)} 轮)")
+    
+    # 显示是否提前终止
+    if len(search_rounds_results) < SEARCH_DEPTH:
+        print(f"⏹️ 提前终止: 是 (原因: {results['termination_reason']})")
+    else:
+        print(f"⏹️ 提前终止: 否 (完成全部搜索轮次)")
+    
+    print(f"📝 使用的搜索查询总数: {len(results['all_queries_used'])}")
+    print(f"📚 找到的论文总数: {results['total_papers_found']}")
+    print(f"✅ 成功处理的论文: {results['total_papers_processed']}")
+    print(f"🧠 已分析的论文: {results['total_papers_analyzed']}")
+    load_shedding = results.get('load_shedding')
+    if load_shedding and load_shedding['seconds_active']:
+        durations = ', '.join(f"{name} {seconds:.0f}秒" for name, seconds in load_shedding['seconds_active'].items())
+        print(f"🪫 自动降载: {durations}")
+    research_cache_hits = results.get('research_cache_hits')
+    if research_cache_hits and any(research_cache_hits.values()):
+        print(f"📦 研究缓存命中: 全文 {research_cache_hits['text']} 篇, 分析 {research_cache_hits['analysis']} 篇")
+    search_cache = (results.get('telemetry') or {}).get('search', {}).get('cache')
+    if search_cache and any(search_cache['hits'].values()):
+        hits = sum(search_cache['hits'].values())
+        print(f"📦 搜索缓存命中: {hits}/{hits + sum(search_cache['misses'].values())} 次来源搜索 "
+              f"({', '.join(f'{source}:{count}' for source, count in search_cache['hits'].items() if count)})")
+    incremental = results.get('incremental')
+    if incremental:
+        print(f"📚 增量更新: 基于运行 {incremental['previous_run_id']}，沿用 {incremental['carried_analyses']} 篇已有分析，"
+              f"新增 {incremental['new_analyses']} 篇 ({incremental['since'][:10]} 之后发表)")
+    analysis_levels = results.get('analysis_levels')
+    if analysis_levels:
+        print(f"⚡ 分析级别: 全文 {analysis_levels['full_text']} 篇, 仅摘要 {analysis_levels['abstract']} 篇（下载未完成的论文使用摘要分析）")
+    registry_summary = results['paper_registry']
+    print(f"♻️ 跨轮次跳过的已处理论文: {registry_summary['total_skipped_known']} (约节省 {registry_summary['total_estimated_tokens_saved']:,} tokens)")
+    state_summary = results['paper_states']['summary']
+    if state_summary['papers']:
+        final_states = ', '.join(f'{state}:{count}' for state, count in state_summary['final_states'].items())
+        print(f"🧭 论文最终状态: {final_states} | 延迟重试 {state_summary['retries']} 次")
+    print(f"📊 最终充分性评分: {final_adequacy_score:.2f}/1.0 (阈值: {ADEQUACY_EVALUATION_THRESHOLD})")
+    budget_summary = results.get('budget')
+    if budget_summary:
+        print(f"⏱️ 预算使用: 用时 {budget_summary['elapsed_seconds']:.0f} 秒 | 消耗 {budget_summary['tokens_used']:,} tokens")
+    
+    # 显示总体来源分布
+    total_source_stats = {}
+    for round_result in search_rounds_results:
+        for source, count in round_result.get('source_distribution', {}).items():
+            total_source_stats[source] = total_source_stats.get(source, 0) + count
+    
+    if total_source_stats:
+        print(f"\n📊 总体来源分布:")
+        for source, count in total_source_stats.items():
+            percentage = (count / sum(total_source_stats.values())) * 100
+            print(f"   {source}: {count}篇 ({percentage:.1f}%)")
+    
+    if filters:
+        print(f"\n🔧 使用的过滤条件:")
+        if filters.conferences:
+            print(f"   会议筛选: {', '.join(filters.conferences)}")
+        if filters.exclude_conferences:
+            print(f"   排除会议: {', '.join(filters.exclude_conferences)}")
+        if filters.min_citations > 0:
+            print(f"   最小引用数: {filters.min_citations}")
+        if filters.max_citations:
+            print(f"   最大引用数: {filters.max_citations}")
+        if filters.start_date:
+            print(f"   开始日期: {filters.start_date.strftime('%Y-%m-%d')}")
+        if filters.end_date:
+            print(f"   结束日期: {filters.end_date.strftime('%Y-%m-%d')}")
+    
+    # 显示引用数统计
+    if all_analyses:
+        citations_data = [a.get('citations', 0) for a in all_analyses if a.get('citations', 0) > 0]
+        if citations_data:
+            print(f"\n📊 引用数统计:")
+            print(f"   有引用数的论文: {len(citations_data)}/{len(all_analyses)}")
+            print(f"   引用数范围: {min(citations_data)} - {max(citations_data)}")
+            print(f"   平均引用数: {sum(citations_data) / len(citations_data):.1f}")
+            print(f"   高引用论文 (>100): {len([c for c in citations_data if c > 100])}")
+    
+    # 显示各轮充分性评估结果
+    print(f"\n📈 各轮搜索与充分性评估统计:")
+    for round_result in search_rounds_results:
+        round_num = round_result['round']
+        print(f"  第{round_num}轮:")
+        print(f"    📚 论文: 找到{round_result['papers_found']}篇 | 处理{round_result['papers_processed']}篇 | 分析{round_result['papers_analyzed']}篇")
+        print(f"    📊 充分性评分: {round_result['adequacy_score']:.2f}/1.0")
+        print(f"    🤔 继续搜索: {'是' if round_result['should_continue'] else '否'} ({round_result['continue_reason']})")
+        
+        if round_result.get('missing_areas'):
+            print(f"    🎯 缺失领域: {', '.join(round_result['missing_areas'][:3])}{'...' if len(round_result['missing_areas']) > 3 else ''}")
+        
+        source_dist = round_result.get('source_distribution', {})
+        if source_dist:
+            print(f"    🔍 来源分布: {', '.join([f'{k}:{v}' for k, v in source_dist.items()])}")
+        print()
+    
+    # 显示充分性评估时间线
+    print(f"📈 充分性评估时间线:")
+    for eval_point in results['adequacy_evaluation_timeline']:
+        print(f"  第{eval_point['round']}轮后: 评分 {eval_point['adequacy_score']:.2f} | 累计分析 {eval_point['cumulative_papers']}篇 | {'继续' if eval_point['should_continue'] else '结束'}")
+        signals = eval_point.get('stopping_signals')
+        if signals and signals['gain_per_100k_tokens'] is not None:
+            print(f"    📉 评分变化 {signals['score_delta']:+.2f} | 新论文比例 {signals['novelty_rate']:.0%} | 本轮 {signals['round_tokens']:,} tokens | 每10万token预期提升 {signals['gain_per_100k_tokens']:.4f}")
+    
+    if final_research_summary:
+        print(f"\n📝 最终研究总结:")
+        print("-" * 60)
+        print(final_research_summary)
+    
+    if final_evaluation_report:
+        print(f"\n🔍 最终充分性评估报告:")
+        print("-" * 60)
+        print(final_evaluation_report)
+    
+    print(f"\n💾 完整结果已保存到: {output_file}")
+    
+    print("\n🎉 学术深度研究系统运行完成!")
+    end_time = time.time()
+    duration = end_time - start_time
+    # 智能格式化
+    hours = int(duration // 3600)
+    minutes = int((duration % 3600) // 60)
+    seconds = duration % 60
+
+    if hours > 0:
+        formatted = f"{hours}小时{minutes}分钟{seconds:.2f}秒"
+    elif minutes > 0:
+        formatted = f"{minutes}分钟{seconds:.2f}秒"
+    else:
+        formatted = f"{seconds:.2f}秒"
+
+    print(f"✨ 智能搜索 + 过滤 + 每轮充分性评估 + 自动终止决策总用时: {formatted}")
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="深研星图-学术深度研究系统")
+    parser.add_argument('--resume', metavar='RUN_ID', help='从检查点恢复指定的研究运行，跳过已完成的阶段')
+    parser.add_argument('--deadline-minutes', type=float, help='在指定分钟数内完成研究（始终为最终总结预留时间）')
+    parser.add_argument('--token-budget', type=int, help='整个研究最多消耗的token数（始终为最终总结预留token）')
+    parser.add_argument('--estimate', action='store_true',
+                        help='只估算按当前配置运行的耗时、请求数与token开销，不执行研究')
+    parser.add_argument('--progressive', action='store_true', default=None,
+                        help='先基于摘要快速分析并生成临时总结，全文分析完成后逐篇替换')
+    parser.add_argument('--distributed', action='store_true',
+                        help='下载提取与单篇分析提交到共享任务队列，由各节点上的 python task_worker.py 执行')
+    parser.add_argument('--task-db', default=TASK_QUEUE_DB,
+                        help='分布式模式的任务队列数据库路径（多机运行时位于共享文件系统，与 task_worker.py --db 相同）')
+    parser.add_argument('--incremental', nargs='?', const='latest', metavar='RUN_ID',
+                        help='增量更新：基于同一主题最近一次（或指定）运行，只搜索、分析其后发表的新论文并更新研究总结')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    print_banner()
+    
+    if args.estimate:
+        print_estimate(RunEstimator().estimate(), args.deadline_minutes, args.token_budget)
+        return
+    
+    # 初始化组件
+    print("🚀 正在初始搜索系统...")
+    ai_client = DeepSeekClient()
+    searcher = EnhancedPaperSearcher()
+    # 推测式预取下载提取的论文通过共享文本缓存交给下一轮使用
+    processor = EnhancedPDFProcessor(text_cache=ExtractedTextCache() if ENABLE_SPECULATIVE_PREFETCH else None)
+    pipeline = StreamingResearchPipeline(ai_client, searcher, processor) if ENABLE_STREAMING_PIPELINE else None
+    
+    print("✅ 学术搜索系统初始化完成")
+    print("   - 主要搜索源: Google Scholar")
+    print("   - 备用搜索源: arXiv")
+    print("   - 智能过滤: 会议、引用数、时间范围")
+    print("   - 充分性评估: 每轮自动评估")
+    print("   - 智能终止: 基于评估结果决定")
+    
+    # 输出目录
+    output_dir = Path(OUTPUT_DIR)
+    output_dir.mkdir(exist_ok=True)
+    
+    if args.resume:
+        # 从检查点恢复主题、下载目录与过滤条件
+        try:
+            checkpoint = RunCheckpoint.load(args.resume)
+        except FileNotFoundError as e:
+            print(f"❌ {e}")
+            return
+        research_topic = checkpoint.research_topic
+        download_dir = checkpoint.download_dir
+        filters = checkpoint.filters
+        previous_run = PreviousRun(checkpoint.previous_run_id) if checkpoint.previous_run_id else None
+        os.makedirs(download_dir, exist_ok=True)
+        start_time = time.time()
+        print(f"\n📋 恢复研究主题: {research_topic}")
+        print(f"📁 使用已有下载目录: {download_dir}")
+    else:
+        # 获取研究主题
+        research_topic = get_research_topic()
+        # 开始计时
+        start_time = time.time()
+        
+        print(f"\n📋 研究主题: {research_topic}")
+        
+        previous_run = None
+        if args.incremental:
+            previous_run = load_previous_run(research_topic, None if args.incremental == 'latest' else args.incremental)
+            if previous_run is None:
+                print("⚠️ 未找到该主题已完成的运行，将执行完整研究")
+        
+        if previous_run is not None:
+            # 沿用上次的下载目录与过滤条件，起始日期推进到上次运行之后
+            download_dir = previous_run.download_dir() or create_download_folder(research_topic)
+            filters = previous_run.narrow_filters(previous_run.search_filters() or searcher.get_user_search_preferences())
+            print(f"📁 增量更新使用下载目录: {download_dir}")
+        else:
+            download_dir = create_download_folder(research_topic)
+            # 获取搜索过滤器（增强模式）
+            filters = searcher.get_user_search_preferences()
+        
+        checkpoint = RunCheckpoint.create(research_topic)
+        checkpoint.save_run_info(download_dir, filters, previous_run.run_id if previous_run else None)
+    
+    # 显示配置
+    display_config()
+    
+    task_executor = None
+    if args.distributed:
+        task_queue = TaskQueue(args.task_db)
+        task_executor = DistributedTaskExecutor(task_queue, checkpoint.run_id, paper_store=processor.paper_store)
+        print(f"🌐 分布式模式: 任务队列 {task_queue.db_path}")
+        print(f"   请在各节点运行: python task_worker.py --db {task_queue.db_path}")
+    
+    budget = None
+    if args.deadline_minutes or args.token_budget:
+        budget = ResearchBudget(ai_client, deadline_minutes=args.deadline_minutes, token_budget=args.token_budget)
+    
+    # Ctrl+C触发取消令牌：进行中的请求与下载尽快停止，已完成的部分仍保存到结果文件
+    cancel_token = CancellationToken()
+    try:
+        results = run_research(
+            ai_client, searcher, processor, pipeline, research_topic, filters, download_dir, checkpoint,
+            budget=budget, cancel_token=cancel_token, progressive=args.progressive, task_executor=task_executor,
+            previous_run=previous_run
+        )
+        
+        # 保存到文件（被取消的运行不标记完成，仍可恢复）
+        output_file = save_results(results, output_dir)
+        if not results['cancelled']:
+            checkpoint.mark_finished(output_file)
+        
+        print_research_report(results, filters, output_file, start_time)
+        if results['cancelled']:
+            print(f"🔄 运行已取消，可使用 `python main_DeepResearch.py --resume {checkpoint.run_id}` 继续未完成的轮次。")
         
+    except KeyboardInterrupt:
+        print(f"\n🛑 研究已中断，可使用 `python main_DeepResearch.py --resume {checkpoint.run_id}` 从最后完成的阶段继续。")
     except Exception as e:
         print(f"\n❌ 研究过程中出现错误: {e}")
         if USE_RETRY_ON_FAILURE:
-            print("🔄 您可以尝试重新运行程序。")
+            print(f"🔄 您可以使用 `python main_DeepResearch.py --resume {checkpoint.run_id}` 从最后完成的阶段继续。")
         import traceback
         traceback.print_exc()
 
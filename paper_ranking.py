@@ -0,0 +1,113 @@
+"""
+候选论文排序
+每篇候选论文提取一次数值特征（引用数、发表时间、来源、会议匹配、摘要长度），
+按 RANKING_WEIGHTS 加权后用NumPy一次算出全部得分并选出前K篇。
+默认权重与原有的相关性排序一致：
+    min(引用数/100, 10) + max(0, 5 - 发表年数) + 来源权重 + 会议匹配5分
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config import RANKING_WEIGHTS, RANKING_SOURCE_WEIGHTS
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("⚠️ numpy未安装，论文排序将逐篇计算")
+
+# 特征列（顺序即特征矩阵的列顺序）
+FEATURES = ['citations', 'recency', 'source', 'venue_match', 'abstract_length']
+
+CITATION_SCALE = 100  # 每100次引用计1分
+CITATION_CAP = 10  # 引用数得分上限
+RECENCY_YEARS = 5  # 新发表的论文计5分，每过一年减1分
+ABSTRACT_SCALE = 1000  # 摘要长度按1000字符归一化（上限1）
+
+
+def _age_days(published, now: datetime) -> float:
+    if not published or not hasattr(published, 'replace'):
+        return float('nan')
+    return (now - published.replace(tzinfo=None)).days
+
+
+class PaperRanker:
+    """按加权特征对候选论文排序（weights / source_weights 默认取配置）"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 source_weights: Optional[Dict[str, float]] = None):
+        self.weights = dict(RANKING_WEIGHTS if weights is None else weights)
+        self.source_weights = RANKING_SOURCE_WEIGHTS if source_weights is None else source_weights
+
+    def extract(self, paper: Dict, now: datetime, venue_match: bool = False) -> List[float]:
+        """单篇论文的原始特征：引用数、发表天数（未知为nan）、来源权重、是否匹配所选会议、摘要长度"""
+        return [
+            float(paper.get('citations', 0) or 0),
+            float(_age_days(paper.get('published'), now)),
+            float(self.source_weights.get(paper.get('source', 'unknown'), 0)),
+            1.0 if venue_match else 0.0,
+            float(len(paper.get('abstract', '') or '')),
+        ]
+
+    def _weight_vector(self) -> List[float]:
+        return [float(self.weights.get(name, 0.0)) for name in FEATURES]
+
+    def _scores_numpy(self, rows: List[List[float]]):
+        raw = np.asarray(rows, dtype=float).reshape(-1, len(FEATURES))
+        citations, age_days, source, venue, abstract = raw.T
+        columns = np.column_stack([
+            np.minimum(citations / CITATION_SCALE, CITATION_CAP),
+            np.where(np.isnan(age_days), 0.0, np.maximum(0.0, RECENCY_YEARS - np.nan_to_num(age_days) / 365)),
+            source,
+            venue,
+            np.minimum(abstract / ABSTRACT_SCALE, 1.0),
+        ])
+        return columns @ np.asarray(self._weight_vector())
+
+    def _scores_python(self, rows: List[List[float]]) -> List[float]:
+        weights = self._weight_vector()
+        scores = []
+        for citations, age_days, source, venue, abstract in rows:
+            columns = [
+                min(citations / CITATION_SCALE, CITATION_CAP),
+                0.0 if age_days != age_days else max(0.0, RECENCY_YEARS - age_days / 365),
+                source,
+                venue,
+                min(abstract / ABSTRACT_SCALE, 1.0),
+            ]
+            scores.append(sum(w * c for w, c in zip(weights, columns)))
+        return scores
+
+    def _rows(self, papers: List[Dict], venue_match: Optional[Callable[[Dict], bool]]) -> List[List[float]]:
+        now = datetime.now()
+        return [self.extract(paper, now, venue_match(paper) if venue_match else False) for paper in papers]
+
+    def scores(self, papers: List[Dict], venue_match: Optional[Callable[[Dict], bool]] = None) -> List[float]:
+        """全部候选论文的得分（用于调整权重时查看）"""
+        rows = self._rows(papers, venue_match)
+        if NUMPY_AVAILABLE:
+            return self._scores_numpy(rows).tolist()
+        return self._scores_python(rows)
+
+    def rank(self, papers: List[Dict], venue_match: Optional[Callable[[Dict], bool]] = None,
+             top_k: Optional[int] = None) -> List[Dict]:
+        """按得分从高到低排序（同分保持原有顺序），top_k指定时只返回前K篇"""
+        if not papers:
+            return []
+        rows = self._rows(papers, venue_match)
+        count = len(papers) if top_k is None else max(0, min(top_k, len(papers)))
+        if NUMPY_AVAILABLE:
+            scores = self._scores_numpy(rows)
+            if count < len(papers):
+                # 先取出得分前count的候选（包括与第count名同分的），再稳定排序
+                cutoff = np.partition(scores, len(scores) - count)[len(scores) - count] if count else np.inf
+                candidates = np.flatnonzero(scores >= cutoff)
+            else:
+                candidates = np.arange(len(papers))
+            order = candidates[np.argsort(-scores[candidates], kind='stable')][:count]
+            return [papers[i] for i in order]
+        scores = self._scores_python(rows)
+        order = sorted(range(len(papers)), key=lambda i: -scores[i])[:count]
+        return [papers[i] for i in order]
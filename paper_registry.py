@@ -0,0 +1,200 @@
+"""
+跨轮次全局论文注册表
+按规范身份（arXiv ID、DOI、标准化标题）记录整个研究过程中已处理的论文，
+使后续轮次不再重复下载、提取和分析同一篇论文。
+"""
+
+import re
+import threading
+from typing import List, Dict, Optional
+
+# arXiv新式编号，例如 2106.09685v2
+ARXIV_ID_PATTERN = re.compile(r'(\d{4}\.\d{4,5})(v\d+)?', re.IGNORECASE)
+ARXIV_URL_PATTERN = re.compile(r'arxiv\.org/(?:abs|pdf)/(\d{4}\.\d{4,5})(v\d+)?', re.IGNORECASE)
+DOI_PATTERN = re.compile(r'(10\.\d{4,9}/[^\s?#]+)', re.IGNORECASE)
+
+
+def normalize_title(title: str) -> str:
+    """标准化标题（小写、去标点、合并空格）"""
+    normalized = re.sub(r'[^\w\s]', ' ', (title or '').lower())
+    return re.sub(r'\s+', ' ', normalized).strip()
+
+
+def extract_arxiv_id(paper: Dict) -> str:
+    """从论文字段或链接中提取不带版本号的arXiv ID"""
+    arxiv_id = paper.get('arxiv_id') or ''
+    match = ARXIV_ID_PATTERN.search(arxiv_id)
+    if match:
+        return match.group(1)
+
+    urls = [paper.get('pdf_url'), paper.get('paper_url')] + list(paper.get('pdf_links') or [])
+    for url in urls:
+        if not url:
+            continue
+        match = ARXIV_URL_PATTERN.search(url)
+        if match:
+            return match.group(1)
+    return ''
+
+
+def extract_doi(paper: Dict) -> str:
+    """从论文字段或doi.org链接中提取小写DOI"""
+    candidates = [paper.get('doi')]
+    paper_url = paper.get('paper_url') or ''
+    if 'doi.org/' in paper_url:
+        candidates.append(paper_url)
+    for candidate in candidates:
+        if not candidate:
+            continue
+        match = DOI_PATTERN.search(candidate)
+        if match:
+            return match.group(1).rstrip('.').lower()
+    return ''
+
+
+def paper_identity_keys(paper: Dict) -> List[str]:
+    """返回论文的全部规范身份键"""
+    keys = []
+    arxiv_id = extract_arxiv_id(paper)
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    doi = extract_doi(paper)
+    if doi:
+        keys.append(f"doi:{doi}")
+    title = normalize_title(paper.get('title', ''))
+    if title:
+        keys.append(f"title:{title}")
+    return keys
+
+
+def estimate_analysis_tokens(paper: Dict, analysis: str = "") -> int:
+    """估算分析一篇论文消耗的LLM token数（输入文本 + 每次调用的输出）"""
+    text_chars = paper.get('text_length') or len(paper.get('abstract', '') or '')
+    chunks = paper.get('text_chunks') or []
+    # 累积式分析：每个块一次调用，外加最终整理调用
+    calls = 1 if len(chunks) <= 1 else len(chunks) + 1
+    output_tokens = len(analysis or '') // 4
+    return text_chars // 4 + output_tokens * calls
+
+
+class GlobalPaperRegistry:
+    """整个研究运行期间共享的论文注册表（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}  # 身份键 -> 论文记录（同一论文的多个键共享同一记录）
+        self._round_stats: Dict[int, Dict] = {}
+
+    def _find_entry(self, paper: Dict) -> Optional[Dict]:
+        for key in paper_identity_keys(paper):
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def _round(self, round_num: int) -> Dict:
+        if round_num not in self._round_stats:
+            self._round_stats[round_num] = {
+                'round': round_num,
+                'skipped_known': 0,
+                'new_papers': 0,
+                'estimated_tokens_saved': 0,
+            }
+        return self._round_stats[round_num]
+
+    def _record_skip(self, entry: Dict, round_num: int):
+        stats = self._round(round_num)
+        stats['skipped_known'] += 1
+        stats['estimated_tokens_saved'] += entry.get('analysis_tokens', 0)
+
+    def is_known(self, paper: Dict) -> bool:
+        """论文是否已在之前被处理过"""
+        with self._lock:
+            return self._find_entry(paper) is not None
+
+    def filter_new(self, papers: List[Dict], round_num: int) -> List[Dict]:
+        """过滤掉已处理过的论文，并记录本轮跳过数量与节省的token"""
+        new_papers = []
+        with self._lock:
+            for paper in papers:
+                entry = self._find_entry(paper)
+                if entry is not None:
+                    self._record_skip(entry, round_num)
+                    continue
+                new_papers.append(paper)
+        skipped = len(papers) - len(new_papers)
+        if skipped:
+            print(f"♻️ 全局注册表: 第{round_num}轮跳过 {skipped} 篇已处理论文")
+        return new_papers
+
+    def skip_if_known(self, paper: Dict, round_num: int) -> bool:
+        """若论文在之前的轮次已处理过，记录一次跳过并返回True"""
+        with self._lock:
+            entry = self._find_entry(paper)
+            if entry is None or entry['round'] == round_num:
+                return False
+            self._record_skip(entry, round_num)
+            return True
+
+    def claim(self, paper: Dict, round_num: int) -> bool:
+        """原子地登记即将处理的论文；已登记过则返回False"""
+        with self._lock:
+            entry = self._find_entry(paper)
+            if entry is not None:
+                return False
+            entry = {
+                'title': paper.get('title', ''),
+                'round': round_num,
+                'analysis_tokens': 0,
+            }
+            for key in paper_identity_keys(paper):
+                self._entries[key] = entry
+            self._round(round_num)['new_papers'] += 1
+            return True
+
+    def claim_many(self, papers: List[Dict], round_num: int) -> List[Dict]:
+        """批量登记，返回成功登记的论文"""
+        return [paper for paper in papers if self.claim(paper, round_num)]
+
+    def record_analysis(self, paper: Dict, analysis: str):
+        """记录论文的分析token开销，用于估算后续轮次节省的token"""
+        tokens = estimate_analysis_tokens(paper, analysis)
+        with self._lock:
+            entry = self._find_entry(paper)
+            if entry is None:
+                return
+            entry['analysis_tokens'] = tokens
+            # 处理后可能新增了身份信息（例如下载后补充的链接）
+            for key in paper_identity_keys(paper):
+                self._entries.setdefault(key, entry)
+
+    def restore_round(self, papers: List[Dict], analyses: List[Dict], round_num: int,
+                      report: Optional[Dict] = None):
+        """从检查点恢复某轮已处理的论文、分析开销与统计"""
+        analysis_by_title = {a['paper']: a['analysis'] for a in analyses}
+        for paper in papers:
+            self.claim(paper, round_num)
+            if paper.get('title') in analysis_by_title:
+                self.record_analysis(paper, analysis_by_title[paper['title']])
+        if report:
+            with self._lock:
+                stats = self._round(round_num)
+                stats['skipped_known'] = report.get('skipped_known', 0)
+                stats['estimated_tokens_saved'] = report.get('estimated_tokens_saved', 0)
+
+    def round_report(self, round_num: int) -> Dict:
+        """本轮的注册表统计"""
+        with self._lock:
+            return dict(self._round(round_num))
+
+    def summary(self) -> Dict:
+        """整个运行的注册表统计"""
+        with self._lock:
+            rounds = [dict(stats) for _, stats in sorted(self._round_stats.items())]
+            unique_papers = len({id(entry) for entry in self._entries.values()})
+        return {
+            'unique_papers': unique_papers,
+            'total_skipped_known': sum(r['skipped_known'] for r in rounds),
+            'total_estimated_tokens_saved': sum(r['estimated_tokens_saved'] for r in rounds),
+            'rounds': rounds,
+        }
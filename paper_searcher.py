@@ -1,12 +1,15 @@
+import copy
+import queue
 import requests
 import arxiv
 import re
-import time
 import json
 import random
+import threading
+import time
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, replace
 from urllib.parse import urljoin, urlparse, quote
 from bs4 import BeautifulSoup
 from tqdm import tqdm
@@ -14,6 +17,13 @@ import warnings
 import difflib
 from fuzzywuzzy import fuzz, process
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from cancellation import CancellationToken, OperationCancelled, cancellable_sleep, cancellable_call, CANCEL_POLL_INTERVAL
+from host_scheduler import shared_host_scheduler
+from search_cache import SearchCache
+from title_dedup import TitleDeduplicator, clean_title
+from venue_classifier import VenueClassifier
+from paper_ranking import PaperRanker
 warnings.filterwarnings('ignore')
 
 # 尝试导入scholarly库
@@ -30,6 +40,22 @@ except ImportError:
     PAPERS_PER_QUERY = 10
     DEPTH_SEARCH_QUERIES = 2
 
+from config import ENABLE_SEARCH_FANOUT, SEARCH_SOURCE_TIME_BUDGETS, SEARCH_FANOUT_GRACE_SECONDS, SEARCH_QUERY_CONCURRENCY
+from config import ENABLE_SEARCH_CACHE
+from config import SCHOLARLY_FILL_WORKERS, SCHOLARLY_FILL_TIMEOUT
+
+# scholarly库与arXiv库自行发出请求，调度时按其访问的主机计算
+SCHOLARLY_HOST = 'scholar.google.com'
+ARXIV_API_HOST = 'export.arxiv.org'
+
+# 搜索来源（按瀑布模式的优先级排列）-> 搜索方法名
+SEARCH_SOURCES = [
+    ('google_scholar', 'search_google_scholar'),
+    ('scholarly', 'search_scholarly_backup'),
+    ('dblp', 'search_dblp_backup'),
+    ('arxiv', 'search_arxiv_backup'),
+]
+
 @dataclass
 class SearchFilters:
     """论文搜索过滤器配置"""
@@ -54,8 +80,21 @@ class SearchFilters:
     similarity_threshold: int = 75  # 模糊匹配相似度阈值 (0-100)
 
 class EnhancedMultiSourcePaperSearcher:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, session: Optional[requests.Session] = None, host_scheduler=None,
+                 search_cache: Optional[SearchCache] = None):
+        self.session = session or requests.Session()
+        self.cancel_token = None  # 取消令牌（通过with_cancel_token绑定）
+        # 按主机的令牌桶限速（默认与进程内其他搜索器共享）
+        self.host_scheduler = host_scheduler or shared_host_scheduler()
+        # 持久化搜索结果缓存（ENABLE_SEARCH_CACHE时默认启用）
+        if search_cache is None and ENABLE_SEARCH_CACHE:
+            search_cache = SearchCache()
+        self.search_cache = search_cache
+        
+        # 搜索统计（绑定取消令牌的副本共享同一统计）
+        self.stats_lock = threading.Lock()
+        self.source_stats: Dict[str, Dict] = {}
+        self.request_counts: Dict[str, int] = {}
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -176,6 +215,10 @@ class EnhancedMultiSourcePaperSearcher:
             'TOCS': ['ACM Transactions on Computer Systems', 'TOCS'],
             'TON': ['IEEE/ACM Transactions on Networking', 'TON'],
         }
+        # 会议别名索引（构建一次，会议筛选、排除与排序共用按会议信息缓存的分类结果）
+        self.venue_classifier = VenueClassifier(self.conference_mappings)
+        # 候选论文排序（权重见RANKING_WEIGHTS）
+        self.ranker = PaperRanker()
         
         # arXiv类别映射
         self.category_mappings = {
@@ -199,6 +242,70 @@ class EnhancedMultiSourcePaperSearcher:
         print(f"   - 支持 {len(self.conference_mappings)} 个主要会议")
         print(f"   - 支持 {len(self.conference_categories)} 个领域分类")
     
+    def with_cancel_token(self, token) -> 'EnhancedMultiSourcePaperSearcher':
+        """返回绑定取消令牌的搜索器副本（共享会话与会议数据）"""
+        bound = copy.copy(self)
+        bound.cancel_token = token
+        return bound
+    
+    def _cancelled(self) -> bool:
+        return self.cancel_token is not None and self.cancel_token.cancelled
+    
+    def _raise_if_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+    
+    def _sleep(self, seconds: float):
+        """可被取消令牌打断的延迟"""
+        cancellable_sleep(seconds, self.cancel_token)
+    
+    def _throttle(self, host: str):
+        """按主机的令牌桶等待（可被取消令牌打断），未配置限速的主机不等待"""
+        self.host_scheduler.acquire(host, self.cancel_token)
+    
+    def _get(self, url: str, **kwargs):
+        """按主机限速、可被取消令牌打断的GET请求"""
+        host = urlparse(url).netloc
+        self._throttle(host)
+        with self.stats_lock:
+            self.request_counts[host] = self.request_counts.get(host, 0) + 1
+        return cancellable_call(self.cancel_token, self.session.get, url, **kwargs)
+    
+    def _search_source(self, source: str, search, query: str, max_results: int,
+                       since: Optional[datetime] = None, **options) -> List[Dict]:
+        """
+        执行单个来源的搜索并记录次数、结果数与耗时（供运行估算使用），since为下推到来源的最早发表时间，
+        options为来源特有的参数（scholarly的初筛条件）。
+        有缓存时先查询缓存，命中时不发出请求也不计入来源统计；只缓存未被取消、不含不完整结果（incomplete）的非空结果。
+        """
+        cache_query = self._cache_query(source, query, options)
+        if self.search_cache is not None:
+            cached = self.search_cache.lookup(source, cache_query, max_results, since)
+            if cached is not None:
+                print(f"  📦 {source} 命中搜索缓存: {len(cached)} 篇论文")
+                return cached
+        start = time.time()
+        papers = search(query, max_results, since=since, **options)
+        if (self.search_cache is not None and papers and not self._cancelled()
+                and not any(paper.get('incomplete') for paper in papers)):
+            self.search_cache.put(source, cache_query, max_results, since, papers)
+        with self.stats_lock:
+            stats = self.source_stats.setdefault(source, {'searches': 0, 'papers': 0, 'seconds': 0.0})
+            stats['searches'] += 1
+            stats['papers'] += len(papers)
+            stats['seconds'] += time.time() - start
+        return papers
+    
+    def get_search_stats(self) -> Dict:
+        """各来源的搜索次数、结果数与耗时，按域名统计的HTTP请求数，各主机的限速排队时间，以及搜索缓存的命中情况"""
+        with self.stats_lock:
+            return {
+                'sources': {source: dict(stats) for source, stats in self.source_stats.items()},
+                'requests_by_host': dict(self.request_counts),
+                'host_throttle': self.host_scheduler.stats(),
+                'cache': self.search_cache.stats() if self.search_cache is not None else {'hits': {}, 'misses': {}},
+            }
+    
     def fuzzy_match_title(self, title1: str, title2: str, threshold: int = 75) -> bool:
         """模糊匹配两个标题"""
         if not title1 or not title2:
@@ -221,55 +328,40 @@ class EnhancedMultiSourcePaperSearcher:
     
     def _clean_text_for_matching(self, text: str) -> str:
         """清理文本用于匹配"""
-        # 转小写
-        text = text.lower()
-        # 移除特殊字符
-        text = re.sub(r'[^\w\s]', ' ', text)
-        # 标准化空格
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+        return clean_title(text)
     
     def fuzzy_match_conference(self, paper_text: str, target_conferences: List[str], threshold: int = 70) -> bool:
-        """模糊匹配会议名称"""
+        """模糊匹配会议名称（会议别名的单词覆盖率达到 threshold%）"""
         if not target_conferences:
             return True  # 如果没有指定会议，则通过
-        
-        paper_text_clean = self._clean_text_for_matching(paper_text)
-        
-        for conf in target_conferences:
-            # 检查会议简称
-            if fuzz.partial_ratio(conf.lower(), paper_text_clean) >= threshold:
-                return True
-            
-            # 检查会议全称
-            if conf in self.conference_mappings:
-                for conf_name in self.conference_mappings[conf]:
-                    conf_name_clean = self._clean_text_for_matching(conf_name)
-                    if fuzz.partial_ratio(conf_name_clean, paper_text_clean) >= threshold:
-                        return True
-        
-        return False
+        return self.venue_classifier.matches(paper_text, target_conferences, min_coverage=threshold / 100)
+    
+    def _paper_venues(self, paper: Dict, filters: SearchFilters) -> frozenset:
+        """论文的规范会议ID集合（会议信息来自Scholar的作者/出处行与DBLP/scholarly的venue，按字符串缓存）"""
+        venue_text = paper.get('authors_text', '') + ' ' + paper.get('venue', '')
+        min_coverage = filters.similarity_threshold / 100 if filters.fuzzy_matching else 1.0
+        return self.venue_classifier.classify(venue_text, min_coverage)
     
-    def search_google_scholar(self, query: str, max_results: int) -> List[Dict]:
-        """在Google Scholar中搜索论文（原有方法）"""
+    def search_google_scholar(self, query: str, max_results: int, since: Optional[datetime] = None) -> List[Dict]:
+        """在Google Scholar中搜索论文（原有方法），since按年份下推为as_ylo参数"""
         print(f"🔍 在Google Scholar中搜索: {query}")
         
         papers = []
         start = 0
         
-        while len(papers) < max_results:
+        while len(papers) < max_results and not self._cancelled():
             url = "https://scholar.google.com/scholar"
             params = {
                 'q': query,
                 'start': start,
                 'hl': 'en'
             }
+            if since:
+                params['as_ylo'] = since.year
             
             try:
-                # 随机延迟防止被封
-                time.sleep(random.uniform(2, 5))
-                
-                response = self.session.get(url, params=params, timeout=15)
+                # 防封延迟由scholar.google.com的令牌桶控制（见HOST_RATE_LIMITS）
+                response = self._get(url, params=params, timeout=15)
                 response.raise_for_status()
                 
                 soup = BeautifulSoup(response.content, 'html.parser')
@@ -289,6 +381,10 @@ class EnhancedMultiSourcePaperSearcher:
                 
                 start += 10
                 
+            except OperationCancelled:
+                # 超过时间预算或已取消：返回已解析的结果（取消的结果不写入搜索缓存）
+                print(f"  ⏹️ Google Scholar搜索已取消，保留已取得的 {len(papers)} 篇论文")
+                break
             except Exception as e:
                 print(f"  ⚠️ Google Scholar搜索出错: {e}")
                 break
@@ -296,8 +392,9 @@ class EnhancedMultiSourcePaperSearcher:
         print(f"  ✅ Google Scholar找到 {len(papers)} 篇论文")
         return papers
     
-    def search_scholarly_backup(self, query: str, max_results: int) -> List[Dict]:
-        """使用scholarly库作为backup搜索"""
+    def search_scholarly_backup(self, query: str, max_results: int, since: Optional[datetime] = None,
+                                filters: Optional[SearchFilters] = None) -> List[Dict]:
+        """使用scholarly库作为backup搜索，since按年份下推为year_low，有filters时只补全通过初筛的结果"""
         if not self.scholarly_available:
             return []
         
@@ -305,62 +402,139 @@ class EnhancedMultiSourcePaperSearcher:
         
         papers = []
         try:
-            search_query = scholarly.search_pubs(query)
+            self._throttle(SCHOLARLY_HOST)
+            search_query = scholarly.search_pubs(query, year_low=since.year if since else None)
             
+            # 先用search_pubs返回的标题、年份、引用数、会议初筛，只补全（fill）保留的结果
+            pubs = []
+            to_fill = []
+            screen = self._scholarly_screen(filters)
             for i, pub in enumerate(search_query):
-                if i >= max_results:
+                if i >= max_results or self._cancelled():
                     break
-                
                 try:
-                    # 获取详细信息
-                    pub_filled = scholarly.fill(pub)
-                    
-                    # 解析发表年份
-                    pub_year = None
-                    if 'pub_year' in pub_filled and pub_filled['pub_year']:
-                        try:
-                            pub_year = int(pub_filled['pub_year'])
-                        except:
-                            pass
-                    
-                    # 解析引用数
-                    citations = 0
-                    if 'num_citations' in pub_filled:
-                        citations = pub_filled['num_citations'] or 0
-                    
-                    paper = {
-                        'title': pub_filled.get('title', ''),
-                        'authors': [author.get('name', '') for author in pub_filled.get('author', [])],
-                        'abstract': pub_filled.get('abstract', ''),
-                        'published': datetime(pub_year, 1, 1) if pub_year else None,
-                        'published_str': str(pub_year) if pub_year else "Unknown",
-                        'citations': citations,
-                        'paper_url': pub_filled.get('pub_url', ''),
-                        'pdf_url': pub_filled.get('eprint_url', ''),
-                        'pdf_links': [pub_filled.get('eprint_url')] if pub_filled.get('eprint_url') else [],
-                        'source': 'scholarly',
-                        'venue': pub_filled.get('venue', ''),
-                        'authors_text': ', '.join([author.get('name', '') for author in pub_filled.get('author', [])])
-                    }
-                    
-                    papers.append(paper)
-                    
+                    paper = self._parse_scholarly_pub(pub)
                 except Exception as e:
                     print(f"    ⚠️ 处理scholarly结果出错: {e}")
                     continue
-                
-                # 添加延迟避免被限制
-                time.sleep(1)
+                if screen is None or self._apply_enhanced_filters(paper, screen):
+                    to_fill.append(len(pubs))
+                pubs.append(pub)
+                papers.append(paper)
             
-            print(f"  ✅ scholarly找到 {len(papers)} 篇论文")
+            # 初筛未通过的结果保留未补全的信息（随后会被过滤器丢弃）；哪些结果被补全取决于初筛条件，
+            # 因此缓存按初筛条件区分（见_cache_query）
+            self._count_scholarly('screened_out', len(pubs) - len(to_fill))
+            self._fill_scholarly_results(pubs, papers, to_fill)
+            print(f"  ✅ scholarly找到 {len(papers)} 篇论文（补全 {len(to_fill)} 篇）")
             
         except Exception as e:
             print(f"  ❌ scholarly搜索失败: {e}")
         
         return papers
     
-    def search_dblp_backup(self, query: str, max_results: int) -> List[Dict]:
-        """使用DBLP作为backup搜索"""
+    @staticmethod
+    def _cache_query(source: str, query: str, options: Dict) -> str:
+        """搜索缓存使用的查询键：scholarly结果的补全范围取决于初筛条件，键中包含初筛条件"""
+        filters = options.get('filters')
+        if source != 'scholarly' or filters is None:
+            return query
+        screen = (filters.start_date, filters.end_date, filters.min_citations, filters.max_citations,
+                  sorted(filters.conferences or []), filters.similarity_threshold)
+        return f"{query} [初筛 {screen}]"
+    
+    @staticmethod
+    def _scholarly_screen(filters: Optional[SearchFilters]) -> Optional[SearchFilters]:
+        """
+        scholarly初筛使用的过滤条件：未补全的结果只有摘要片段、会议名可能被截断，
+        因此不检查摘要长度与排除会议，会议按模糊匹配判断（初筛只会比正式过滤宽松）
+        """
+        if filters is None:
+            return None
+        return replace(filters, min_abstract_length=0, exclude_conferences=None, fuzzy_matching=True)
+    
+    @staticmethod
+    def _parse_scholarly_pub(pub: Dict) -> Dict:
+        """把scholarly的结果（search_pubs的摘要信息或fill后的完整信息，字段在bib中）转换为论文记录"""
+        bib = pub.get('bib') or {}
+        
+        # 解析发表年份
+        pub_year = None
+        try:
+            pub_year = int(bib.get('pub_year') or pub.get('pub_year'))
+        except (TypeError, ValueError):
+            pass
+        
+        # 作者：search_pubs为姓名列表，fill后为以 and 连接的字符串
+        authors = bib.get('author', pub.get('author', []))
+        if isinstance(authors, str):
+            authors = authors.split(' and ')
+        authors = [(author.get('name', '') if isinstance(author, dict) else str(author)).strip() for author in authors]
+        authors = [author for author in authors if author]
+        
+        eprint_url = pub.get('eprint_url', '')
+        return {
+            'title': bib.get('title') or pub.get('title', ''),
+            'authors': authors,
+            'abstract': bib.get('abstract') or pub.get('abstract', ''),
+            'published': datetime(pub_year, 1, 1) if pub_year else None,
+            'published_str': str(pub_year) if pub_year else "Unknown",
+            'citations': pub.get('num_citations') or 0,
+            'paper_url': pub.get('pub_url', ''),
+            'pdf_url': eprint_url,
+            'pdf_links': [eprint_url] if eprint_url else [],
+            'source': 'scholarly',
+            'venue': bib.get('venue') or bib.get('journal') or bib.get('conference') or pub.get('venue', ''),
+            'authors_text': ', '.join(authors)
+        }
+    
+    def _fill_scholarly_results(self, pubs: List[Dict], papers: List[Dict], to_fill: List[int]):
+        """用小线程池补全初筛保留的结果，补全失败或超时的保留未补全的信息"""
+        if not to_fill:
+            return
+        executor = ThreadPoolExecutor(max_workers=max(1, min(SCHOLARLY_FILL_WORKERS, len(to_fill))),
+                                      thread_name_prefix="scholarly-fill")
+        try:
+            futures = [(i, executor.submit(self._fill_scholarly_pub, pubs[i])) for i in to_fill]
+            for i, future in futures:
+                filled = future.result()
+                if filled is not None:
+                    papers[i] = self._parse_scholarly_pub(filled)
+                else:
+                    # 补全失败或超时：摘要与会议可能不完整，含这类结果的搜索不写入缓存
+                    papers[i]['incomplete'] = True
+        finally:
+            # 取消时不再补全尚未开始的结果
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fill_scholarly_pub(self, pub: Dict) -> Optional[Dict]:
+        """补全单个scholarly结果（与Google Scholar搜索共用同一主机的限速），超过SCHOLARLY_FILL_TIMEOUT时放弃等待"""
+        self._throttle(SCHOLARLY_HOST)
+        # 每次调用使用运行令牌的子令牌，超时只放弃本次调用
+        token = self.cancel_token.child() if self.cancel_token is not None else CancellationToken()
+        timer = threading.Timer(SCHOLARLY_FILL_TIMEOUT, token.cancel, args=("scholarly补全超时",))
+        timer.daemon = True
+        timer.start()
+        self._count_scholarly('fills')
+        try:
+            return token.call(scholarly.fill, pub)
+        except OperationCancelled:
+            self._raise_if_cancelled()
+            self._count_scholarly('fill_timeouts')
+            print(f"    ⏱️ scholarly补全超过 {SCHOLARLY_FILL_TIMEOUT:.0f}秒，使用未补全的信息")
+        except Exception as e:
+            print(f"    ⚠️ scholarly补全出错: {e}")
+        finally:
+            timer.cancel()
+        return None
+    
+    def _count_scholarly(self, key: str, count: int = 1):
+        with self.stats_lock:
+            stats = self.source_stats.setdefault('scholarly', {'searches': 0, 'papers': 0, 'seconds': 0.0})
+            stats[key] = stats.get(key, 0) + count
+    
+    def search_dblp_backup(self, query: str, max_results: int, since: Optional[datetime] = None) -> List[Dict]:
+        """使用DBLP作为backup搜索（DBLP搜索API不支持日期条件，since由过滤器在结果上应用）"""
         print(f"🔍 在DBLP中搜索: {query}")
         
         papers = []
@@ -373,7 +547,7 @@ class EnhancedMultiSourcePaperSearcher:
                 'h': max_results
             }
             
-            response = self.session.get(dblp_url, params=params, timeout=10)
+            response = self._get(dblp_url, params=params, timeout=10)
             response.raise_for_status()
             
             # 解析XML响应
@@ -442,19 +616,26 @@ class EnhancedMultiSourcePaperSearcher:
         
         return papers
     
-    def search_arxiv_backup(self, query: str, max_results: int) -> List[Dict]:
-        """在arXiv中搜索论文作为备用（原有方法，稍作修改）"""
+    def search_arxiv_backup(self, query: str, max_results: int, since: Optional[datetime] = None) -> List[Dict]:
+        """在arXiv中搜索论文作为备用（原有方法，稍作修改），since下推为submittedDate范围"""
         print(f"🔍 在arXiv中搜索: {query}")
         
+        search_query = query
+        if since:
+            search_query = f"({query}) AND submittedDate:[{since:%Y%m%d%H%M} TO {datetime.now():%Y%m%d%H%M}]"
+        
         try:
+            self._throttle(ARXIV_API_HOST)
             search = arxiv.Search(
-                query=query,
+                query=search_query,
                 max_results=max_results,
                 sort_by=arxiv.SortCriterion.Relevance
             )
             
             papers = []
             for result in tqdm(search.results(), desc="获取arXiv论文"):
+                if self._cancelled():
+                    break
                 paper = {
                     'title': result.title,
                     'authors': [author.name for author in result.authors],
@@ -481,7 +662,7 @@ class EnhancedMultiSourcePaperSearcher:
             return []
     
     def search_papers_multi_source(self, query: str, filters: SearchFilters) -> List[Dict]:
-        """多源搜索论文，增强版"""
+        """多源搜索论文，增强版（ENABLE_SEARCH_FANOUT时并发查询全部来源，否则依次补充）"""
         print(f"🔍 开始多源搜索: {query}")
         
         # 验证查询
@@ -489,12 +670,23 @@ class EnhancedMultiSourcePaperSearcher:
             print("⚠️ 查询为空或无效，跳过...")
             return []
         
+        if ENABLE_SEARCH_FANOUT:
+            try:
+                return self._search_fanout(query, filters)
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                print(f"❌ 多源搜索失败 '{query}': {e}")
+                return []
+        
         all_papers = []
         
         try:
             # 第一级：Google Scholar搜索
             print(f"📊 第一级搜索 - Google Scholar...")
-            scholar_papers = self.search_google_scholar(query, PAPERS_PER_QUERY)
+            # 起始日期下推到各来源的查询参数（增量更新时只取上次运行之后的论文）
+            since = filters.start_date
+            scholar_papers = self._search_source('google_scholar', self.search_google_scholar, query, PAPERS_PER_QUERY, since)
             all_papers.extend(scholar_papers)
             
             # 检查是否需要补充搜索
@@ -502,23 +694,27 @@ class EnhancedMultiSourcePaperSearcher:
                 remaining_needed = PAPERS_PER_QUERY - len(scholar_papers)
                 
                 # 第二级：scholarly备用搜索
+                self._raise_if_cancelled()
                 if self.scholarly_available:
                     print(f"📊 第二级搜索 - scholarly库...")
-                    scholarly_papers = self.search_scholarly_backup(query, remaining_needed)
+                    scholarly_papers = self._search_source('scholarly', self.search_scholarly_backup, query, remaining_needed, since,
+                                                           filters=filters)
                     all_papers.extend(scholarly_papers)
                     remaining_needed -= len(scholarly_papers)
                 
                 # 第三级：DBLP备用搜索
+                self._raise_if_cancelled()
                 if remaining_needed > 0:
                     print(f"📊 第三级搜索 - DBLP...")
-                    dblp_papers = self.search_dblp_backup(query, remaining_needed)
+                    dblp_papers = self._search_source('dblp', self.search_dblp_backup, query, remaining_needed, since)
                     all_papers.extend(dblp_papers)
                     remaining_needed -= len(dblp_papers)
                 
                 # 第四级：arXiv最终备用
+                self._raise_if_cancelled()
                 if remaining_needed > 0:
                     print(f"📊 第四级搜索 - arXiv...")
-                    arxiv_papers = self.search_arxiv_backup(query, remaining_needed)
+                    arxiv_papers = self._search_source('arxiv', self.search_arxiv_backup, query, remaining_needed, since)
                     all_papers.extend(arxiv_papers)
             
             # 应用增强过滤器（包含模糊匹配）
@@ -531,19 +727,90 @@ class EnhancedMultiSourcePaperSearcher:
             print(f"✅ 多源搜索完成，过滤后剩余 {len(filtered_papers)} 篇论文")
             return filtered_papers
             
+        except OperationCancelled:
+            raise
         except Exception as e:
             print(f"❌ 多源搜索失败 '{query}': {e}")
             return []
     
+    def _search_fanout(self, query: str, filters: SearchFilters) -> List[Dict]:
+        """
+        并发查询全部启用的来源，结果按到达顺序过滤合并。
+        过滤后不重复的论文达到PAPERS_PER_QUERY时取消其余来源并返回；
+        超过时间预算的来源被取消，宽限时间内返回的部分结果仍被采用，
+        因此单个查询的耗时不超过最慢的有用来源，而不是各来源耗时之和。
+        """
+        since = filters.start_date  # 起始日期下推到各来源的查询参数
+        results = queue.Queue()
+        tokens: Dict[str, CancellationToken] = {}
+        deadlines: Dict[str, float] = {}
+        start = time.time()
+        for source, method in SEARCH_SOURCES:
+            if source == 'scholarly' and not self.scholarly_available:
+                continue
+            # 每个来源使用运行令牌的子令牌，可单独因超时或已满足目标而取消
+            token = self.cancel_token.child() if self.cancel_token is not None else CancellationToken()
+            bound = self.with_cancel_token(token)
+            tokens[source] = token
+            deadlines[source] = start + SEARCH_SOURCE_TIME_BUDGETS.get(source, 30.0)
+            
+            options = {'filters': filters} if source == 'scholarly' else {}
+            
+            def run(source=source, bound=bound, method=method, options=options):
+                try:
+                    papers = bound._search_source(source, getattr(bound, method), query, PAPERS_PER_QUERY, since, **options)
+                except Exception as e:
+                    print(f"  ⚠️ {source} 搜索出错: {e}")
+                    papers = []
+                results.put((source, papers))
+            
+            threading.Thread(target=run, name=f"search-{source}", daemon=True).start()
+        print(f"📊 并发搜索 {len(tokens)} 个来源: {', '.join(tokens)}")
+        
+        filtered_papers = []
+        seen_titles = set()
+        pending = set(tokens)
+        try:
+            while pending and len(seen_titles) < PAPERS_PER_QUERY:
+                self._raise_if_cancelled()
+                now = time.time()
+                for source in list(pending):
+                    if now < deadlines[source]:
+                        continue
+                    if not tokens[source].cancelled:
+                        # 超过时间预算：取消该来源，给宽限时间返回已取得的部分结果
+                        tokens[source].cancel("超过来源时间预算")
+                        deadlines[source] = now + SEARCH_FANOUT_GRACE_SECONDS
+                    else:
+                        print(f"  ⏱️ {source} 超过时间预算，放弃等待")
+                        pending.discard(source)
+                try:
+                    source, papers = results.get(timeout=CANCEL_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                pending.discard(source)
+                kept = 0
+                for paper in papers:
+                    if self._apply_enhanced_filters(paper, filters):
+                        filtered_papers.append(self._validate_paper_data(paper))
+                        seen_titles.add(self._normalize_title(paper.get('title', '')))
+                        kept += 1
+                print(f"  📥 {source}: {len(papers)} 篇，过滤后保留 {kept} 篇 ({time.time() - start:.1f}秒)")
+        finally:
+            for source in pending:
+                tokens[source].cancel("已达到目标数量")
+        
+        if pending and len(seen_titles) >= PAPERS_PER_QUERY:
+            print(f"  🎯 已达到 {PAPERS_PER_QUERY} 篇，取消仍在进行的来源: {', '.join(sorted(pending))}")
+        print(f"✅ 多源搜索完成，过滤后剩余 {len(filtered_papers)} 篇论文 ({time.time() - start:.1f}秒)")
+        return filtered_papers
+    
     def _apply_enhanced_filters(self, paper: Dict, filters: SearchFilters) -> bool:
         """应用增强过滤条件（包含模糊匹配）"""
         
         # 时间过滤
-        if paper.get('published'):
-            if filters.start_date and paper['published'] < filters.start_date:
-                return False
-            if filters.end_date and paper['published'] > filters.end_date:
-                return False
+        if paper.get('published') and self._outside_date_range(paper, filters):
+            return False
         
         # 引用数过滤
         citations = paper.get('citations', 0)
@@ -552,53 +819,13 @@ class EnhancedMultiSourcePaperSearcher:
         if filters.max_citations is not None and citations > filters.max_citations:
             return False
         
-        # 会议过滤（使用模糊匹配）
-        if filters.conferences:
-            search_text = (paper.get('title', '') + ' ' + 
-                          paper.get('authors_text', '') + ' ' + 
-                          paper.get('venue', '') + ' ' +
-                          ' '.join(paper.get('authors', []))).lower()
-            
-            if filters.fuzzy_matching:
-                # 使用模糊匹配
-                if not self.fuzzy_match_conference(search_text, filters.conferences, 
-                                                 threshold=filters.similarity_threshold):
-                    return False
-            else:
-                # 使用精确匹配
-                found_conference = False
-                for conf in filters.conferences:
-                    if conf in self.conference_mappings:
-                        conf_names = [name.lower() for name in self.conference_mappings[conf]]
-                        if any(name in search_text for name in conf_names):
-                            found_conference = True
-                            break
-                    if conf.lower() in search_text:
-                        found_conference = True
-                        break
-                
-                if not found_conference:
-                    return False
-        
-        # 排除会议（也使用模糊匹配）
-        if filters.exclude_conferences:
-            search_text = (paper.get('title', '') + ' ' + 
-                          paper.get('authors_text', '') + ' ' + 
-                          paper.get('venue', '') + ' ' +
-                          ' '.join(paper.get('authors', []))).lower()
-            
-            for conf in filters.exclude_conferences:
-                if filters.fuzzy_matching:
-                    if self.fuzzy_match_conference(search_text, [conf], 
-                                                 threshold=filters.similarity_threshold):
-                        return False
-                else:
-                    if conf in self.conference_mappings:
-                        conf_names = [name.lower() for name in self.conference_mappings[conf]]
-                        if any(name in search_text for name in conf_names):
-                            return False
-                    if conf.lower() in search_text:
-                        return False
+        # 会议过滤与排除（模糊匹配时别名单词覆盖率达到相似度阈值即可，否则要求完整出现）
+        if filters.conferences or filters.exclude_conferences:
+            venues = self._paper_venues(paper, filters)
+            if filters.conferences and not venues & self.venue_classifier.resolve(filters.conferences):
+                return False
+            if filters.exclude_conferences and venues & self.venue_classifier.resolve(filters.exclude_conferences):
+                return False
         
         # arXiv类别过滤（仅对arXiv论文有效）
         if filters.categories and paper.get('source') == 'arxiv':
@@ -624,6 +851,20 @@ class EnhancedMultiSourcePaperSearcher:
         
         return True
     
+    def _outside_date_range(self, paper: Dict, filters: SearchFilters) -> bool:
+        """发表时间是否在过滤范围之外（只有年份的日期按整年比较，带时区的日期换算为UTC后比较）"""
+        published = paper['published']
+        if published.tzinfo is not None:
+            published = published.astimezone(timezone.utc).replace(tzinfo=None)
+        year_only = re.fullmatch(r'\d{4}', str(paper.get('published_str', ''))) is not None
+        if filters.start_date:
+            if published.year < filters.start_date.year if year_only else published < filters.start_date:
+                return True
+        if filters.end_date:
+            if published.year > filters.end_date.year if year_only else published > filters.end_date:
+                return True
+        return False
+    
     def _validate_paper_data(self, paper: Dict) -> Dict:
         """验证并标准化论文数据"""
         validated_paper = paper.copy()
@@ -665,27 +906,19 @@ class EnhancedMultiSourcePaperSearcher:
         return validated_paper
     
     def search_multiple_queries_enhanced(self, queries: List[str], filters: SearchFilters) -> List[Dict]:
-        """使用增强过滤器和多源搜索"""
+        """使用增强过滤器和多源搜索（最多SEARCH_QUERY_CONCURRENCY个查询并发执行，请求间隔由按主机的令牌桶控制）"""
         all_papers = []
         max_tries = 3
+        valid_queries = [query for query in queries if query and query.strip()]
         
-        while len(all_papers) < 1 and max_tries > 0:
+        while len(all_papers) < 1 and max_tries > 0 and valid_queries:
             max_tries -= 1
             print(f"🔄 开始搜索轮次 {3 - max_tries}")
             
-            for i, query in enumerate(queries):
-                if query and query.strip():
-                    print(f"\n📝 执行查询 {i+1}/{len(queries)}: {query}")
-                    papers = self.search_papers_multi_source(query, filters)
-                    all_papers.extend(papers)
-                    
-                    print(f"  本次查询找到: {len(papers)} 篇论文")
-                    print(f"  累计找到: {len(all_papers)} 篇论文")
-                    
-                    # 查询间延迟
-                    time.sleep(2)
-            
-            time.sleep(3)  # 轮次间延迟
+            for query, papers in zip(valid_queries, self._search_queries_concurrently(valid_queries, filters)):
+                all_papers.extend(papers)
+                print(f"  查询 '{query}' 找到: {len(papers)} 篇论文")
+            print(f"  累计找到: {len(all_papers)} 篇论文")
         
         # 增强去重（使用模糊匹配）
         unique_papers = self._deduplicate_papers_enhanced(all_papers, filters)
@@ -715,6 +948,24 @@ class EnhancedMultiSourcePaperSearcher:
         
         return sorted_papers
     
+    def _search_queries_concurrently(self, queries: List[str], filters: SearchFilters) -> List[List[Dict]]:
+        """并发执行多个查询，结果按查询顺序返回"""
+        def run_query(i, query):
+            # 在查询真正开始执行时输出（并发时不会在全部查询开始前集中打印）
+            print(f"\n📝 执行查询 {i+1}/{len(queries)}: {query}")
+            return self.search_papers_multi_source(query, filters)
+
+        workers = max(1, min(SEARCH_QUERY_CONCURRENCY, len(queries)))
+        if workers == 1:
+            return [run_query(i, query) for i, query in enumerate(queries)]
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search-query")
+        try:
+            futures = [executor.submit(run_query, i, query) for i, query in enumerate(queries)]
+            return [future.result() for future in futures]
+        finally:
+            # 取消或出错时不等待尚未开始的查询
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     def _deduplicate_papers_enhanced(self, papers: List[Dict], filters: SearchFilters) -> List[Dict]:
         """增强的去重算法（使用模糊匹配）"""
         if not papers:
@@ -723,6 +974,13 @@ class EnhancedMultiSourcePaperSearcher:
         unique_papers = []
         seen_titles = set()
         seen_arxiv_ids = set()
+        # 模糊去重使用索引，只与共享足够多单词/字符n-gram的已保留标题比较
+        title_index = None
+        if filters.fuzzy_matching:
+            title_index = TitleDeduplicator.for_titles(
+                [paper.get('title', '') for paper in papers],
+                threshold=filters.similarity_threshold + 10  # 去重时使用更高阈值
+            )
         
         for paper in papers:
             arxiv_id = paper.get('arxiv_id', '')
@@ -735,11 +993,7 @@ class EnhancedMultiSourcePaperSearcher:
             # 检查标题重复（模糊匹配）
             is_duplicate = False
             if title and filters.fuzzy_matching:
-                for seen_title in seen_titles:
-                    if self.fuzzy_match_title(title, seen_title, 
-                                            threshold=filters.similarity_threshold + 10):  # 去重时使用更高阈值
-                        is_duplicate = True
-                        break
+                is_duplicate = title_index.is_duplicate(title)
             else:
                 # 精确匹配
                 title_normalized = self._normalize_title(title)
@@ -750,6 +1004,8 @@ class EnhancedMultiSourcePaperSearcher:
                 unique_papers.append(paper)
                 if title:
                     seen_titles.add(title)
+                    if title_index is not None:
+                        title_index.add(title)
                 if arxiv_id:
                     seen_arxiv_ids.add(arxiv_id)
         
@@ -762,52 +1018,13 @@ class EnhancedMultiSourcePaperSearcher:
         return normalized
     
     def _sort_papers_by_relevance(self, papers: List[Dict], filters: SearchFilters) -> List[Dict]:
-        """按相关性对论文排序"""
-        def relevance_score(paper):
-            score = 0
-            
-            # 引用数权重
-            citations = paper.get('citations', 0)
-            score += min(citations / 100, 10)
-            
-            # 时间权重
-            pub_date = paper.get('published')
-            if pub_date:
-                if hasattr(pub_date, 'replace'):
-                    pub_date = pub_date.replace(tzinfo=None)
-                days_old = (datetime.now() - pub_date).days
-                time_score = max(0, 5 - (days_old / 365))
-                score += time_score
-            
-            # 来源权重（Google Scholar > scholarly > DBLP > arXiv）
-            source_weights = {
-                'google_scholar': 4,
-                'scholarly': 3,
-                'dblp': 2,
-                'arxiv': 1
-            }
-            score += source_weights.get(paper.get('source', 'unknown'), 0)
-            
-            # 会议匹配权重
-            if filters.conferences:
-                search_text = (paper.get('title', '') + ' ' + 
-                              paper.get('authors_text', '') + ' ' +
-                              paper.get('venue', '') + ' ' +
-                              ' '.join(paper.get('authors', []))).lower()
-                
-                if filters.fuzzy_matching:
-                    if self.fuzzy_match_conference(search_text, filters.conferences, 
-                                                 threshold=filters.similarity_threshold):
-                        score += 5
-                else:
-                    for conf in filters.conferences:
-                        if conf.lower() in search_text:
-                            score += 5
-                            break
-            
-            return score
-        
-        return sorted(papers, key=relevance_score, reverse=True)
+        """按相关性对论文排序（引用数、发表时间、来源、会议匹配加权，见paper_ranking）"""
+        venue_match = None
+        if filters.conferences:
+            # 与筛选共用缓存的会议分类结果
+            selected_venues = self.venue_classifier.resolve(filters.conferences)
+            venue_match = lambda paper: bool(self._paper_venues(paper, filters) & selected_venues)
+        return self.ranker.rank(papers, venue_match=venue_match)
     
     def _parse_scholar_result(self, result) -> Optional[Dict]:
         """解析Google Scholar搜索结果（原有方法）"""
@@ -953,11 +1170,6 @@ class EnhancedMultiSourcePaperSearcher:
             print("✅ 使用精确匹配")
         
         # 显示可用会议
-        all_conferences = []
-        for conferences in self.conference_categories.values():
-            all_conferences.extend(conferences)
-        all_conferences = list(set(all_conferences))
-        
         print(f"\n📋 支持的会议 (支持模糊匹配):")
         for category, conferences in self.conference_categories.items():
             print(f"  {category}: {', '.join(conferences[:3])}{'...' if len(conferences) > 100 else ''}")
@@ -968,38 +1180,12 @@ class EnhancedMultiSourcePaperSearcher:
         
         if selected_input:
             selections = [item.strip() for item in selected_input.split(',')]
-            
-            for selection in selections:
-                if selection in self.conference_categories:
-                    category_conferences = self.conference_categories[selection]
-                    selected_conferences.extend(category_conferences)
-                    print(f"✅ 已选择 {selection} 领域的所有会议")
-                elif selection.upper() in [conf.upper() for conf in all_conferences]:
-                    selected_conferences.append(selection.upper())
-                    print(f"✅ 已选择会议: {selection.upper()}")
-                else:
-                    print(f"⚠️ 未找到会议或领域: {selection}")
-            
-            selected_conferences = list(set(selected_conferences))
-            if selected_conferences:
-                print(f"🎯 最终选择的会议: {', '.join(selected_conferences)}")
+            selected_conferences = self._resolve_conference_selections(selections)
         
         # 时间范围
         print(f"\n📅 发表时间筛选:")
         time_preset = input("使用预设时间范围？(1=最近1年, 2=最近2年, 3=最近5年, 留空=不限制): ").strip()
-        start_date = None
-        
-        if time_preset == "1":
-            start_date = datetime.now() - timedelta(days=365)
-            print(f"✅ 使用最近1年")
-        elif time_preset == "2":
-            start_date = datetime.now() - timedelta(days=730)
-            print(f"✅ 使用最近2年")
-        elif time_preset == "3":
-            start_date = datetime.now() - timedelta(days=1825)
-            print(f"✅ 使用最近5年")
-        else:
-            print(f"✅ 不限制时间范围")
+        start_date = self._start_date_from_preset(time_preset)
         
         # 引用数筛选
         print(f"\n📊 引用数筛选:")
@@ -1022,6 +1208,77 @@ class EnhancedMultiSourcePaperSearcher:
             similarity_threshold=similarity_threshold
         )
 
+    def _resolve_conference_selections(self, selections: List[str]) -> List[str]:
+        """把用户选择的会议或领域名称解析为会议列表"""
+        all_conferences = []
+        for conferences in self.conference_categories.values():
+            all_conferences.extend(conferences)
+        all_conferences = list(set(all_conferences))
+        
+        selected_conferences = []
+        for selection in selections:
+            if selection in self.conference_categories:
+                category_conferences = self.conference_categories[selection]
+                selected_conferences.extend(category_conferences)
+                print(f"✅ 已选择 {selection} 领域的所有会议")
+            elif selection.upper() in [conf.upper() for conf in all_conferences]:
+                selected_conferences.append(selection.upper())
+                print(f"✅ 已选择会议: {selection.upper()}")
+            else:
+                print(f"⚠️ 未找到会议或领域: {selection}")
+        
+        selected_conferences = list(set(selected_conferences))
+        if selected_conferences:
+            print(f"🎯 最终选择的会议: {', '.join(selected_conferences)}")
+        return selected_conferences
+    
+    def _start_date_from_preset(self, time_preset: str) -> Optional[datetime]:
+        """预设时间范围（1=最近1年, 2=最近2年, 3=最近5年）转换为开始日期"""
+        preset_days = {"1": 365, "2": 730, "3": 1825}
+        preset_labels = {"1": "最近1年", "2": "最近2年", "3": "最近5年"}
+        time_preset = str(time_preset or "").strip()
+        if time_preset in preset_days:
+            print(f"✅ 使用{preset_labels[time_preset]}")
+            return datetime.now() - timedelta(days=preset_days[time_preset])
+        print(f"✅ 不限制时间范围")
+        return None
+    
+    def build_filters_from_spec(self, spec: Dict) -> SearchFilters:
+        """根据批量任务中的过滤配置构建搜索过滤器（非交互版的get_user_search_preferences）
+        
+        支持的字段: conferences, exclude_conferences, time_preset, start_date, end_date,
+        min_citations, max_citations, categories, fuzzy_matching, similarity_threshold
+        """
+        similarity_threshold = int(spec.get('similarity_threshold', 75))
+        if not 50 <= similarity_threshold <= 100:
+            print(f"⚠️ 阈值 {similarity_threshold} 超出范围，使用默认值75")
+            similarity_threshold = 75
+        
+        conferences = spec.get('conferences') or []
+        if isinstance(conferences, str):
+            conferences = [item.strip() for item in conferences.split(',') if item.strip()]
+        selected_conferences = self._resolve_conference_selections(conferences) if conferences else []
+        
+        start_date = spec.get('start_date')
+        if start_date:
+            start_date = datetime.fromisoformat(start_date)
+        else:
+            start_date = self._start_date_from_preset(spec.get('time_preset'))
+        end_date = datetime.fromisoformat(spec['end_date']) if spec.get('end_date') else None
+        
+        return SearchFilters(
+            start_date=start_date,
+            end_date=end_date,
+            conferences=selected_conferences if selected_conferences else None,
+            exclude_conferences=spec.get('exclude_conferences'),
+            min_citations=int(spec.get('min_citations', 0) or 0),
+            max_citations=spec.get('max_citations'),
+            categories=spec.get('categories'),
+            min_abstract_length=10,
+            fuzzy_matching=bool(spec.get('fuzzy_matching', True)),
+            similarity_threshold=similarity_threshold
+        )
+
 # 兼容性类
 class EnhancedPaperSearcher(EnhancedMultiSourcePaperSearcher):
     """为了向后兼容，保持原有的类名"""
@@ -0,0 +1,197 @@
+"""
+论文状态机与延迟重试队列
+每篇论文依次经过 candidate → acquiring → extracted → analyzing → analyzed，
+临时失败（超时、连接错误、429/5xx）进入 failed_retryable 并放入延迟重试队列按指数退避重试，
+工作线程不在原地等待而是先处理其他论文；重试次数用尽或不可重试的失败进入 failed_final。
+每篇论文的状态历史随结果导出，用于分析时间花在了哪里。
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from cancellation import OperationCancelled, cancellable_sleep
+from config import PAPER_RETRY_MAX_ATTEMPTS, PAPER_RETRY_BASE_DELAY, PAPER_RETRY_MAX_DELAY
+
+# 论文状态
+CANDIDATE = 'candidate'  # 已被本轮接收，等待下载
+ACQUIRING = 'acquiring'  # 正在下载PDF并提取文本
+EXTRACTED = 'extracted'  # 文本已提取（PDF全文或摘要回退）
+ANALYZING = 'analyzing'  # 正在进行AI分析
+ANALYZED = 'analyzed'  # 分析完成
+FAILED_RETRYABLE = 'failed_retryable'  # 临时失败，等待延迟重试
+FAILED_FINAL = 'failed_final'  # 不可重试或重试次数用尽
+
+# 各工作阶段成功后进入的状态
+SUCCESS_STATES = {ACQUIRING: EXTRACTED, ANALYZING: ANALYZED}
+TERMINAL_STATES = (ANALYZED, FAILED_FINAL)
+
+
+class RetryableError(Exception):
+    """可稍后重试的临时失败，retry_after为服务端建议的等待秒数（可选）"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """第attempt次失败后的等待时间（指数退避加随机抖动，不小于服务端建议值）"""
+    delay = min(PAPER_RETRY_MAX_DELAY, PAPER_RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    delay *= random.uniform(0.8, 1.2)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class RetryQueue:
+    """按到期时间排序的延迟重试队列（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._counter = itertools.count()  # 到期时间相同时保持先进先出
+
+    def schedule(self, item, attempt: int, retry_after: Optional[float] = None) -> float:
+        """安排item在退避时间后重试，返回等待秒数"""
+        delay = retry_delay(attempt, retry_after)
+        with self._lock:
+            heapq.heappush(self._heap, (time.time() + delay, next(self._counter), item))
+        return delay
+
+    def pop_ready(self):
+        """取出一个已到期的项，没有时返回None"""
+        with self._lock:
+            if self._heap and self._heap[0][0] <= time.time():
+                return heapq.heappop(self._heap)[2]
+        return None
+
+    def wait_time(self) -> Optional[float]:
+        """距最早一项到期的秒数，队列为空时返回None"""
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.time())
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+
+class PaperStateTracker:
+    """记录每篇论文的状态转换历史（线程安全，按标题区分论文）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.time()
+        self._history: Dict[str, List[Dict]] = {}
+
+    @staticmethod
+    def _key(paper) -> str:
+        return paper if isinstance(paper, str) else paper.get('title', 'Unknown')
+
+    def transition(self, paper, state: str, detail: Optional[str] = None):
+        """记录论文进入新状态"""
+        entry = {'state': state, 'at': round(time.time() - self._start, 3)}
+        if detail:
+            entry['detail'] = detail
+        with self._lock:
+            self._history.setdefault(self._key(paper), []).append(entry)
+
+    def state(self, paper) -> Optional[str]:
+        with self._lock:
+            history = self._history.get(self._key(paper))
+            return history[-1]['state'] if history else None
+
+    def attempts(self, paper, stage: str) -> int:
+        """论文进入某个工作阶段（acquiring/analyzing）的次数"""
+        with self._lock:
+            return sum(1 for entry in self._history.get(self._key(paper), []) if entry['state'] == stage)
+
+    def export(self) -> Dict:
+        """导出每篇论文的状态历史、各状态停留时间与汇总统计"""
+        now = round(time.time() - self._start, 3)
+        with self._lock:
+            history = {title: list(entries) for title, entries in self._history.items()}
+        papers = []
+        final_states: Dict[str, int] = {}
+        total_seconds: Dict[str, float] = {}
+        retries = 0
+        for title, entries in history.items():
+            seconds_in_state: Dict[str, float] = {}
+            for entry, following in zip(entries, entries[1:] + [None]):
+                if following is None and entry['state'] in TERMINAL_STATES:
+                    break
+                # 仍停留在非终态（如已提取但未被选中分析）时计到导出时刻
+                end = following['at'] if following else now
+                seconds_in_state[entry['state']] = round(seconds_in_state.get(entry['state'], 0.0) + end - entry['at'], 3)
+            state = entries[-1]['state']
+            final_states[state] = final_states.get(state, 0) + 1
+            for name, seconds in seconds_in_state.items():
+                total_seconds[name] = round(total_seconds.get(name, 0.0) + seconds, 3)
+            retries += sum(1 for entry in entries if entry['state'] == FAILED_RETRYABLE)
+            papers.append({'title': title, 'state': state, 'history': entries, 'seconds_in_state': seconds_in_state})
+        return {
+            'summary': {'papers': len(papers), 'final_states': final_states, 'retries': retries,
+                        'seconds_in_state': total_seconds},
+            'papers': papers
+        }
+
+
+def run_with_retries(items: Iterable, handle: Callable, state_tracker: PaperStateTracker, stage: str,
+                     cancel_token=None, admission_open: Optional[Callable[[], bool]] = None,
+                     max_attempts: int = PAPER_RETRY_MAX_ATTEMPTS) -> List:
+    """
+    串行处理一批论文：handle(paper, final_attempt) 返回结果（None表示失败），
+    抛出RetryableError时论文进入延迟重试队列，先处理其他论文，没有可处理的论文时才等待重试到期。
+    最后一次尝试时final_attempt为True，handle应在线程内重试或降级而不再抛出RetryableError。
+    取消或admission_open()返回False时停止，返回已完成的结果。
+    """
+    pending = deque(items)
+    retries = RetryQueue()
+    results = []
+    try:
+        while pending or len(retries):
+            if cancel_token is not None and cancel_token.cancelled:
+                break
+            if admission_open is not None and not admission_open():
+                break
+            paper = retries.pop_ready()
+            if paper is None and pending:
+                paper = pending.popleft()
+            if paper is None:
+                cancellable_sleep(retries.wait_time(), cancel_token)
+                continue
+
+            attempt = state_tracker.attempts(paper, stage) + 1
+            state_tracker.transition(paper, stage)
+            try:
+                result = handle(paper, attempt >= max_attempts)
+            except RetryableError as e:
+                if attempt >= max_attempts:
+                    state_tracker.transition(paper, FAILED_FINAL, str(e))
+                else:
+                    delay = retries.schedule(paper, attempt, e.retry_after)
+                    state_tracker.transition(paper, FAILED_RETRYABLE, f"{e} ({delay:.0f}秒后重试)")
+                continue
+            except OperationCancelled:
+                raise
+            except Exception as e:
+                state_tracker.transition(paper, FAILED_FINAL, str(e))
+                continue
+            if result:
+                state_tracker.transition(paper, SUCCESS_STATES[stage])
+                results.append(result)
+            else:
+                state_tracker.transition(paper, FAILED_FINAL)
+    except OperationCancelled:
+        pass
+    return results
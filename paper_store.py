@@ -0,0 +1,167 @@
+"""
+内存受限的论文全文存储
+提取出的论文全文只保存一份，热点全文留在内存中，总量超过内存预算时把最久未使用的全文溢出到磁盘。
+论文记录中的text_chunks替换为按需加载的LazyTextChunks句柄，分析时才读取对应的文本块，
+使上千篇论文的调研在内存有限的机器上也能运行。
+"""
+
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config import PAPER_STORE_RAM_BUDGET_MB, PAPER_STORE_SPILL_DIR
+
+
+def _chunk_spans(text: str, chunks: List[str]) -> List[Tuple[int, int]]:
+    """计算每个文本块在全文中的位置（块是全文的去空白切片），用于只保存一份全文"""
+    spans = []
+    position = 0
+    for chunk in chunks:
+        start = text.find(chunk, position)
+        if start < 0:
+            return []
+        spans.append((start, start + len(chunk)))
+        position = start + len(chunk)
+    return spans
+
+
+class LazyTextChunks(Sequence):
+    """论文文本块的只读句柄，按索引访问时才从存储中加载全文"""
+
+    def __init__(self, store: 'PaperTextStore', key: int, spans: List[Tuple[int, int]], text_length: int):
+        self._store = store
+        self._key = key
+        self._spans = spans
+        self.text_length = text_length
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        start, end = self._spans[index]
+        return self._store.load(self._key)[start:end]
+
+    def text(self) -> str:
+        """完整的提取文本"""
+        return self._store.load(self._key)
+
+    def __repr__(self) -> str:
+        return f"LazyTextChunks(chunks={len(self)}, text_length={self.text_length})"
+
+
+def paper_text(paper: Dict) -> str:
+    """论文的提取全文（兼容普通字符串字段与懒加载句柄）"""
+    text = paper.get('extracted_text')
+    if text:
+        return text
+    chunks = paper.get('text_chunks')
+    if isinstance(chunks, LazyTextChunks):
+        return chunks.text()
+    return ''
+
+
+def text_with_spans(paper: Dict) -> Tuple[str, List[Tuple[int, int]]]:
+    """论文的提取全文及各文本块在全文中的位置（文本块不是全文的切片时位置为空列表）"""
+    chunks = paper.get('text_chunks')
+    if isinstance(chunks, LazyTextChunks):
+        return chunks.text(), list(chunks._spans)
+    text = paper.get('extracted_text') or ''
+    if not text:
+        return '', []
+    return text, _chunk_spans(text, chunks or [text])
+
+
+def materialize_texts(papers: List[Dict]) -> List[Dict]:
+    """把懒加载句柄还原为普通的全文与文本块列表（用于写入检查点等需要序列化的场景）"""
+    materialized = []
+    for paper in papers:
+        chunks = paper.get('text_chunks')
+        if isinstance(chunks, LazyTextChunks):
+            paper = dict(paper, extracted_text=chunks.text(), text_chunks=list(chunks))
+        materialized.append(paper)
+    return materialized
+
+
+class PaperTextStore:
+    """按内存预算保存论文全文的LRU存储（线程安全），超出预算的全文溢出到临时目录"""
+
+    def __init__(self, ram_budget_mb: float = PAPER_STORE_RAM_BUDGET_MB, spill_dir: str = PAPER_STORE_SPILL_DIR):
+        self.ram_budget_bytes = int(ram_budget_mb * 1024 * 1024)
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        self.spill_dir = Path(tempfile.mkdtemp(prefix="store_", dir=spill_dir))
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.spill_dir), True)
+        self._lock = threading.Lock()
+        self._hot: 'OrderedDict[int, str]' = OrderedDict()  # 键 -> 全文（按最近使用排序）
+        self._spilled = set()
+        self._next_key = 0
+        self.hot_bytes = 0
+        self.spills = 0
+        self.loads = 0
+
+    def put(self, paper: Dict) -> Dict:
+        """把论文的extracted_text/text_chunks移入存储，论文中只保留懒加载句柄"""
+        text = paper.get('extracted_text')
+        if not text:
+            return paper
+        chunks = paper.get('text_chunks') or [text]
+        spans = _chunk_spans(text, chunks)
+        if not spans:
+            return paper  # 文本块不是全文的切片时保持原样
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._admit(key, text)
+        paper['text_chunks'] = LazyTextChunks(self, key, spans, len(text))
+        paper['extracted_text'] = None
+        return paper
+
+    def load(self, key: int) -> str:
+        """读取全文，已溢出到磁盘的全文重新载入内存"""
+        with self._lock:
+            text = self._hot.get(key)
+            if text is not None:
+                self._hot.move_to_end(key)
+                return text
+            with open(self._spill_path(key), 'r', encoding='utf-8') as f:
+                text = f.read()
+            self.loads += 1
+            self._admit(key, text)
+            return text
+
+    def _admit(self, key: int, text: str):
+        self._hot[key] = text
+        self.hot_bytes += sys.getsizeof(text)
+        # 至少保留刚放入的全文，其余按最久未使用依次溢出
+        while self.hot_bytes > self.ram_budget_bytes and len(self._hot) > 1:
+            cold_key, cold_text = self._hot.popitem(last=False)
+            self.hot_bytes -= sys.getsizeof(cold_text)
+            if cold_key not in self._spilled:
+                with open(self._spill_path(cold_key), 'w', encoding='utf-8') as f:
+                    f.write(cold_text)
+                self._spilled.add(cold_key)
+                self.spills += 1
+
+    def _spill_path(self, key: int) -> Path:
+        return self.spill_dir / f"{key}.txt"
+
+    def close(self):
+        """删除溢出文件（之后句柄不可再加载已溢出的全文）"""
+        self._finalizer()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'papers': self._next_key,
+                'in_memory': len(self._hot),
+                'in_memory_mb': round(self.hot_bytes / (1024 * 1024), 1),
+                'spilled_to_disk': len(self._spilled),
+                'disk_loads': self.loads,
+            }
@@ -1,30 +1,44 @@
+import copy
 import requests
 import fitz  # PyMuPDF
 from pathlib import Path
 from typing import Optional, Dict, List, Set
-import time
 import re
+import threading
+import time
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import arxiv
 import random
 
+from cancellation import OperationCancelled, cancellable_sleep, cancellable_call
+from paper_store import PaperTextStore, paper_text
+from paper_state import RetryableError
+from research_cache import ResearchCache
+from load_shedding import STAGE_DOWNLOAD, SKIP_FALLBACK, ABSTRACT_ONLY
 from config import (
     DOWNLOAD_DIR, 
     EXTRACT_FULL_PDF, 
     MAX_PAGES_TO_EXTRACT, 
     MAX_INPUT_TOKENS,
     MAX_TEXT_LENGTH,
-    PDF_CHUNK_SIZE
+    PDF_CHUNK_SIZE,
+    ENABLE_PAPER_STORE,
+    ENABLE_RESEARCH_CACHE
 )
 
+class RetryablePaperError(RetryableError):
+    """PDF因临时网络故障（超时、连接错误、429/5xx）未能下载，稍后重试可能成功"""
+
+
 class EnhancedPDFProcessor:
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None, text_cache=None,
+                 paper_store: Optional[PaperTextStore] = None, research_cache: Optional[ResearchCache] = None):
         self.download_dir = Path(DOWNLOAD_DIR)
         self.download_dir.mkdir(exist_ok=True)
         
-        # 🔧 增强的请求会话配置，更好地模拟真实浏览器
-        self.session = requests.Session()
+        # 🔧 增强的请求会话配置，更好地模拟真实浏览器（批量模式下多个主题共享同一会话）
+        self.session = session or requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -53,43 +67,193 @@ class EnhancedPDFProcessor:
             'nature.com': self._handle_nature_pdf,
         }
         
-        # 🆕 添加下载状态跟踪，防止无限循环
-        self._attempted_urls: Set[str] = set()
+        # 🆕 添加下载状态跟踪，防止无限循环（按线程隔离，支持并发处理多篇论文）
+        self._local = threading.local()
         self._max_recursion_depth = 3
         
+        # 共享的提取文本缓存（可选），同一篇论文只下载、提取一次
+        self.text_cache = text_cache
+        
+        # 论文全文存储（可选），超出内存预算的全文溢出到磁盘，论文中只保留按需加载的文本块句柄
+        if paper_store is None and ENABLE_PAPER_STORE:
+            paper_store = PaperTextStore()
+        self.paper_store = paper_store
+        
+        # 跨运行的持久化研究缓存（可选），历次运行已提取过全文的论文不再下载
+        if research_cache is None and ENABLE_RESEARCH_CACHE:
+            research_cache = ResearchCache()
+        self.research_cache = research_cache
+        
+        # 自动降载（通过with_load_shedder绑定），记录每次HTTP请求的延迟与成败，网络恶化时逐篇降级
+        self.load_shedder = None
+        
+        # 取消令牌（通过with_cancel_token绑定），触发后下载在下一个数据块处中止
+        self.cancel_token = None
+        
+        # 下载提取统计（绑定取消令牌的副本共享同一统计，供运行估算使用）
+        self.stats_lock = threading.Lock()
+        self.process_stats = {'papers': 0, 'pdf_extracted': 0, 'abstract_fallback': 0, 'seconds': 0.0, 'chunks': 0}
+        self.request_counts: Dict[str, int] = {}
+        
         print(f"🔧 Enhanced PDF Processor 初始化完成")
         print(f"   - 支持 {len(self.pdf_handlers)} 种专门的PDF处理器")
         print(f"   - 增强的浏览器模拟")
         print(f"   - 多重备用下载机制")
         print(f"   - 🆕 添加循环保护和链接验证")
     
-    def process_paper(self, paper: Dict, download_dir: str) -> Optional[Dict]:
+    @property
+    def _attempted_urls(self) -> Set[str]:
+        """当前线程已尝试过的URL集合"""
+        if not hasattr(self._local, 'attempted_urls'):
+            self._local.attempted_urls = set()
+        return self._local.attempted_urls
+    
+    @property
+    def _transient_failures(self) -> List[str]:
+        """当前线程处理的论文遇到的临时下载失败"""
+        if not hasattr(self._local, 'transient_failures'):
+            self._local.transient_failures = []
+        return self._local.transient_failures
+    
+    def _note_failure(self, error: Exception):
+        """记录临时下载失败（超时、连接错误、429/5xx），用于决定论文是否进入延迟重试队列"""
+        if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+            self._transient_failures.append(f"{type(error).__name__}: {error}")
+        elif isinstance(error, requests.HTTPError) and error.response is not None:
+            status = error.response.status_code
+            if status == 429 or status >= 500:
+                self._transient_failures.append(f"HTTP {status}")
+    
+    def with_cancel_token(self, token) -> 'EnhancedPDFProcessor':
+        """返回绑定取消令牌的处理器副本（共享会话、线程状态与文本缓存）"""
+        bound = copy.copy(self)
+        bound.cancel_token = token
+        return bound
+    
+    def with_load_shedder(self, load_shedder) -> 'EnhancedPDFProcessor':
+        """返回绑定自动降载统计的处理器副本"""
+        bound = copy.copy(self)
+        bound.load_shedder = load_shedder
+        return bound
+    
+    def _raise_if_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+    
+    def _sleep(self, seconds: float):
+        """可被取消令牌打断的延迟"""
+        cancellable_sleep(seconds, self.cancel_token)
+    
+    def _get(self, url: str, session: Optional[requests.Session] = None, **kwargs):
+        """可被取消令牌打断的GET请求"""
+        host = urlparse(url).netloc
+        with self.stats_lock:
+            self.request_counts[host] = self.request_counts.get(host, 0) + 1
+        if self.load_shedder is None:
+            return cancellable_call(self.cancel_token, (session or self.session).get, url, **kwargs)
+        
+        start = time.time()
+        try:
+            response = cancellable_call(self.cancel_token, (session or self.session).get, url, **kwargs)
+        except (requests.Timeout, requests.ConnectionError):
+            self.load_shedder.record(STAGE_DOWNLOAD, time.time() - start, False)
+            raise
+        self.load_shedder.record(STAGE_DOWNLOAD, time.time() - start,
+                                 response.status_code != 429 and response.status_code < 500)
+        return response
+    
+    def _record_processing(self, paper: Optional[Dict], seconds: float, pdf_extracted: bool):
+        with self.stats_lock:
+            self.process_stats['papers'] += 1
+            self.process_stats['seconds'] += seconds
+            if pdf_extracted:
+                self.process_stats['pdf_extracted'] += 1
+            elif paper:
+                self.process_stats['abstract_fallback'] += 1
+            if paper:
+                self.process_stats['chunks'] += len(paper.get('text_chunks') or [])
+    
+    def get_process_stats(self) -> Dict:
+        """实际下载提取的论文数、PDF成功/摘要回退数、累计耗时、文本块数与按域名统计的HTTP请求数"""
+        with self.stats_lock:
+            return dict(self.process_stats, requests_by_host=dict(self.request_counts))
+    
+    def _save_stream(self, response, file_path: Path):
+        """分块写入下载内容，取消时删除不完整的文件并抛出OperationCancelled"""
+        try:
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    self._raise_if_cancelled()
+                    if chunk:
+                        f.write(chunk)
+        except OperationCancelled:
+            response.close()
+            file_path.unlink(missing_ok=True)
+            raise
+    
+    def process_paper(self, paper: Dict, download_dir: str, abstract_only: bool = False,
+                      skip_fallback: bool = False, defer_retries: bool = False) -> Optional[Dict]:
         """
         处理单篇论文：下载+提取 (增强版)
+        
+        预算模式下可降级: abstract_only 不下载PDF直接使用摘要，skip_fallback 跳过耗时的备用PDF获取策略
+        defer_retries 为True时，PDF因临时网络故障下载失败会抛出RetryablePaperError（交给调用方的重试队列），
+        而不是立即退回摘要
+        绑定自动降载时，网络恶化期间逐篇启用 skip_fallback / abstract_only
         """
+        if self.load_shedder is not None:
+            abstract_only = abstract_only or self.load_shedder.active(ABSTRACT_ONLY)
+            skip_fallback = skip_fallback or self.load_shedder.active(SKIP_FALLBACK)
+        if abstract_only:
+            return self._use_abstract_fallback(paper)
+        if self.text_cache is not None:
+            if skip_fallback:
+                # 降级结果不写入共享缓存，避免其他主题拿到不完整的文本
+                cached = self.text_cache.lookup(paper)
+                if cached is not None:
+                    return cached
+                return self._process_paper_uncached(paper, download_dir, skip_fallback=True, defer_retries=defer_retries)
+            return self.text_cache.get_or_process(
+                paper, lambda: self._process_paper_uncached(paper, download_dir, defer_retries=defer_retries)
+            )
+        return self._process_paper_uncached(paper, download_dir, skip_fallback, defer_retries)
+    
+    def _process_paper_uncached(self, paper: Dict, download_dir: str, skip_fallback: bool = False,
+                                defer_retries: bool = False) -> Optional[Dict]:
+        """下载并提取论文文本，不经过进程内的共享缓存（仍先查询持久化研究缓存）"""
         title = paper.get('title', 'Unknown')
         print(f"🔍 正在处理论文: {title}")
+        start = time.time()
         
         # 🆕 重置下载状态跟踪（每篇论文重新开始）
         self._attempted_urls.clear()
+        self._transient_failures.clear()
+        
+        if self.research_cache is not None:
+            # 先用缓存的元数据补全缺失字段（摘要、PDF链接等），再查询历次运行提取过的全文
+            self.research_cache.enrich(paper)
+            cached = self.research_cache.lookup_text(paper)
+            if cached is not None:
+                print(f"♻️ 使用研究缓存中的全文: {title}")
+                if cached['local_path']:
+                    paper['local_path'] = cached['local_path']
+                return self._set_paper_text(paper, cached['extracted_text'])
         
-        # 🎯 多重PDF获取策略
-        pdf_path = self._get_pdf_with_enhanced_strategies(paper, download_dir)
+        # 🎯 多重PDF获取策略（取消时直接抛出，不再退回摘要）
+        pdf_path = self._get_pdf_with_enhanced_strategies(paper, download_dir, skip_fallback)
+        self._raise_if_cancelled()
+        
+        if not pdf_path and defer_retries and self._transient_failures:
+            # 临时故障导致下载失败：稍后重试，而不是现在就退回摘要
+            raise RetryablePaperError(f"PDF下载临时失败 ({self._transient_failures[-1]})")
         
         if pdf_path:
             text = self.extract_text(pdf_path)
             if text:
                 paper['local_path'] = str(pdf_path)
-                paper['extracted_text'] = text
-                paper['text_length'] = len(text)
-                
-                if len(text) > PDF_CHUNK_SIZE:
-                    paper['text_chunks'] = self.split_text_into_chunks(text)
-                    print(f"📚 论文处理完成，分为 {len(paper['text_chunks'])} 个文本块")
-                else:
-                    paper['text_chunks'] = [text]
-                    print(f"📚 论文处理完成，单个文本块")
-                
+                if self.research_cache is not None:
+                    self.research_cache.put_text(paper, text)
+                self._set_paper_text(paper, text, record_seconds=time.time() - start)
                 return paper
             else:
                 print("❌ 文本提取失败")
@@ -97,6 +261,30 @@ class EnhancedPDFProcessor:
             print("❌ PDF下载失败")
         
         # Fallback：使用摘要
+        result = self._use_abstract_fallback(paper)
+        self._record_processing(result, time.time() - start, pdf_extracted=False)
+        return result
+    
+    def _set_paper_text(self, paper: Dict, text: str, record_seconds: Optional[float] = None) -> Dict:
+        """把提取的全文及其文本块写入paper（record_seconds不为None时计入处理统计）"""
+        paper['extracted_text'] = text
+        paper['text_length'] = len(text)
+        
+        if len(text) > PDF_CHUNK_SIZE:
+            paper['text_chunks'] = self.split_text_into_chunks(text)
+            print(f"📚 论文处理完成，分为 {len(paper['text_chunks'])} 个文本块")
+        else:
+            paper['text_chunks'] = [text]
+            print(f"📚 论文处理完成，单个文本块")
+        
+        if record_seconds is not None:
+            self._record_processing(paper, record_seconds, pdf_extracted=True)
+        if self.paper_store is not None:
+            self.paper_store.put(paper)
+        return paper
+    
+    def _use_abstract_fallback(self, paper: Dict) -> Optional[Dict]:
+        """使用摘要作为论文文本，没有摘要时返回None"""
         if paper.get('abstract'):
             print("📝 使用摘要作为fallback")
             paper['extracted_text'] = paper['abstract']
@@ -156,8 +344,8 @@ class EnhancedPDFProcessor:
         except:
             return url
     
-    def _get_pdf_with_enhanced_strategies(self, paper: Dict, download_dir: str) -> Optional[Path]:
-        """增强的PDF获取策略"""
+    def _get_pdf_with_enhanced_strategies(self, paper: Dict, download_dir: str, skip_fallback: bool = False) -> Optional[Path]:
+        """增强的PDF获取策略，skip_fallback时只尝试论文自带的PDF链接"""
         title = paper.get('title', 'Unknown')
         safe_title = self._generate_safe_filename(title)
         
@@ -174,6 +362,7 @@ class EnhancedPDFProcessor:
         
         # 策略2: 按优先级尝试下载
         for i, link in enumerate(prioritized_links):
+            self._raise_if_cancelled()
             print(f"    尝试链接 {i+1}/{len(prioritized_links)}: {self._truncate_url_for_display(link)}")
             
             # 🆕 检查链接有效性
@@ -201,9 +390,14 @@ class EnhancedPDFProcessor:
                 return pdf_path
             
             # 添加延迟避免被限制
-            time.sleep(random.uniform(1, 2))
+            self._sleep(random.uniform(1, 2))
+        
+        if skip_fallback:
+            print(f"  ⏱️ 预算模式: 跳过备用PDF获取策略")
+            return None
         
         # 策略3: 如果有Google Scholar页面，尝试深度解析
+        self._raise_if_cancelled()
         if paper.get('source') == 'google_scholar' and paper.get('paper_url'):
             print(f"  🔍 策略3: 深度解析Google Scholar页面")
             pdf_path = self._deep_parse_scholar_page(paper['paper_url'], safe_title, download_dir)
@@ -211,6 +405,7 @@ class EnhancedPDFProcessor:
                 return pdf_path
         
         # 策略4: 智能搜索备用源
+        self._raise_if_cancelled()
         print(f"  🔍 策略4: 智能搜索备用PDF源")
         pdf_path = self._intelligent_search_fallback(title, safe_title, download_dir)
         if pdf_path:
@@ -445,16 +640,13 @@ class EnhancedPDFProcessor:
             
             print(f"        📥 使用特殊请求头下载...")
             
-            response = special_session.get(url, timeout=30, stream=True)
+            response = self._get(url, session=special_session, timeout=30, stream=True)
             response.raise_for_status()
             
             content_type = response.headers.get('content-type', '').lower()
             
             if 'application/pdf' in content_type:
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
+                self._save_stream(response, file_path)
                 
                 file_size = file_path.stat().st_size
                 if file_size > 1024:
@@ -468,6 +660,7 @@ class EnhancedPDFProcessor:
                 return None
             
         except Exception as e:
+            self._note_failure(e)
             print(f"        ❌ 特殊下载失败: {e}")
             return None
     
@@ -507,19 +700,16 @@ class EnhancedPDFProcessor:
             print(f"        📥 下载中... (深度: {recursion_depth})")
             
             # 增加随机延迟
-            time.sleep(random.uniform(0.5, 1.5))
+            self._sleep(random.uniform(0.5, 1.5))
             
-            response = self.session.get(url, timeout=30, stream=True)
+            response = self._get(url, timeout=30, stream=True)
             response.raise_for_status()
             
             content_type = response.headers.get('content-type', '').lower()
             
             if 'application/pdf' in content_type:
                 # 直接是PDF
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
+                self._save_stream(response, file_path)
                 
                 file_size = file_path.stat().st_size
                 if file_size > 1024:
@@ -547,11 +737,12 @@ class EnhancedPDFProcessor:
                         return pdf_path
                     
                     # 🆕 添加延迟避免过快请求
-                    time.sleep(0.5)
+                    self._sleep(0.5)
             
             return None
             
         except Exception as e:
+            self._note_failure(e)
             print(f"        ❌ 下载失败: {e}")
             return None
     
@@ -641,9 +832,9 @@ class EnhancedPDFProcessor:
             self._attempted_urls.add(normalized_url)
             
             # 增加随机延迟
-            time.sleep(random.uniform(2, 4))
+            self._sleep(random.uniform(2, 4))
             
-            response = self.session.get(scholar_url, timeout=15)
+            response = self._get(scholar_url, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -687,7 +878,7 @@ class EnhancedPDFProcessor:
                 pdf_path = self._download_from_url_enhanced(pdf_link, filename, download_dir, recursion_depth=1)
                 if pdf_path:
                     return pdf_path
-                time.sleep(1)
+                self._sleep(1)
             
             return None
             
@@ -748,11 +939,13 @@ class EnhancedPDFProcessor:
             return pdf_path
         
         # 策略2: scholarly库搜索
+        self._raise_if_cancelled()
         pdf_path = self._search_scholarly_for_pdf(search_query, title, filename, download_dir)
         if pdf_path:
             return pdf_path
         
         # 策略3: DBLP搜索（通过DOI链接）
+        self._raise_if_cancelled()
         pdf_path = self._search_dblp_for_pdf(search_query, title, filename, download_dir)
         if pdf_path:
             return pdf_path
@@ -851,7 +1044,7 @@ class EnhancedPDFProcessor:
                     continue
                 
                 # 添加延迟避免被限制
-                time.sleep(0.5)
+                self._sleep(0.5)
             
             print(f"      ❌ scholarly中未找到匹配论文")
             return None
@@ -875,7 +1068,7 @@ class EnhancedPDFProcessor:
                 'h': 10
             }
             
-            response = self.session.get(dblp_url, params=params, timeout=15)
+            response = self._get(dblp_url, params=params, timeout=15)
             response.raise_for_status()
             
             root = ET.fromstring(response.content)
@@ -1040,7 +1233,7 @@ class EnhancedPDFProcessor:
     
     def get_text_summary(self, paper: Dict, max_chars: int = 2000) -> str:
         """获取论文文本的摘要版本，用于快速预览"""
-        full_text = paper.get('extracted_text', '')
+        full_text = paper_text(paper)
         
         if len(full_text) <= max_chars:
             return full_text
@@ -0,0 +1,84 @@
+"""
+渐进式分析
+每轮先基于摘要快速分析全部候选论文并生成临时研究总结，让分析人员在PDF下载前就能看到结果；
+随后下载提取全文得到的完整分析逐篇替换对应的摘要分析。到达截止时间或被取消时，
+充分性评估与最终报告基于当时已有的全文/摘要混合分析进行。
+"""
+
+from typing import Dict, List, Tuple
+
+from cancellation import OperationCancelled
+from config import MAX_ANALYSIS_PAPERS
+
+# 分析记录的analysis_level取值
+LEVEL_ABSTRACT = 'abstract'    # 仅基于摘要的临时分析
+LEVEL_FULL_TEXT = 'full_text'  # 基于下载提取文本的完整分析
+
+
+def merge_provisional_analyses(analyses: List[Dict], provisional: List[Dict]) -> List[Dict]:
+    """用完整分析替换同一论文的摘要分析，尚未升级的论文保留摘要分析"""
+    if not provisional:
+        return analyses
+    merged = [dict(analysis, analysis_level=analysis.get('analysis_level', LEVEL_FULL_TEXT)) for analysis in analyses]
+    upgraded = {analysis['paper'] for analysis in analyses}
+    merged.extend(analysis for analysis in provisional if analysis['paper'] not in upgraded)
+    return merged
+
+
+def count_levels(analyses: List[Dict]) -> Dict[str, int]:
+    """统计摘要分析与全文分析的数量"""
+    abstract_only = sum(1 for analysis in analyses if analysis.get('analysis_level') == LEVEL_ABSTRACT)
+    return {LEVEL_FULL_TEXT: len(analyses) - abstract_only, LEVEL_ABSTRACT: abstract_only}
+
+
+class ProgressiveAnalyzer:
+    """每轮的摘要快速分析与临时总结"""
+
+    def __init__(self, ai_client, research_topic: str, max_papers: int = MAX_ANALYSIS_PAPERS):
+        self.ai_client = ai_client
+        self.research_topic = research_topic
+        self.max_papers = max_papers
+
+    def provisional_pass(self, papers: List[Dict], prior_analyses: List[Dict],
+                         round_num: int) -> Tuple[List[Dict], str]:
+        """基于摘要并发分析候选论文并生成临时总结，返回(摘要分析, 临时总结)"""
+        candidates = [paper for paper in papers if paper.get('abstract')][:self.max_papers]
+        if not candidates:
+            return [], ""
+
+        print(f"\n⚡ 第{round_num}轮摘要快速分析: {len(candidates)} 篇候选论文（全文分析完成后逐篇替换）")
+        by_title = {paper['title']: paper for paper in candidates}
+        # 不带文本块时analyze_paper_text只基于摘要分析
+        abstract_papers = [dict(paper, text_chunks=[], text_length=0) for paper in candidates]
+        results = self.ai_client.analyze_papers_concurrently(abstract_papers)
+
+        provisional = []
+        for result in results:
+            paper = by_title.get(result['paper'], {})
+            provisional.append({
+                'paper': result['paper'],
+                'paper_id': paper.get('arxiv_id', ''),
+                'analysis': result['analysis'],
+                'text_length': 0,
+                'citations': paper.get('citations', 0),
+                'source': paper.get('source', 'unknown'),
+                'analysis_level': LEVEL_ABSTRACT
+            })
+
+        summary = self.provisional_summary(prior_analyses + provisional, round_num)
+        return provisional, summary
+
+    def provisional_summary(self, analyses: List[Dict], round_num: int) -> str:
+        """基于当前可用分析生成临时研究总结，失败时返回空字符串"""
+        if not analyses:
+            return ""
+        print(f"📝 正在生成第{round_num}轮临时研究总结 (基于{len(analyses)}篇分析)...")
+        try:
+            summary = self.ai_client.analyze_multiple_papers_summary(analyses, self.research_topic, depth_round=round_num)
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            print(f"⚠️ 临时研究总结生成失败: {e}")
+            return ""
+        print(f"✅ 第{round_num}轮临时研究总结已生成 ({len(summary):,} 字符)")
+        return summary
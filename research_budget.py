@@ -0,0 +1,180 @@
+"""
+截止时间与token预算
+在给定的时间和/或token预算内完成研究：每轮开始前按剩余预算和实测的单篇论文开销
+规划本轮的论文数量与降级策略（跳过备用PDF策略、只分析摘要、提前结束搜索），
+并始终为最终研究总结预留预算。
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    MAX_PAPERS_PER_DEPTH,
+    SEARCH_DEPTH,
+    BUDGET_FINAL_SUMMARY_RESERVE_SECONDS,
+    BUDGET_FINAL_SUMMARY_RESERVE_TOKENS,
+    BUDGET_DEFAULT_SECONDS_PER_PAPER,
+    BUDGET_DEFAULT_TOKENS_PER_PAPER,
+    BUDGET_SKIP_FALLBACK_BELOW,
+    BUDGET_ABSTRACT_ONLY_BELOW,
+    BUDGET_ROUND_PROCESSING_SHARE,
+)
+
+
+class ResearchBudget:
+    """一次研究运行的时间与token预算（token用量取自DeepSeekClient的累计统计）"""
+
+    def __init__(self, ai_client, deadline_minutes: Optional[float] = None, token_budget: Optional[int] = None,
+                 reserve_seconds: float = BUDGET_FINAL_SUMMARY_RESERVE_SECONDS,
+                 reserve_tokens: int = BUDGET_FINAL_SUMMARY_RESERVE_TOKENS):
+        self.ai_client = ai_client
+        self.deadline_seconds = deadline_minutes * 60 if deadline_minutes else None
+        self.token_budget = token_budget or None
+        self.reserve_seconds = reserve_seconds if self.deadline_seconds else 0
+        self.reserve_tokens = reserve_tokens if self.token_budget else 0
+
+        self.start_time = time.time()
+        self.start_tokens = ai_client.get_tokens_used()
+        self.seconds_per_paper = None  # 实测的单篇论文开销（含轮次开销）
+        self.tokens_per_paper = None
+        self.plans: List[Dict] = []
+        self._lock = threading.Lock()
+        self._round_start_time = None
+        self._round_start_tokens = None
+        self._processing_deadline = None
+
+        print(f"⏱️ 预算模式已启用")
+        if self.deadline_seconds:
+            print(f"   - 截止时间: {deadline_minutes:g} 分钟 (为最终总结预留 {self.reserve_seconds:.0f} 秒)")
+        if self.token_budget:
+            print(f"   - token预算: {self.token_budget:,} (为最终总结预留 {self.reserve_tokens:,})")
+
+    @classmethod
+    def from_spec(cls, ai_client, spec: Dict) -> Optional['ResearchBudget']:
+        """从批量/服务任务配置中读取 deadline_minutes 和 token_budget，都未设置时返回None"""
+        deadline_minutes = spec.get('deadline_minutes')
+        token_budget = spec.get('token_budget')
+        if not deadline_minutes and not token_budget:
+            return None
+        return cls(ai_client, deadline_minutes=float(deadline_minutes) if deadline_minutes else None,
+                   token_budget=int(token_budget) if token_budget else None)
+
+    def elapsed_seconds(self) -> float:
+        return time.time() - self.start_time
+
+    def tokens_used(self) -> int:
+        return self.ai_client.get_tokens_used() - self.start_tokens
+
+    def spendable_seconds(self) -> Optional[float]:
+        """扣除最终总结预留后还可使用的时间，未设置截止时间时返回None"""
+        if not self.deadline_seconds:
+            return None
+        return self.deadline_seconds - self.reserve_seconds - self.elapsed_seconds()
+
+    def spendable_tokens(self) -> Optional[int]:
+        """扣除最终总结预留后还可使用的token，未设置token预算时返回None"""
+        if not self.token_budget:
+            return None
+        return self.token_budget - self.reserve_tokens - self.tokens_used()
+
+    def remaining_fraction(self) -> float:
+        """可用预算的剩余比例（取时间与token中较紧张的一项）"""
+        fractions = []
+        if self.deadline_seconds:
+            total = max(1.0, self.deadline_seconds - self.reserve_seconds)
+            fractions.append(self.spendable_seconds() / total)
+        if self.token_budget:
+            total = max(1, self.token_budget - self.reserve_tokens)
+            fractions.append(self.spendable_tokens() / total)
+        return max(0.0, min(fractions)) if fractions else 1.0
+
+    def exhausted(self) -> bool:
+        """可用预算（不含最终总结预留）是否已用尽"""
+        seconds = self.spendable_seconds()
+        tokens = self.spendable_tokens()
+        return (seconds is not None and seconds <= 0) or (tokens is not None and tokens <= 0)
+
+    def plan_round(self, round_num: int) -> Dict:
+        """根据剩余预算规划本轮: 最大论文数、降级策略以及是否结束搜索"""
+        rounds_left = max(1, SEARCH_DEPTH - round_num + 1)
+        fraction = self.remaining_fraction()
+        plan = {
+            'round': round_num,
+            'remaining_fraction': round(fraction, 3),
+            'max_papers': MAX_PAPERS_PER_DEPTH,
+            'skip_fallback': fraction < BUDGET_SKIP_FALLBACK_BELOW,
+            'abstract_only': fraction < BUDGET_ABSTRACT_ONLY_BELOW,
+            'stop': False,
+            'reason': '',
+        }
+
+        # 本轮分到的预算 = 剩余可用预算在剩余轮次中平均分配
+        allotted_seconds = None
+        seconds = self.spendable_seconds()
+        if seconds is not None:
+            allotted_seconds = max(0.0, seconds) / rounds_left
+            per_paper = self.seconds_per_paper or BUDGET_DEFAULT_SECONDS_PER_PAPER
+            plan['max_papers'] = min(plan['max_papers'], int(allotted_seconds / per_paper))
+        tokens = self.spendable_tokens()
+        if tokens is not None:
+            per_paper = self.tokens_per_paper or BUDGET_DEFAULT_TOKENS_PER_PAPER
+            plan['max_papers'] = min(plan['max_papers'], int(max(0, tokens) / rounds_left / per_paper))
+
+        if self.exhausted():
+            plan['stop'] = True
+            plan['reason'] = '预算用尽'
+        elif plan['max_papers'] < 1:
+            plan['stop'] = True
+            plan['reason'] = '剩余预算不足以再处理一篇论文'
+
+        with self._lock:
+            self._round_start_time = time.time()
+            self._round_start_tokens = self.ai_client.get_tokens_used()
+            self._processing_deadline = (
+                self._round_start_time + allotted_seconds * BUDGET_ROUND_PROCESSING_SHARE
+                if allotted_seconds is not None else None
+            )
+        self.plans.append(plan)
+
+        if plan['stop']:
+            print(f"⏱️ 预算规划: {plan['reason']}，结束搜索并生成最终总结")
+        else:
+            degradations = []
+            if plan['max_papers'] < MAX_PAPERS_PER_DEPTH:
+                degradations.append(f"最多处理 {plan['max_papers']} 篇")
+            if plan['skip_fallback']:
+                degradations.append("跳过备用PDF策略")
+            if plan['abstract_only']:
+                degradations.append("仅基于摘要分析")
+            print(f"⏱️ 预算规划: 剩余 {fraction:.0%}" + (f" → {', '.join(degradations)}" if degradations else ""))
+        return plan
+
+    def processing_open(self) -> bool:
+        """本轮是否还可以开始下载新的论文"""
+        if self.exhausted():
+            return False
+        with self._lock:
+            deadline = self._processing_deadline
+        return deadline is None or time.time() < deadline
+
+    def finish_round(self, papers_processed: int):
+        """记录本轮实测开销，用于后续轮次的规划"""
+        if papers_processed <= 0 or self._round_start_time is None:
+            return
+        seconds = (time.time() - self._round_start_time) / papers_processed
+        tokens = (self.ai_client.get_tokens_used() - self._round_start_tokens) / papers_processed
+        # 指数平滑，避免单轮波动（例如某轮大量PDF下载超时）影响过大
+        self.seconds_per_paper = seconds if self.seconds_per_paper is None else 0.5 * self.seconds_per_paper + 0.5 * seconds
+        self.tokens_per_paper = tokens if self.tokens_per_paper is None else 0.5 * self.tokens_per_paper + 0.5 * tokens
+
+    def summary(self) -> Dict:
+        return {
+            'deadline_seconds': self.deadline_seconds,
+            'token_budget': self.token_budget,
+            'elapsed_seconds': round(self.elapsed_seconds(), 1),
+            'tokens_used': self.tokens_used(),
+            'seconds_per_paper': round(self.seconds_per_paper, 1) if self.seconds_per_paper else None,
+            'tokens_per_paper': int(self.tokens_per_paper) if self.tokens_per_paper else None,
+            'round_plans': self.plans,
+        }
@@ -0,0 +1,307 @@
+"""
+持久化研究缓存
+历次运行已经付出的下载、提取与分析开销保存在SQLite数据库中：论文元数据与提取的全文按论文规范身份
+（arXiv ID、DOI、规范化标题）索引，单篇分析按论文身份与分析模型索引。
+新运行在下载PDF、调用LLM之前先查询缓存，新的提取与分析结果写回缓存。
+
+已有的输出文件可以导入缓存进行预热:
+    python research_cache.py                       # 导入 output/ 下的 research_results_*.json 与 output/runs/*
+    python research_cache.py output/research_results_xxx.json --model deepseek-ai/DeepSeek-R1-0528-Qwen3-8B
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import RESEARCH_CACHE_DB, OUTPUT_DIR, MODEL_NAME
+from paper_registry import paper_identity_keys
+from paper_store import paper_text
+from result_store import ResultStore
+from run_checkpoint import json_default, restore_datetimes
+
+# 不写入元数据的字段（全文、本地路径与运行内部的引用）
+NON_METADATA_FIELDS = ('extracted_text', 'text_chunks', 'text_length', 'local_path', 'text_file',
+                       'carried_text_file', 'carried_from')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    metadata TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paper_keys (
+    key TEXT PRIMARY KEY,
+    paper_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS texts (
+    paper_id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    local_path TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    paper_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    text_length INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (paper_id, model)
+);
+"""
+
+
+def usable_analysis(analysis: Optional[str]) -> bool:
+    """分析结果是否可以缓存（排除空结果、请求失败时的错误文本与最终整理失败的累积结果）"""
+    return bool(analysis) and not analysis.startswith("错误:") and "[注: 最终整理步骤失败" not in analysis
+
+
+class ResearchCache:
+    """跨运行的论文元数据/全文/分析缓存（每次操作使用独立连接，可被多个线程与进程共享）"""
+
+    def __init__(self, db_path: str = RESEARCH_CACHE_DB):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = {'text': 0, 'analysis': 0}
+        self.misses = {'text': 0, 'analysis': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _count(self, kind: str, hit: bool):
+        with self._lock:
+            (self.hits if hit else self.misses)[kind] += 1
+
+    # ---- 论文身份与元数据 ----
+
+    @staticmethod
+    def _find_paper(conn: sqlite3.Connection, keys: List[str]) -> Optional[int]:
+        for key in keys:
+            row = conn.execute("SELECT paper_id FROM paper_keys WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                return row['paper_id']
+        return None
+
+    def _put_paper(self, conn: sqlite3.Connection, paper: Dict) -> Optional[int]:
+        """登记论文的全部身份键并合并元数据（已有字段只被非空值覆盖），返回论文ID"""
+        keys = paper_identity_keys(paper)
+        if not keys:
+            return None
+        metadata = json.loads(json.dumps(
+            {field: value for field, value in paper.items()
+             if field not in NON_METADATA_FIELDS and value not in (None, '', [])},
+            default=json_default
+        ))
+        now = time.time()
+        paper_id = self._find_paper(conn, keys)
+        if paper_id is None:
+            paper_id = conn.execute(
+                "INSERT INTO papers (metadata, updated_at) VALUES (?, ?)",
+                (json.dumps(metadata, ensure_ascii=False), now)
+            ).lastrowid
+        else:
+            row = conn.execute("SELECT metadata FROM papers WHERE id = ?", (paper_id,)).fetchone()
+            merged = dict(json.loads(row['metadata']), **metadata)
+            conn.execute("UPDATE papers SET metadata = ?, updated_at = ? WHERE id = ?",
+                         (json.dumps(merged, ensure_ascii=False), now, paper_id))
+        conn.executemany("INSERT OR IGNORE INTO paper_keys (key, paper_id) VALUES (?, ?)",
+                         [(key, paper_id) for key in keys])
+        return paper_id
+
+    def enrich(self, paper: Dict) -> Dict:
+        """用缓存的元数据补全论文缺失的字段（如摘要、PDF链接、DOI），返回paper"""
+        keys = paper_identity_keys(paper)
+        if not keys:
+            return paper
+        with self._connect() as conn:
+            paper_id = self._find_paper(conn, keys)
+            row = conn.execute("SELECT metadata FROM papers WHERE id = ?", (paper_id,)).fetchone() if paper_id else None
+        if row is not None:
+            for field, value in restore_datetimes(json.loads(row['metadata'])).items():
+                if not paper.get(field):
+                    paper[field] = value
+        return paper
+
+    # ---- 提取的全文 ----
+
+    def lookup_text(self, paper: Dict) -> Optional[Dict]:
+        """查询论文的提取全文，命中时返回 {'extracted_text', 'local_path'}"""
+        keys = paper_identity_keys(paper)
+        row = None
+        if keys:
+            with self._connect() as conn:
+                paper_id = self._find_paper(conn, keys)
+                if paper_id is not None:
+                    row = conn.execute("SELECT text, local_path FROM texts WHERE paper_id = ?", (paper_id,)).fetchone()
+        self._count('text', row is not None)
+        if row is None:
+            return None
+        local_path = row['local_path'] if row['local_path'] and Path(row['local_path']).exists() else None
+        return {'extracted_text': row['text'], 'local_path': local_path}
+
+    def _put_text(self, conn: sqlite3.Connection, paper: Dict, text: str):
+        paper_id = self._put_paper(conn, paper)
+        if paper_id is None or not text:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO texts (paper_id, text, local_path, updated_at) VALUES (?, ?, ?, ?)",
+            (paper_id, text, paper.get('local_path'), time.time())
+        )
+
+    def put_text(self, paper: Dict, text: str):
+        """保存从PDF提取的全文（摘要回退的结果不应写入）"""
+        with self._connect() as conn:
+            self._put_text(conn, paper, text)
+
+    # ---- 单篇分析 ----
+
+    def lookup_analysis(self, paper: Dict, model: str, min_text_length: int = 0) -> Optional[str]:
+        """查询论文在指定模型下的分析，只采用基于不少于min_text_length字符文本的分析"""
+        keys = paper_identity_keys(paper)
+        row = None
+        if keys:
+            with self._connect() as conn:
+                paper_id = self._find_paper(conn, keys)
+                if paper_id is not None:
+                    row = conn.execute(
+                        "SELECT analysis FROM analyses WHERE paper_id = ? AND model = ? AND text_length >= ?",
+                        (paper_id, model, min_text_length)
+                    ).fetchone()
+        self._count('analysis', row is not None)
+        return row['analysis'] if row is not None else None
+
+    def _put_analysis(self, conn: sqlite3.Connection, paper: Dict, model: str, analysis: str, text_length: int):
+        if not usable_analysis(analysis):
+            return
+        paper_id = self._put_paper(conn, paper)
+        if paper_id is None:
+            return
+        existing = conn.execute(
+            "SELECT text_length FROM analyses WHERE paper_id = ? AND model = ?", (paper_id, model)
+        ).fetchone()
+        if existing is not None and existing['text_length'] > text_length:
+            return  # 保留基于更多文本的分析
+        conn.execute(
+            "INSERT OR REPLACE INTO analyses (paper_id, model, analysis, text_length, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (paper_id, model, analysis, text_length, time.time())
+        )
+
+    def put_analysis(self, paper: Dict, model: str, analysis: str, text_length: int):
+        """保存单篇分析（text_length为分析所基于的文本长度）"""
+        with self._connect() as conn:
+            self._put_analysis(conn, paper, model, analysis, text_length)
+
+    # ---- 导入历史输出 ----
+
+    def _import_records(self, papers: Iterable[Dict], analyses: Iterable[Dict], model: str,
+                        read_text=None) -> Dict[str, int]:
+        counts = {'papers': 0, 'texts': 0, 'analyses': 0}
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for paper in papers:
+                if read_text:
+                    text = read_text(paper)
+                else:
+                    text = paper_text(paper) or ' '.join(paper.get('text_chunks') or [])
+                # 摘要回退的"全文"不导入，避免新运行把摘要当作全文跳过下载
+                if text and text != paper.get('abstract'):
+                    self._put_text(conn, paper, text)
+                    counts['texts'] += 1
+                else:
+                    self._put_paper(conn, paper)
+                counts['papers'] += 1
+            for record in analyses:
+                identity = {'title': record.get('paper', ''), 'arxiv_id': record.get('paper_id', '')}
+                if usable_analysis(record.get('analysis')):
+                    self._put_analysis(conn, identity, model, record['analysis'], record.get('text_length') or 0)
+                    counts['analyses'] += 1
+            conn.execute("COMMIT")
+        return counts
+
+    def import_results_file(self, path, model: str = MODEL_NAME) -> Dict[str, int]:
+        """导入旧版单文件结果（research_results_*.json，processed_papers中包含全文）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+        model = (results.get('configuration') or {}).get('analysis_model') or model
+        return self._import_records(results.get('processed_papers') or [], results.get('paper_analyses') or [], model)
+
+    def import_run_dir(self, run_dir, model: str = MODEL_NAME) -> Dict[str, int]:
+        """导入结果目录（output/runs/<运行ID>，论文/分析JSONL与全文文件）"""
+        run_dir = Path(run_dir)
+        store = ResultStore(run_dir.name, output_dir=str(run_dir.parent.parent), save_texts=False)
+        if store.index_file.exists():
+            with open(store.index_file, 'r', encoding='utf-8') as f:
+                model = (json.load(f).get('configuration') or {}).get('analysis_model') or model
+        return self._import_records(store.iter_papers(), store.iter_analyses(), model, read_text=store.read_text)
+
+    def import_outputs(self, paths: Iterable, model: str = MODEL_NAME) -> Dict[str, int]:
+        """导入多个结果文件/结果目录，返回累计导入数量"""
+        totals = {'files': 0, 'papers': 0, 'texts': 0, 'analyses': 0}
+        for path in paths:
+            path = Path(path)
+            try:
+                counts = self.import_run_dir(path, model) if path.is_dir() else self.import_results_file(path, model)
+            except (OSError, json.JSONDecodeError, KeyError) as e:
+                print(f"⚠️ 跳过无法导入的输出 {path}: {e}")
+                continue
+            totals['files'] += 1
+            for name, count in counts.items():
+                totals[name] += count
+            print(f"📥 {path}: {counts['papers']} 篇论文, {counts['texts']} 篇全文, {counts['analyses']} 篇分析")
+        return totals
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ('papers', 'texts', 'analyses')}
+        with self._lock:
+            counts['hits'] = dict(self.hits)
+            counts['misses'] = dict(self.misses)
+        return counts
+
+
+def cache_hits(*components) -> Dict[str, int]:
+    """各组件（处理器、AI客户端）所用研究缓存的累计命中次数"""
+    caches = {id(cache): cache for cache in (getattr(c, 'research_cache', None) for c in components)
+              if isinstance(cache, ResearchCache)}
+    totals = {'text': 0, 'analysis': 0}
+    for cache in caches.values():
+        with cache._lock:
+            for kind, count in cache.hits.items():
+                totals[kind] += count
+    return totals
+
+
+def default_output_paths(output_dir: str = OUTPUT_DIR) -> List[Path]:
+    """输出目录中的旧版结果文件与结果目录"""
+    output = Path(output_dir)
+    legacy = sorted(output.glob("research_results_*.json"))
+    run_dirs = sorted(path.parent for path in (output / "runs").glob("*/index.json"))
+    return legacy + run_dirs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="深研星图-导入历史输出预热研究缓存")
+    parser.add_argument('paths', nargs='*', help='结果文件或结果目录（默认: 输出目录中的全部历史输出）')
+    parser.add_argument('--db', default=RESEARCH_CACHE_DB, help='缓存数据库路径')
+    parser.add_argument('--model', default=MODEL_NAME, help='结果中未记录分析模型时，分析归属的模型')
+    args = parser.parse_args()
+
+    cache = ResearchCache(args.db)
+    paths = args.paths or default_output_paths()
+    totals = cache.import_outputs(paths, args.model)
+    stats = cache.stats()
+    print(f"✅ 已导入 {totals['files']} 个输出: {totals['papers']} 篇论文, {totals['texts']} 篇全文, {totals['analyses']} 篇分析")
+    print(f"📦 缓存 {cache.db_path}: {stats['papers']} 篇论文, {stats['texts']} 篇全文, {stats['analyses']} 篇分析")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+流水线式研究引擎
+搜索 → 下载/提取 → 分析 三个阶段通过有界队列连接并重叠执行：
+某个查询返回的论文立即进入下载，文本提取完成后立即进入分析。
+下载与分析的临时失败进入各阶段的延迟重试队列，工作线程先处理队列中的其他论文。
+"""
+
+import queue
+import threading
+from typing import Callable, List, Dict, Optional, Tuple
+
+from cancellation import OperationCancelled, cancellable_sleep
+from config import (
+    MAX_ANALYSIS_PAPERS,
+    PAPER_RETRY_MAX_ATTEMPTS,
+    PIPELINE_SEARCH_WORKERS,
+    PIPELINE_DOWNLOAD_WORKERS,
+    PIPELINE_ANALYSIS_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+)
+from paper_state import (
+    RetryableError, RetryQueue, PaperStateTracker,
+    CANDIDATE, ACQUIRING, EXTRACTED, ANALYZING, ANALYZED, FAILED_RETRYABLE, FAILED_FINAL,
+)
+from title_dedup import TitleDeduplicator
+
+# 阶段结束标记
+_STAGE_DONE = object()
+
+
+def build_analysis_record(paper: Dict, analysis: str) -> Dict:
+    """构建与串行分析一致的分析结果记录"""
+    return {
+        'paper': paper['title'],
+        'paper_id': paper.get('arxiv_id', ''),
+        'analysis': analysis,
+        'text_length': paper.get('text_length', 0),
+        'citations': paper.get('citations', 0),
+        'source': paper.get('source', 'unknown')
+    }
+
+
+class StreamingResearchPipeline:
+    """搜索、下载提取与分析重叠执行的流水线引擎（阶段间有界队列提供背压）"""
+
+    def __init__(self, ai_client, searcher, processor,
+                 search_workers: int = PIPELINE_SEARCH_WORKERS,
+                 download_workers: int = PIPELINE_DOWNLOAD_WORKERS,
+                 analysis_workers: int = PIPELINE_ANALYSIS_WORKERS,
+                 queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.ai_client = ai_client
+        self.searcher = searcher
+        self.processor = processor
+        self.search_workers = max(1, search_workers)
+        self.download_workers = max(1, download_workers)
+        self.analysis_workers = max(1, analysis_workers)
+        self.queue_size = max(1, queue_size)
+
+        print(f"🔧 流水线引擎初始化完成")
+        print(f"   - 搜索并发: {self.search_workers}")
+        print(f"   - 下载/提取并发: {self.download_workers}")
+        print(f"   - 分析并发: {self.analysis_workers}")
+        print(f"   - 阶段队列长度: {self.queue_size}")
+
+    def run_round(self, queries: List[str], filters, download_dir: str, max_papers: int,
+                  analyze: bool = True, max_analysis: int = MAX_ANALYSIS_PAPERS,
+                  batch_name: str = "论文", registry=None,
+                  round_num: int = 1, on_analysis: Optional[Callable[[Dict], None]] = None,
+                  prefetched_papers: Optional[List[Dict]] = None,
+                  process_options: Optional[Dict] = None,
+                  admission_open: Optional[Callable[[], bool]] = None,
+                  cancel_token=None,
+                  load_shedder=None,
+                  state_tracker: Optional[PaperStateTracker] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+        """
+        以流水线方式执行一轮搜索、处理与分析
+
+        Args:
+            queries: 本轮搜索查询
+            filters: 搜索过滤器
+            download_dir: PDF下载目录
+            max_papers: 本轮最多进入下载阶段的论文数
+            analyze: 是否进行AI分析
+            max_analysis: 本轮最多分析的论文数
+            batch_name: 日志中使用的批次名称
+            registry: 跨轮次全局论文注册表（可选），已处理过的论文不占用本轮名额
+            round_num: 当前轮次编号（用于注册表统计）
+            on_analysis: 每完成一篇分析即调用（可选）
+            prefetched_papers: 已提前搜索到的候选论文（可选），提供时跳过搜索阶段直接进入下载
+            process_options: 传给processor.process_paper的降级选项（可选，预算模式使用）
+            admission_open: 返回False时不再接收新论文进入下载（可选，预算模式使用）
+            cancel_token: 取消令牌（可选），触发后各阶段尽快结束并返回已完成的部分结果
+            load_shedder: 自动降载统计（可选），下载与分析按当前的降级措施逐篇调整
+            state_tracker: 论文状态记录（可选），记录每篇论文的状态转换与重试
+
+        Returns:
+            (candidates, processed_papers, analyses)
+        """
+        ai_client, searcher, processor = self.ai_client, self.searcher, self.processor
+        if cancel_token is not None:
+            ai_client = ai_client.with_cancel_token(cancel_token)
+            searcher = searcher.with_cancel_token(cancel_token)
+            processor = processor.with_cancel_token(cancel_token)
+        if load_shedder is not None:
+            ai_client = ai_client.with_load_shedder(load_shedder)
+            processor = processor.with_load_shedder(load_shedder)
+        # 非最后一次尝试时请求只发一次，临时失败交给重试队列
+        deferred_ai_client = ai_client.with_deferred_retries()
+        state_tracker = state_tracker or PaperStateTracker()
+
+        def cancelled() -> bool:
+            return cancel_token is not None and cancel_token.cancelled
+
+        query_queue = queue.Queue()
+        if prefetched_papers is None:
+            for query in queries:
+                if query and query.strip():
+                    query_queue.put(query)
+
+        download_queue = queue.Queue(maxsize=self.queue_size)
+        analysis_queue = queue.Queue(maxsize=self.queue_size)
+        download_retries = RetryQueue()
+        analysis_retries = RetryQueue()
+
+        state_lock = threading.Lock()
+        candidates: List[Dict] = []
+        processed_papers: List[Dict] = []
+        analyses: List[Dict] = []
+        # 规则与searcher的增强去重一致（模糊匹配使用更高阈值，关闭时为规范化后的精确匹配）
+        seen_titles = TitleDeduplicator(filters.similarity_threshold + 10, fuzzy=filters.fuzzy_matching)
+        seen_arxiv_ids = set()
+        counters = {'admitted': 0, 'analysis_slots': 0}
+
+        def admit(paper: Dict) -> bool:
+            """去重并决定论文是否进入下载阶段"""
+            if cancelled():
+                return False
+            arxiv_id = paper.get('arxiv_id', '')
+            title = paper.get('title', '')
+            with state_lock:
+                if arxiv_id and arxiv_id in seen_arxiv_ids:
+                    return False
+                if title and seen_titles.is_duplicate(title):
+                    return False
+                if registry is not None and registry.skip_if_known(paper, round_num):
+                    return False
+                if title:
+                    seen_titles.add(title)
+                if arxiv_id:
+                    seen_arxiv_ids.add(arxiv_id)
+                candidates.append(paper)
+                if counters['admitted'] >= max_papers:
+                    return False
+                if admission_open is not None and not admission_open():
+                    return False
+                if registry is not None and not registry.claim(paper, round_num):
+                    return False
+                counters['admitted'] += 1
+            state_tracker.transition(paper, CANDIDATE)
+            return True
+
+        def next_paper(stage_queue: queue.Queue, retries: RetryQueue, worker_state: Dict) -> Optional[Dict]:
+            """优先取出已到期的重试论文，否则从阶段队列取；上游已结束且没有待重试论文时返回None"""
+            while True:
+                paper = retries.pop_ready()
+                if paper is not None:
+                    return paper
+                wait_time = None if cancelled() else retries.wait_time()
+                if worker_state['upstream_done']:
+                    if wait_time is None:
+                        return None
+                    try:
+                        cancellable_sleep(min(wait_time, 0.5), cancel_token)
+                    except OperationCancelled:
+                        pass
+                    continue
+                try:
+                    paper = stage_queue.get(timeout=None if wait_time is None else min(wait_time, 0.5))
+                except queue.Empty:
+                    continue
+                if paper is _STAGE_DONE:
+                    worker_state['upstream_done'] = True
+                    continue
+                return paper
+
+        def retry_or_fail(paper: Dict, attempt: int, retries: RetryQueue, error: RetryableError):
+            if attempt >= PAPER_RETRY_MAX_ATTEMPTS:
+                state_tracker.transition(paper, FAILED_FINAL, str(error))
+                print(f"❌ [流水线] 重试次数用尽: {paper.get('title', 'Unknown')} - {error}")
+                return
+            delay = retries.schedule(paper, attempt, error.retry_after)
+            state_tracker.transition(paper, FAILED_RETRYABLE, f"{error} ({delay:.0f}秒后重试)")
+            print(f"⏳ [流水线] {paper.get('title', 'Unknown')} 暂时失败，{delay:.0f}秒后重试: {error}")
+
+        def search_worker():
+            while not cancelled():
+                try:
+                    query = query_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    print(f"\n📝 [流水线] 执行查询: {query}")
+                    papers = searcher.search_papers_multi_source(query, filters)
+                    for paper in papers:
+                        paper = searcher._validate_paper_data(paper)
+                        if admit(paper):
+                            # 队列满时阻塞，形成背压
+                            download_queue.put(paper)
+                except OperationCancelled:
+                    return
+                except Exception as e:
+                    print(f"❌ [流水线] 查询失败 '{query}': {e}")
+
+        def prefetched_worker():
+            for paper in prefetched_papers:
+                if admit(paper):
+                    download_queue.put(paper)
+
+        def download_worker():
+            worker_state = {'upstream_done': False}
+            while True:
+                paper = next_paper(download_queue, download_retries, worker_state)
+                if paper is None:
+                    return
+                if cancelled():
+                    continue  # 继续取出队列中的论文直到结束标记，避免上游阻塞
+                attempt = state_tracker.attempts(paper, ACQUIRING) + 1
+                state_tracker.transition(paper, ACQUIRING)
+                try:
+                    processed = processor.process_paper(
+                        paper, download_dir=download_dir, defer_retries=attempt < PAPER_RETRY_MAX_ATTEMPTS,
+                        **(process_options or {})
+                    )
+                except RetryableError as e:
+                    retry_or_fail(paper, attempt, download_retries, e)
+                    continue
+                except OperationCancelled:
+                    continue
+                except Exception as e:
+                    state_tracker.transition(paper, FAILED_FINAL, str(e))
+                    print(f"❌ [流水线] 处理失败: {paper.get('title', 'Unknown')} - {e}")
+                    continue
+                if not processed:
+                    state_tracker.transition(paper, FAILED_FINAL)
+                    continue
+                state_tracker.transition(processed, EXTRACTED)
+                with state_lock:
+                    processed_papers.append(processed)
+                    send_to_analysis = analyze and counters['analysis_slots'] < max_analysis
+                    if send_to_analysis:
+                        counters['analysis_slots'] += 1
+                text_len = processed.get('text_length', 0)
+                print(f"✅ [流水线] 处理成功 ({text_len:,} 字符): {processed['title']}")
+                if send_to_analysis:
+                    analysis_queue.put(processed)
+
+        def analysis_worker():
+            worker_state = {'upstream_done': False}
+            while True:
+                paper = next_paper(analysis_queue, analysis_retries, worker_state)
+                if paper is None:
+                    return
+                if cancelled():
+                    continue
+                attempt = state_tracker.attempts(paper, ANALYZING) + 1
+                state_tracker.transition(paper, ANALYZING)
+                client = ai_client if attempt >= PAPER_RETRY_MAX_ATTEMPTS else deferred_ai_client
+                try:
+                    text_chunks = paper.get('text_chunks', [])
+                    analysis = client.analyze_paper_text(paper['title'], paper['abstract'], text_chunks, paper=paper)
+                    record = build_analysis_record(paper, analysis)
+                    state_tracker.transition(paper, ANALYZED)
+                    with state_lock:
+                        analyses.append(record)
+                    if registry is not None:
+                        registry.record_analysis(paper, analysis)
+                    if on_analysis is not None:
+                        on_analysis(record)
+                    print(f"  ✅ [流水线] 完成分析: {paper['title']}")
+                except RetryableError as e:
+                    retry_or_fail(paper, attempt, analysis_retries, e)
+                except OperationCancelled:
+                    continue
+                except Exception as e:
+                    state_tracker.transition(paper, FAILED_FINAL, str(e))
+                    print(f"  ❌ [流水线] 分析失败: {paper['title']} - {e}")
+
+        if prefetched_papers is None:
+            print(f"\n🚀 流水线处理{batch_name}: {query_queue.qsize()} 个查询, 最多处理 {max_papers} 篇")
+            search_threads = self._start_workers(search_worker, self.search_workers, "search")
+        else:
+            print(f"\n🚀 流水线处理{batch_name}: 使用预取的 {len(prefetched_papers)} 篇候选论文, 最多处理 {max_papers} 篇")
+            search_threads = self._start_workers(prefetched_worker, 1, "prefetched")
+        download_threads = self._start_workers(download_worker, self.download_workers, "download")
+        analysis_threads = self._start_workers(analysis_worker, self.analysis_workers, "analysis")
+
+        # 逐级关闭各阶段：上游全部结束后向下游发送结束标记
+        self._join_and_close(search_threads, download_queue, len(download_threads), cancel_token)
+        self._join_and_close(download_threads, analysis_queue, len(analysis_threads), cancel_token)
+        self._join(analysis_threads, cancel_token)
+
+        if cancelled():
+            print(f"🛑 流水线已取消 ({cancel_token.reason}): 保留已完成的 {len(processed_papers)} 篇处理结果与 {len(analyses)} 篇分析")
+            return candidates, processed_papers, analyses
+        print(f"🎉 流水线完成: 候选 {len(candidates)} 篇 | 处理 {len(processed_papers)} 篇 | 分析 {len(analyses)} 篇")
+        return candidates, processed_papers, analyses
+
+    @staticmethod
+    def _start_workers(target, count: int, name: str) -> List[threading.Thread]:
+        threads = []
+        for i in range(count):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}-{i}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    @staticmethod
+    def _join(threads: List[threading.Thread], cancel_token=None):
+        """等待线程结束；有取消令牌时Ctrl+C触发取消，让各阶段尽快收尾而不是直接中断"""
+        for thread in threads:
+            while thread.is_alive():
+                try:
+                    thread.join(0.5)
+                except KeyboardInterrupt:
+                    if cancel_token is None:
+                        raise
+                    cancel_token.cancel("用户中断")
+
+    @staticmethod
+    def _join_and_close(threads: List[threading.Thread], downstream: queue.Queue, downstream_workers: int,
+                        cancel_token=None):
+        StreamingResearchPipeline._join(threads, cancel_token)
+        for _ in range(downstream_workers):
+            downstream.put(_STAGE_DONE)
@@ -0,0 +1,391 @@
+"""
+常驻研究服务
+进程常驻并保持同一个DeepSeekClient、EnhancedPaperSearcher和EnhancedPDFProcessor（及其连接池），
+通过本地HTTP API接收研究任务并排队执行。
+
+接口:
+    POST /jobs                 提交任务，请求体同批量模式的主题配置，例如 {"topic": "...", "time_preset": "2"}
+    POST /jobs/<id>/cancel     取消任务（运行中的任务会尽快停止，并保存已完成的部分结果）
+    GET  /jobs                 列出全部任务
+    GET  /jobs/<id>            任务状态与进度
+    GET  /jobs/<id>/events     部分结果（?since=N 只返回第N条之后的事件）
+    GET  /jobs/<id>/stream     以Server-Sent Events推送部分结果，任务结束后关闭
+    GET  /jobs/<id>/result     任务完成（或取消后保留的部分）结果
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from cancellation import CancellationToken
+from config import (
+    OUTPUT_DIR,
+    ENABLE_STREAMING_PIPELINE,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_MAX_CONCURRENT_JOBS,
+    SERVICE_FINISHED_JOB_TTL,
+    SERVICE_MAX_FINISHED_JOBS,
+)
+from deepseek_client import DeepSeekClient
+from main_DeepResearch import create_download_folder, run_research, save_results
+from paper_searcher import EnhancedPaperSearcher
+from pdf_processor import EnhancedPDFProcessor
+from research_budget import ResearchBudget
+from research_pipeline import StreamingResearchPipeline
+from run_checkpoint import RunCheckpoint
+from text_cache import ExtractedTextCache
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_FINISHED = 'finished'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+
+class ResearchJob:
+    """一个研究任务及其进度事件"""
+
+    def __init__(self, spec: Dict):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.topic = spec['topic']
+        self.status = JOB_QUEUED
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.finished_monotonic = None  # 结束时刻（time.monotonic），用于清理已结束的任务
+        self.run_id = None
+        self.output_file = None
+        self.error = None
+        self.results: Optional[Dict] = None
+        self.events: List[Dict] = []
+        self.cancel_token = CancellationToken()
+        self._cond = threading.Condition()
+
+    def add_event(self, event: str, data: Dict):
+        with self._cond:
+            self._append_event(event, data)
+
+    def set_status(self, status: str, **fields):
+        # 状态与对应事件在同一把锁内更新，推送端不会在收到结束事件前断开
+        with self._cond:
+            self.status = status
+            for key, value in fields.items():
+                setattr(self, key, value)
+            if self.done:
+                self.finished_monotonic = time.monotonic()
+            self._append_event('status', {'status': status})
+
+    def start(self) -> bool:
+        """标记任务开始运行；任务已在排队时被取消则返回False"""
+        with self._cond:
+            if self.cancel_token.cancelled:
+                return False
+            self.set_status(JOB_RUNNING, started_at=datetime.now().isoformat())
+            return True
+
+    def cancel(self) -> bool:
+        """取消任务：排队中的任务直接结束，运行中的任务触发取消令牌；已结束时返回False"""
+        with self._cond:
+            if self.done:
+                return False
+            self.cancel_token.cancel("用户取消")
+            if self.status == JOB_QUEUED:
+                self.set_status(JOB_CANCELLED, finished_at=datetime.now().isoformat())
+            return True
+
+    def _append_event(self, event: str, data: Dict):
+        self.events.append({
+            'seq': len(self.events),
+            'time': datetime.now().isoformat(),
+            'event': event,
+            'data': data,
+        })
+        self._cond.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JOB_FINISHED, JOB_FAILED, JOB_CANCELLED)
+
+    def events_since(self, since: int) -> List[Dict]:
+        with self._cond:
+            return self.events[since:]
+
+    def wait_for_events(self, since: int, timeout: float = 15.0) -> List[Dict]:
+        """等待新事件（任务结束或超时后返回）"""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > since or self.done, timeout=timeout)
+            return self.events[since:]
+
+    def to_dict(self) -> Dict:
+        with self._cond:
+            rounds = [e['data']['round_result'] for e in self.events if e['event'] == 'round_completed']
+            return {
+                'job_id': self.job_id,
+                'topic': self.topic,
+                'status': self.status,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'run_id': self.run_id,
+                'output_file': self.output_file,
+                'error': self.error,
+                'rounds_completed': len(rounds),
+                'papers_analyzed': rounds[-1]['cumulative_papers_analyzed'] if rounds else 0,
+                'adequacy_score': rounds[-1]['adequacy_score'] if rounds else 0.0,
+                'event_count': len(self.events),
+            }
+
+
+class ResearchService:
+    """常驻的研究服务：组件只初始化一次，任务通过队列由工作线程执行"""
+
+    def __init__(self, max_concurrent_jobs: int = SERVICE_MAX_CONCURRENT_JOBS):
+        print("🚀 正在初始化常驻研究服务...")
+        self.ai_client = DeepSeekClient()
+        self.searcher = EnhancedPaperSearcher()
+        self.processor = EnhancedPDFProcessor(text_cache=ExtractedTextCache())
+        self.pipeline = StreamingResearchPipeline(self.ai_client, self.searcher, self.processor) if ENABLE_STREAMING_PIPELINE else None
+
+        self.jobs: Dict[str, ResearchJob] = {}
+        self.jobs_lock = threading.Lock()
+        self.job_queue: "queue.Queue[ResearchJob]" = queue.Queue()
+        self.workers = []
+        for i in range(max(1, max_concurrent_jobs)):
+            worker = threading.Thread(target=self._worker, name=f"research-job-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        print(f"✅ 研究服务初始化完成 (并发任务数: {len(self.workers)})")
+
+    def submit(self, spec: Dict) -> ResearchJob:
+        """提交研究任务"""
+        if not isinstance(spec, dict) or not isinstance(spec.get('topic'), str) or not spec['topic'].strip():
+            raise ValueError("请求体必须是包含topic字段（非空字符串）的JSON对象")
+        spec = dict(spec)
+        spec['topic'] = spec['topic'].strip()
+        job = ResearchJob(spec)
+        with self.jobs_lock:
+            self._prune_jobs()
+            self.jobs[job.job_id] = job
+        self.job_queue.put(job)
+        print(f"📥 新任务 {job.job_id}: {job.topic} (排队中: {self.job_queue.qsize()})")
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[bool]:
+        """取消任务，任务不存在时返回None"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        cancelled = job.cancel()
+        if cancelled:
+            print(f"🛑 取消任务 {job.job_id}: {job.topic}")
+        return cancelled
+
+    def _prune_jobs(self):
+        """移除超过保留时间或超出保留数量的已结束任务（调用方持有jobs_lock）"""
+        finished = sorted((job for job in self.jobs.values() if job.finished_monotonic is not None),
+                          key=lambda job: job.finished_monotonic)
+        expired = time.monotonic() - SERVICE_FINISHED_JOB_TTL
+        excess = len(finished) - SERVICE_MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_monotonic < expired:
+                del self.jobs[job.job_id]
+
+    def list_jobs(self) -> List[Dict]:
+        with self.jobs_lock:
+            self._prune_jobs()
+            jobs = list(self.jobs.values())
+        return [job.to_dict() for job in jobs]
+
+    def _worker(self):
+        while True:
+            job = self.job_queue.get()
+            try:
+                self._run_job(job)
+            finally:
+                self.job_queue.task_done()
+
+    def _run_job(self, job: ResearchJob):
+        if not job.start():
+            return  # 排队时已被取消
+        print(f"\n🔄 开始执行任务 {job.job_id}: {job.topic}")
+        try:
+            filters = self.searcher.build_filters_from_spec(job.spec)
+            download_dir = create_download_folder(job.topic)
+            checkpoint = RunCheckpoint.create(job.topic)
+            checkpoint.save_run_info(download_dir, filters)
+            job.run_id = checkpoint.run_id
+
+            results = run_research(
+                self.ai_client, self.searcher, self.processor, self.pipeline,
+                job.topic, filters, download_dir, checkpoint,
+                progress_callback=job.add_event,
+                budget=ResearchBudget.from_spec(self.ai_client, job.spec),
+                cancel_token=job.cancel_token,
+                progressive=job.spec.get('progressive')
+            )
+            output_dir = Path(OUTPUT_DIR)
+            output_dir.mkdir(exist_ok=True)
+            output_file = save_results(results, output_dir)
+            job.results = results
+            if results['cancelled']:
+                # 被取消的运行不标记完成，之后仍可通过 --resume 继续
+                job.set_status(JOB_CANCELLED, finished_at=datetime.now().isoformat(), output_file=str(output_file))
+                print(f"🛑 任务已取消 {job.job_id}，部分结果: {output_file}")
+                return
+            checkpoint.mark_finished(output_file)
+            job.set_status(JOB_FINISHED, finished_at=datetime.now().isoformat(), output_file=str(output_file))
+            print(f"✅ 任务完成 {job.job_id}: {output_file}")
+        except Exception as e:
+            traceback.print_exc()
+            job.set_status(JOB_FAILED, finished_at=datetime.now().isoformat(), error=str(e))
+            print(f"❌ 任务失败 {job.job_id}: {e}")
+
+
+class ResearchRequestHandler(BaseHTTPRequestHandler):
+    """研究服务的HTTP接口"""
+
+    service: ResearchService = None
+
+    def log_message(self, format, *args):
+        pass  # 服务日志由各任务自行打印
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        parts = [part for part in parsed.path.split('/') if part]
+        return parts, parse_qs(parsed.query)
+
+    @staticmethod
+    def _since(query) -> int:
+        """?since=N 参数（非整数时抛出ValueError，负数按0处理）"""
+        try:
+            return max(0, int(query.get('since', ['0'])[0]))
+        except ValueError:
+            raise ValueError("since必须是整数")
+
+    def do_POST(self):
+        parts, _ = self._route()
+        if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+            cancelled = self.service.cancel(parts[1])
+            if cancelled is None:
+                self._send_json(404, {'error': f'job {parts[1]} not found'})
+            elif not cancelled:
+                job = self.service.get(parts[1])
+                self._send_json(409, {'error': f'job is {job.status}', 'status': job.status})
+            else:
+                self._send_json(202, self.service.get(parts[1]).to_dict())
+            return
+        if parts != ['jobs']:
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            spec = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+            job = self.service.submit(spec)
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(202, job.to_dict())
+
+    def do_GET(self):
+        parts, query = self._route()
+        if parts == ['jobs']:
+            self._send_json(200, self.service.list_jobs())
+            return
+        if len(parts) < 2 or parts[0] != 'jobs':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        job = self.service.get(parts[1])
+        if job is None:
+            self._send_json(404, {'error': f'job {parts[1]} not found'})
+            return
+
+        action = parts[2] if len(parts) > 2 else None
+        if action in ('events', 'stream'):
+            try:
+                since = self._since(query)
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+        if action is None:
+            self._send_json(200, job.to_dict())
+        elif action == 'events':
+            self._send_json(200, {'status': job.status, 'events': job.events_since(since)})
+        elif action == 'stream':
+            self._stream_events(job, since)
+        elif action == 'result':
+            if job.results is None:
+                self._send_json(409, {'error': f'job is {job.status}', 'status': job.status})
+            else:
+                self._send_json(200, job.results)
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def _stream_events(self, job: ResearchJob, since: int):
+        """以Server-Sent Events推送任务事件，直到任务结束"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            while True:
+                events = job.wait_for_events(since)
+                for event in events:
+                    payload = json.dumps(event, ensure_ascii=False, default=str)
+                    self.wfile.write(f"event: {event['event']}\ndata: {payload}\n\n".encode('utf-8'))
+                since += len(events)
+                if not events:
+                    self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+                if job.done and since >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端断开
+
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, max_concurrent_jobs: int = SERVICE_MAX_CONCURRENT_JOBS):
+    """启动研究服务并一直运行"""
+    service = ResearchService(max_concurrent_jobs=max_concurrent_jobs)
+    ResearchRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), ResearchRequestHandler)
+    server.daemon_threads = True
+    print(f"🌐 研究服务已启动: http://{host}:{port}")
+    print(f"   提交任务: curl -X POST http://{host}:{port}/jobs -d '{{\"topic\": \"...\"}}'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 研究服务已停止")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="深研星图-常驻研究服务")
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--max-jobs', type=int, default=SERVICE_MAX_CONCURRENT_JOBS, help='同时执行的研究任务数')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_jobs)
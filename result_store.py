@@ -0,0 +1,129 @@
+"""
+流式结果存储
+每轮处理的论文与分析结果在阶段完成时即以JSONL写入运行目录，论文全文单独保存为文本文件并按路径引用，
+最后写入一个小的index.json把整个运行串联起来。内存中只保留论文元数据，峰值内存不随论文总数增长。
+
+目录结构:
+    <OUTPUT_DIR>/runs/<run_id>/
+        index.json                 运行摘要、每轮结果与各文件路径
+        papers/round<N>.jsonl      第N轮处理的论文（元数据 + text_file全文路径）
+        analyses/round<N>.jsonl    第N轮的论文分析
+        texts/r<N>_<序号>_<标题>.txt  论文全文
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from config import OUTPUT_DIR
+from paper_store import paper_text
+
+# 写入JSONL时从论文记录中去掉的全文字段（全文保存在texts目录）
+TEXT_FIELDS = ('extracted_text', 'text_chunks', 'extracted_text_preview', 'extracted_text_full')
+
+
+def _safe_name(text: str, max_length: int = 60) -> str:
+    safe = "".join(c for c in text if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
+    return safe[:max_length] or 'paper'
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict]:
+    """逐行读取JSONL文件（跳过空行）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class ResultStore:
+    """一次研究运行的结果目录，按轮次追加写入论文与分析记录"""
+
+    def __init__(self, run_id: str, output_dir: str = OUTPUT_DIR, save_texts: bool = True):
+        self.run_id = run_id
+        self.run_dir = Path(output_dir) / "runs" / run_id
+        self.papers_dir = self.run_dir / "papers"
+        self.analyses_dir = self.run_dir / "analyses"
+        self.texts_dir = self.run_dir / "texts"
+        self.index_file = self.run_dir / "index.json"
+        self.save_texts = save_texts
+
+    def _round_file(self, directory: Path, round_num: int) -> Path:
+        return directory / f"round{round_num}.jsonl"
+
+    def _write_jsonl(self, path: Path, records: List[Dict]):
+        """逐条写入临时文件后原子替换（重新执行的轮次覆盖旧文件）"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str))
+                f.write('\n')
+        os.replace(tmp_path, path)
+
+    def save_papers(self, round_num: int, papers: List[Dict]) -> List[Dict]:
+        """写入本轮论文（全文存为单独文件），返回不含全文的轻量记录供内存中保留"""
+        light_papers = []
+        for i, paper in enumerate(papers, 1):
+            light = {k: v for k, v in paper.items() if k not in TEXT_FIELDS}
+            text = paper_text(paper)
+            if self.save_texts and text:
+                text_path = self.texts_dir / f"r{round_num}_{i:03d}_{_safe_name(paper.get('title', ''))}.txt"
+                text_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(text_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                light['text_file'] = str(text_path.relative_to(self.run_dir))
+            light_papers.append(light)
+        self._write_jsonl(self._round_file(self.papers_dir, round_num), light_papers)
+        return light_papers
+
+    def load_papers(self, round_num: int) -> Optional[List[Dict]]:
+        """读取已写入的某一轮论文记录（含text_file全文路径），该轮尚未写入时返回None"""
+        path = self._round_file(self.papers_dir, round_num)
+        if not path.exists():
+            return None
+        return list(iter_jsonl(path))
+
+    def save_analyses(self, round_num: int, analyses: List[Dict]):
+        """写入本轮的论文分析"""
+        records = [dict(analysis, round=round_num) for analysis in analyses]
+        self._write_jsonl(self._round_file(self.analyses_dir, round_num), records)
+
+    def _round_files(self, directory: Path) -> List[Path]:
+        if not directory.exists():
+            return []
+        return sorted(directory.glob("round*.jsonl"), key=lambda p: int(p.stem[len("round"):]))
+
+    def iter_papers(self) -> Iterator[Dict]:
+        for path in self._round_files(self.papers_dir):
+            yield from iter_jsonl(path)
+
+    def iter_analyses(self) -> Iterator[Dict]:
+        for path in self._round_files(self.analyses_dir):
+            yield from iter_jsonl(path)
+
+    def read_text(self, paper: Dict) -> str:
+        """读取论文记录引用的全文，没有全文文件时返回空字符串"""
+        text_file = paper.get('text_file')
+        if not text_file:
+            return ''
+        with open(self.run_dir / text_file, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def write_index(self, results: Dict) -> Path:
+        """写入运行索引（论文与分析只记录文件路径），返回索引文件路径"""
+        index = {k: v for k, v in results.items() if k not in ('paper_analyses', 'processed_papers')}
+        paper_files = self._round_files(self.papers_dir)
+        analysis_files = self._round_files(self.analyses_dir)
+        index['files'] = {
+            'papers': [str(p.relative_to(self.run_dir)) for p in paper_files],
+            'analyses': [str(p.relative_to(self.run_dir)) for p in analysis_files],
+            'texts_dir': str(self.texts_dir.relative_to(self.run_dir)) if self.save_texts else None,
+        }
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_file.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.index_file)
+        return self.index_file
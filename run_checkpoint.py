@@ -0,0 +1,230 @@
+"""
+研究运行检查点
+每轮每个阶段完成后把运行状态写入磁盘，程序崩溃或中断后可以通过
+`python main_DeepResearch.py --resume <run-id>` 从最后完成的阶段继续，
+不再重复已完成的网络请求和LLM调用。
+"""
+
+import json
+import os
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import CHECKPOINT_DIR
+from paper_searcher import SearchFilters
+from paper_store import text_with_spans
+
+# 每轮的阶段（按执行顺序）
+STAGE_QUERIES = 'queries'      # 本轮使用的搜索查询
+STAGE_SEARCH = 'search'        # 搜索得到的候选论文
+STAGE_PROVISIONAL = 'provisional'  # 渐进模式下候选论文的摘要分析与临时总结
+STAGE_PROCESS = 'process'      # 下载并提取文本后的论文
+STAGE_ANALYZE = 'analyze'      # 单篇论文分析结果
+STAGE_EVALUATE = 'evaluate'    # 本轮总结、充分性评估与轮次结果
+ROUND_STAGES = [STAGE_QUERIES, STAGE_SEARCH, STAGE_PROVISIONAL, STAGE_PROCESS, STAGE_ANALYZE, STAGE_EVALUATE]
+
+# 运行级阶段
+STAGE_FINAL_SUMMARY = 'final_summary'
+
+# 需要在加载时还原为datetime的字段
+_DATETIME_FIELDS = {'published', 'start_date', 'end_date'}
+
+# 阶段检查点中论文全文文件的引用（{'file': 检查点目录下的相对路径, 'spans': 各文本块在全文中的位置}）
+CHECKPOINT_TEXT_FIELD = 'checkpoint_text'
+
+
+def json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def restore_datetimes(obj):
+    """把检查点中以ISO字符串保存的日期字段还原为datetime"""
+    if isinstance(obj, dict):
+        restored = {}
+        for key, value in obj.items():
+            if key in _DATETIME_FIELDS and isinstance(value, str):
+                try:
+                    restored[key] = datetime.fromisoformat(value)
+                    continue
+                except ValueError:
+                    pass
+            restored[key] = restore_datetimes(value)
+        return restored
+    if isinstance(obj, list):
+        return [restore_datetimes(item) for item in obj]
+    return obj
+
+
+def strip_paper_texts(papers: List[Dict]) -> List[Dict]:
+    """去掉全文字段，用于只需要元数据的阶段（例如候选论文）"""
+    light_papers = []
+    for paper in papers:
+        light = {k: v for k, v in paper.items() if k not in ('extracted_text', 'text_chunks', CHECKPOINT_TEXT_FIELD)}
+        light_papers.append(light)
+    return light_papers
+
+
+def serialize_filters(filters: Optional[SearchFilters]) -> Optional[Dict]:
+    return asdict(filters) if filters else None
+
+
+def deserialize_filters(data: Optional[Dict]) -> Optional[SearchFilters]:
+    if not data:
+        return None
+    return SearchFilters(**restore_datetimes(data))
+
+
+class RunCheckpoint:
+    """一次研究运行的检查点目录（state.json + 每个阶段一个JSON文件）"""
+
+    def __init__(self, run_id: str, checkpoint_dir: str = CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.run_dir = Path(checkpoint_dir) / run_id
+        self.state_file = self.run_dir / "state.json"
+        self.state: Dict = {
+            'run_id': run_id,
+            'created_at': datetime.now().isoformat(),
+            'updated_at': None,
+            'research_topic': None,
+            'download_dir': None,
+            'filters': None,
+            'completed_stages': {},
+            'finished': False,
+            'output_file': None,
+        }
+
+    @classmethod
+    def create(cls, research_topic: str, checkpoint_dir: str = CHECKPOINT_DIR) -> 'RunCheckpoint':
+        """为新的研究运行创建检查点"""
+        safe_topic = "".join(c for c in research_topic if c.isalnum() or c in (' ', '-', '_')).replace(' ', '_')
+        base_run_id = f"{safe_topic[:60]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        run_id = base_run_id
+        suffix = 1
+        while (Path(checkpoint_dir) / run_id).exists():  # 同一秒内启动的同名主题
+            suffix += 1
+            run_id = f"{base_run_id}_{suffix}"
+        checkpoint = cls(run_id, checkpoint_dir)
+        checkpoint.run_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint.state['research_topic'] = research_topic
+        checkpoint._write_state()
+        print(f"💾 检查点已创建: {checkpoint.run_dir} (运行ID: {run_id})")
+        return checkpoint
+
+    @classmethod
+    def load(cls, run_id: str, checkpoint_dir: str = CHECKPOINT_DIR) -> 'RunCheckpoint':
+        """加载已有运行的检查点，不存在时抛出FileNotFoundError"""
+        checkpoint = cls(run_id, checkpoint_dir)
+        if not checkpoint.state_file.exists():
+            raise FileNotFoundError(f"未找到运行 {run_id} 的检查点: {checkpoint.state_file}")
+        with open(checkpoint.state_file, 'r', encoding='utf-8') as f:
+            checkpoint.state.update(json.load(f))
+        print(f"♻️ 已加载检查点: {checkpoint.run_dir}")
+        return checkpoint
+
+    @property
+    def research_topic(self) -> Optional[str]:
+        return self.state.get('research_topic')
+
+    @property
+    def download_dir(self) -> Optional[str]:
+        return self.state.get('download_dir')
+
+    @property
+    def filters(self) -> Optional[SearchFilters]:
+        return deserialize_filters(self.state.get('filters'))
+
+    @property
+    def previous_run_id(self) -> Optional[str]:
+        """增量更新所基于的上次运行ID（完整运行为None）"""
+        return self.state.get('previous_run_id')
+
+    def save_run_info(self, download_dir: str, filters: Optional[SearchFilters],
+                      previous_run_id: Optional[str] = None):
+        """保存运行级信息（下载目录、过滤条件与增量更新的基线运行）"""
+        self.state['download_dir'] = download_dir
+        self.state['filters'] = serialize_filters(filters)
+        self.state['previous_run_id'] = previous_run_id
+        self._write_state()
+
+    def _stage_key(self, stage: str, round_num: Optional[int]) -> str:
+        return f"round{round_num}_{stage}" if round_num is not None else stage
+
+    def is_stage_done(self, stage: str, round_num: Optional[int] = None) -> bool:
+        return self._stage_key(stage, round_num) in self.state['completed_stages']
+
+    def save_stage(self, stage: str, data: Dict, round_num: Optional[int] = None):
+        """阶段完成后保存其结果（先写临时文件再原子替换，避免中断时留下损坏文件）"""
+        key = self._stage_key(stage, round_num)
+        self._write_json(self.run_dir / f"{key}.json", data)
+        self.state['completed_stages'][key] = datetime.now().isoformat()
+        self._write_state()
+
+    def load_stage(self, stage: str, round_num: Optional[int] = None) -> Optional[Dict]:
+        """读取已完成阶段的结果，未完成时返回None"""
+        key = self._stage_key(stage, round_num)
+        if key not in self.state['completed_stages']:
+            return None
+        stage_file = self.run_dir / f"{key}.json"
+        if not stage_file.exists():
+            return None
+        with open(stage_file, 'r', encoding='utf-8') as f:
+            return restore_datetimes(json.load(f))
+
+    def save_paper_stage(self, stage: str, papers: List[Dict], round_num: Optional[int] = None):
+        """
+        保存包含论文全文的阶段：全文写入检查点目录下的文本文件，阶段JSON只记录元数据与文件引用，
+        不再把每篇论文的全文与文本块展开写入同一个JSON。
+        """
+        light_papers = []
+        for i, paper in enumerate(papers, 1):
+            text, spans = text_with_spans(paper)
+            if not spans:
+                # 没有提取全文（文本块即摘要）或文本块不是全文的切片时保持原样
+                light_papers.append(paper)
+                continue
+            text_path = self.run_dir / "texts" / f"{self._stage_key(stage, round_num)}_{i:03d}.txt"
+            text_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            light = {k: v for k, v in paper.items() if k not in ('extracted_text', 'text_chunks')}
+            light[CHECKPOINT_TEXT_FIELD] = {'file': str(text_path.relative_to(self.run_dir)), 'spans': spans}
+            light_papers.append(light)
+        self.save_stage(stage, {'papers': light_papers}, round_num)
+
+    def load_paper_stage(self, stage: str, round_num: Optional[int] = None, paper_store=None) -> Optional[List[Dict]]:
+        """读取save_paper_stage保存的论文并重新载入全文（提供paper_store时全文放入内存受限的存储），未完成时返回None"""
+        state = self.load_stage(stage, round_num)
+        if state is None:
+            return None
+        papers = []
+        for paper in state.get('papers', []):
+            reference = paper.pop(CHECKPOINT_TEXT_FIELD, None)
+            if reference:
+                with open(self.run_dir / reference['file'], 'r', encoding='utf-8') as f:
+                    text = f.read()
+                paper['extracted_text'] = text
+                paper['text_chunks'] = [text[start:end] for start, end in reference['spans']]
+                if paper_store is not None:
+                    paper_store.put(paper)
+            papers.append(paper)
+        return papers
+
+    def mark_finished(self, output_file: str):
+        self.state['finished'] = True
+        self.state['output_file'] = str(output_file)
+        self._write_state()
+
+    def _write_state(self):
+        self.state['updated_at'] = datetime.now().isoformat()
+        self._write_json(self.state_file, self.state)
+
+    def _write_json(self, path: Path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=json_default)
+        os.replace(tmp_path, path)
@@ -0,0 +1,383 @@
+"""
+运行估算
+在真正执行之前，根据config.py中的当前配置（查询数、每查询论文数、每轮论文数、密钥数量、分块大小等）
+和最近几次运行记录的实测统计，预测一次研究运行的耗时、各来源HTTP请求数、各模型的LLM调用与token开销，
+并标出可能触发限流的配置。用法: python main_DeepResearch.py --estimate
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import (
+    OUTPUT_DIR,
+    API_KEYS,
+    API_KEYS_2,
+    MODEL_NAME,
+    SUMMARY_MODEL_NAME,
+    SEARCH_DEPTH,
+    NUM_SEARCH_QUERIES,
+    DEPTH_SEARCH_QUERIES,
+    PAPERS_PER_QUERY,
+    MAX_PAPERS_PER_DEPTH,
+    MAX_ANALYSIS_PAPERS,
+    MAX_INPUT_TOKENS,
+    ENABLE_CONCURRENT_ANALYSIS,
+    MAX_CONCURRENT_ANALYSIS,
+    ENABLE_STREAMING_PIPELINE,
+    PIPELINE_SEARCH_WORKERS,
+    PIPELINE_DOWNLOAD_WORKERS,
+    ESTIMATE_HISTORY_RUNS,
+    ESTIMATE_API_RPM_PER_KEY,
+    ESTIMATE_API_TPM_PER_KEY,
+    ESTIMATE_SCHOLAR_SAFE_REQUESTS_PER_HOUR,
+    ENABLE_SEARCH_FANOUT,
+    SEARCH_SOURCE_TIME_BUDGETS,
+    HOST_RATE_LIMITS,
+    SEARCH_QUERY_CONCURRENCY,
+)
+
+# 没有历史运行记录时使用的默认单位开销
+DEFAULT_PROFILE = {
+    # 来源 -> 每个查询触发该来源搜索的比例（并发模式下每个查询都查询全部来源）、每次搜索的HTTP请求数与每个请求的耗时（防封限速另按主机计算）
+    'sources': {
+        'google_scholar': {'rate': 1.0, 'requests_per_search': math.ceil(PAPERS_PER_QUERY / 10), 'seconds_per_request': 2.0},
+        'scholarly': {'rate': 1.0 if ENABLE_SEARCH_FANOUT else 0.5, 'requests_per_search': 1 + PAPERS_PER_QUERY / 2, 'seconds_per_request': 2.0},
+        'dblp': {'rate': 1.0 if ENABLE_SEARCH_FANOUT else 0.5, 'requests_per_search': 1, 'seconds_per_request': 2.0},
+        'arxiv': {'rate': 1.0 if ENABLE_SEARCH_FANOUT else 0.3, 'requests_per_search': 1, 'seconds_per_request': 3.0},
+    },
+    'candidates_per_query': PAPERS_PER_QUERY * 0.6,  # 过滤、去重后每个查询贡献的候选论文数
+    'seconds_per_paper': 20.0,  # 单篇论文下载与文本提取耗时
+    'requests_per_paper': 3.0,  # 单篇论文下载阶段的HTTP请求数
+    'chunks_per_paper': 1.0,
+    'analysis_call': {'seconds': 40.0, 'prompt_tokens': 15000, 'completion_tokens': 1500},
+    'summary_call': {'seconds': 120.0, 'prompt_tokens_per_analysis': 1500, 'completion_tokens': 4000},
+}
+
+MODELS_BY_ROLE = {'analysis': MODEL_NAME, 'summary': SUMMARY_MODEL_NAME}
+
+# 来源 -> 请求的主机（按HOST_RATE_LIMITS的令牌桶限速，scholarly库访问Google Scholar）
+SOURCE_HOSTS = {
+    'google_scholar': 'scholar.google.com',
+    'scholarly': 'scholar.google.com',
+    'dblp': 'dblp.org',
+    'arxiv': 'export.arxiv.org',
+}
+
+
+def _subtract(end, start):
+    """逐项计算统计字典的增量（只处理数值字段）"""
+    if isinstance(end, dict):
+        start = start if isinstance(start, dict) else {}
+        return {key: _subtract(value, start.get(key)) for key, value in end.items()}
+    if isinstance(end, (int, float)) and not isinstance(end, bool):
+        return end - (start or 0)
+    return end
+
+
+def capture_telemetry(ai_client, searcher, processor) -> Dict:
+    """记录客户端、搜索器与处理器的累计统计快照"""
+    return {
+        'llm': ai_client.get_model_stats(),
+        'search': searcher.get_search_stats(),
+        'processing': processor.get_process_stats(),
+    }
+
+
+def telemetry_delta(start: Dict, end: Dict, elapsed_seconds: float, results: Dict) -> Dict:
+    """一次运行的实测统计（两次快照之差 + 运行规模），写入结果索引供之后的估算使用"""
+    telemetry = _subtract(end, start)
+    telemetry.update({
+        'elapsed_seconds': round(elapsed_seconds, 1),
+        'rounds': results['actual_rounds_completed'],
+        'queries': len(results['all_queries_used']),
+        'papers_found': results['total_papers_found'],
+        'papers_processed': results['total_papers_processed'],
+        'papers_analyzed': results['total_papers_analyzed'],
+        'summary_model': SUMMARY_MODEL_NAME,
+        'analysis_model': MODEL_NAME,
+    })
+    return telemetry
+
+
+def load_history(output_dir: str = OUTPUT_DIR, max_runs: int = ESTIMATE_HISTORY_RUNS) -> List[Dict]:
+    """读取最近几次运行索引中的实测统计"""
+    index_files = sorted(Path(output_dir).glob("runs/*/index.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    history = []
+    for index_file in index_files:
+        if len(history) >= max_runs:
+            break
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                telemetry = json.load(f).get('telemetry')
+        except (OSError, ValueError):
+            continue
+        if telemetry and telemetry.get('queries'):
+            history.append(telemetry)
+    return history
+
+
+def _ratio(numerator: float, denominator: float, default: float) -> float:
+    return numerator / denominator if denominator else default
+
+
+def build_profile(history: List[Dict]) -> Dict:
+    """用历史运行的实测统计（各次运行求和后取比值）覆盖默认单位开销"""
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    if not history:
+        return profile
+
+    queries = sum(run['queries'] for run in history)
+    for source, defaults in profile['sources'].items():
+        searches = sum(run['search']['sources'].get(source, {}).get('searches', 0) for run in history)
+        seconds = sum(run['search']['sources'].get(source, {}).get('seconds', 0) for run in history)
+        defaults['rate'] = _ratio(searches, queries, defaults['rate'])
+        if searches:
+            # 有HTTP统计的来源按域名计算请求数，库搜索（scholarly/arXiv）保持默认请求模型
+            host = {'google_scholar': 'scholar.google.com', 'dblp': 'dblp.org'}.get(source)
+            if host:
+                requests = sum(run['search']['requests_by_host'].get(host, 0) for run in history)
+                defaults['requests_per_search'] = _ratio(requests, searches, defaults['requests_per_search'])
+            elif source == 'scholarly' and any('fills' in run['search']['sources'].get(source, {}) for run in history):
+                # scholarly每次搜索一个结果页，加上通过初筛的结果的补全请求
+                fills = sum(run['search']['sources'].get(source, {}).get('fills', 0) for run in history)
+                defaults['requests_per_search'] = 1 + fills / searches
+            defaults['seconds_per_request'] = _ratio(seconds, searches * defaults['requests_per_search'],
+                                                     defaults['seconds_per_request'])
+    profile['candidates_per_query'] = _ratio(sum(run['papers_found'] for run in history), queries,
+                                             profile['candidates_per_query'])
+
+    processed = sum(run['processing'].get('papers', 0) for run in history)
+    profile['seconds_per_paper'] = _ratio(sum(run['processing'].get('seconds', 0) for run in history), processed,
+                                          profile['seconds_per_paper'])
+    profile['requests_per_paper'] = _ratio(
+        sum(sum(run['processing'].get('requests_by_host', {}).values()) for run in history), processed,
+        profile['requests_per_paper'])
+    profile['chunks_per_paper'] = max(1.0, _ratio(sum(run['processing'].get('chunks', 0) for run in history),
+                                                  processed, profile['chunks_per_paper']))
+
+    analysis = [run['llm'].get(run.get('analysis_model', MODEL_NAME), {}) for run in history]
+    calls = sum(stats.get('calls', 0) for stats in analysis)
+    for key in ('seconds', 'prompt_tokens', 'completion_tokens'):
+        profile['analysis_call'][key] = _ratio(sum(stats.get(key, 0) for stats in analysis), calls,
+                                               profile['analysis_call'][key])
+
+    summary = [run['llm'].get(run.get('summary_model', SUMMARY_MODEL_NAME), {}) for run in history]
+    summary_calls = sum(stats.get('calls', 0) for stats in summary)
+    profile['summary_call']['seconds'] = _ratio(sum(stats.get('seconds', 0) for stats in summary), summary_calls,
+                                                profile['summary_call']['seconds'])
+    profile['summary_call']['completion_tokens'] = _ratio(
+        sum(stats.get('completion_tokens', 0) for stats in summary), summary_calls,
+        profile['summary_call']['completion_tokens'])
+    # 总结输入随累计分析数增长：用每次总结调用平均覆盖的分析数折算
+    analyzed = sum(run['papers_analyzed'] for run in history)
+    if summary_calls and analyzed:
+        profile['summary_call']['prompt_tokens_per_analysis'] = (
+            sum(stats.get('prompt_tokens', 0) for stats in summary) / summary_calls
+        ) / max(1.0, analyzed / len(history) / 2)
+
+    profile['rate_limited'] = {}
+    for run in history:
+        for model, stats in run['llm'].items():
+            if stats.get('rate_limited'):
+                profile['rate_limited'][model] = profile['rate_limited'].get(model, 0) + stats['rate_limited']
+    return profile
+
+
+class RunEstimator:
+    """按当前配置逐轮模拟一次运行的规模与开销（假设跑满SEARCH_DEPTH轮，是提前终止前的上限）"""
+
+    def __init__(self, history: Optional[List[Dict]] = None):
+        self.history = history if history is not None else load_history()
+        self.profile = build_profile(self.history)
+        self.api_keys = len(API_KEYS)
+        self.summary_keys = len(API_KEYS_2 if API_KEYS_2 else API_KEYS)
+        self.analysis_parallel = max(1, min(MAX_CONCURRENT_ANALYSIS, self.api_keys)) if ENABLE_CONCURRENT_ANALYSIS else 1
+
+    def _analysis_calls_per_paper(self) -> float:
+        # 累积式分析：每个文本块一次调用，多块时外加最终整理调用
+        chunks = self.profile['chunks_per_paper']
+        return 1.0 if chunks <= 1 else chunks + 1
+
+    def estimate(self) -> Dict:
+        profile = self.profile
+        analysis_call = profile['analysis_call']
+        summary_call = profile['summary_call']
+        summary_input_limit = int(MAX_INPUT_TOKENS * 1.5)
+
+        rounds = []
+        cumulative_analyses = 0
+        totals = {'seconds': 0.0, 'requests': {}, 'llm': {'analysis': {'calls': 0.0, 'tokens': 0.0},
+                                                          'summary': {'calls': 0.0, 'tokens': 0.0}}}
+        summary_truncated = False
+        for round_num in range(1, SEARCH_DEPTH + 1):
+            queries = NUM_SEARCH_QUERIES if round_num == 1 else DEPTH_SEARCH_QUERIES
+            requests = {}
+            search_seconds = 0.0
+            host_requests = {}
+            for source, stats in profile['sources'].items():
+                count = queries * stats['rate'] * stats['requests_per_search']
+                requests[source] = count
+                host = SOURCE_HOSTS.get(source)
+                host_requests[host] = host_requests.get(host, 0.0) + count
+                if ENABLE_SEARCH_FANOUT:
+                    # 并发模式下每个查询的耗时取最慢的来源（不超过其时间预算）
+                    source_seconds = min(stats['requests_per_search'] * stats['seconds_per_request'],
+                                         SEARCH_SOURCE_TIME_BUDGETS.get(source, float('inf')))
+                    search_seconds = max(search_seconds, queries * source_seconds)
+                else:
+                    search_seconds += count * stats['seconds_per_request']
+            query_workers = PIPELINE_SEARCH_WORKERS if ENABLE_STREAMING_PIPELINE else SEARCH_QUERY_CONCURRENCY
+            search_seconds /= min(query_workers, queries) or 1
+            # 查询并发执行时，耗时不少于最繁忙主机按令牌桶速率发完全部请求的时间
+            for host, count in host_requests.items():
+                limit = HOST_RATE_LIMITS.get(host)
+                if limit:
+                    search_seconds = max(search_seconds, (count - limit.get('burst', 1)) / limit['rate'])
+
+            candidates = queries * profile['candidates_per_query']
+            processed = min(MAX_PAPERS_PER_DEPTH, candidates)
+            analyzed = min(processed, MAX_ANALYSIS_PAPERS)
+            cumulative_analyses += analyzed
+            requests['pdf_downloads'] = processed * profile['requests_per_paper']
+
+            processing_seconds = processed * profile['seconds_per_paper']
+            if ENABLE_STREAMING_PIPELINE:
+                processing_seconds /= PIPELINE_DOWNLOAD_WORKERS
+            analysis_calls = analyzed * self._analysis_calls_per_paper()
+            analysis_seconds = analysis_calls * analysis_call['seconds'] / self.analysis_parallel
+            # 每轮一次查询生成（普通模型），一次阶段总结 + 一次充分性评估（总结模型）
+            analysis_calls += 1
+            analysis_tokens = analysis_calls * (analysis_call['prompt_tokens'] + analysis_call['completion_tokens'])
+            summary_prompt = cumulative_analyses * summary_call['prompt_tokens_per_analysis']
+            summary_truncated = summary_truncated or summary_prompt > summary_input_limit
+            # 阶段总结（输入随累计分析数增长）+ 充分性评估（输入为阶段总结）
+            summary_tokens = min(summary_prompt, summary_input_limit) + summary_call['completion_tokens']
+            summary_tokens += summary_call['completion_tokens'] * 2
+            summary_seconds = 2 * summary_call['seconds']
+
+            if ENABLE_STREAMING_PIPELINE:
+                round_seconds = search_seconds + max(processing_seconds, analysis_seconds) + summary_seconds
+            else:
+                round_seconds = search_seconds + processing_seconds + analysis_seconds + summary_seconds
+            rounds.append({
+                'round': round_num,
+                'queries': queries,
+                'candidates': round(candidates),
+                'papers_processed': round(processed),
+                'papers_analyzed': round(analyzed),
+                'requests': {source: round(count) for source, count in requests.items()},
+                'llm_calls': {'analysis': round(analysis_calls), 'summary': 2},
+                'tokens': {'analysis': round(analysis_tokens), 'summary': round(summary_tokens)},
+                'seconds': round(round_seconds),
+                'analysis_seconds': round(analysis_seconds),
+            })
+
+            totals['seconds'] += round_seconds
+            for source, count in requests.items():
+                totals['requests'][source] = totals['requests'].get(source, 0) + count
+            totals['llm']['analysis']['calls'] += analysis_calls
+            totals['llm']['analysis']['tokens'] += analysis_tokens
+            totals['llm']['summary']['calls'] += 2
+            totals['llm']['summary']['tokens'] += summary_tokens
+
+        # 最终研究总结
+        final_prompt = min(cumulative_analyses * summary_call['prompt_tokens_per_analysis'], summary_input_limit)
+        totals['seconds'] += summary_call['seconds']
+        totals['llm']['summary']['calls'] += 1
+        totals['llm']['summary']['tokens'] += final_prompt + summary_call['completion_tokens']
+
+        estimate = {
+            'history_runs': len(self.history),
+            'rounds': rounds,
+            'total_seconds': round(totals['seconds']),
+            'total_requests': {source: round(count) for source, count in totals['requests'].items()},
+            # 按用途区分（分析模型与总结模型可能是同一个模型）
+            'llm': {role: {'model': MODELS_BY_ROLE[role], 'calls': round(stats['calls']), 'tokens': round(stats['tokens'])}
+                    for role, stats in totals['llm'].items()},
+            'total_tokens': round(sum(stats['tokens'] for stats in totals['llm'].values())),
+            'profile': profile,
+        }
+        estimate['warnings'] = self._warnings(estimate, rounds, summary_truncated)
+        return estimate
+
+    def _warnings(self, estimate: Dict, rounds: List[Dict], summary_truncated: bool) -> List[str]:
+        """标出会触发限流、截断或浪费的配置"""
+        warnings = []
+        if not self.api_keys:
+            warnings.append("API_KEYS为空，无法进行任何LLM调用")
+            return warnings
+
+        # 分析阶段并发请求对每个密钥的请求速率与token速率
+        analysis_call = self.profile['analysis_call']
+        calls_per_minute = self.analysis_parallel * 60 / max(analysis_call['seconds'], 1)
+        rpm_per_key = calls_per_minute / self.api_keys
+        tpm_per_key = rpm_per_key * (analysis_call['prompt_tokens'] + analysis_call['completion_tokens'])
+        if rpm_per_key > ESTIMATE_API_RPM_PER_KEY:
+            warnings.append(f"分析阶段每个密钥约 {rpm_per_key:.0f} 次/分钟，超过 ESTIMATE_API_RPM_PER_KEY={ESTIMATE_API_RPM_PER_KEY}，会触发429限流")
+        if tpm_per_key > ESTIMATE_API_TPM_PER_KEY:
+            warnings.append(f"分析阶段每个密钥约 {tpm_per_key:,.0f} tokens/分钟，超过 ESTIMATE_API_TPM_PER_KEY={ESTIMATE_API_TPM_PER_KEY:,}，会触发429限流")
+
+        scholar_requests = estimate['total_requests'].get('google_scholar', 0)
+        hours = max(estimate['total_seconds'] / 3600, 1 / 60)
+        if scholar_requests / hours > ESTIMATE_SCHOLAR_SAFE_REQUESTS_PER_HOUR:
+            warnings.append(f"Google Scholar约 {scholar_requests / hours:.0f} 次请求/小时，超过 {ESTIMATE_SCHOLAR_SAFE_REQUESTS_PER_HOUR}，"
+                            f"容易触发验证码，之后的查询会落到备用来源")
+
+        for model, count in self.profile.get('rate_limited', {}).items():
+            warnings.append(f"最近的运行中 {model} 共被限流 {count} 次（429），建议增加密钥或降低并发")
+
+        if summary_truncated:
+            warnings.append(f"累计分析数较多，阶段总结的输入会超过 {int(MAX_INPUT_TOKENS * 1.5):,} tokens 被截断")
+        if MAX_PAPERS_PER_DEPTH > MAX_ANALYSIS_PAPERS:
+            warnings.append(f"MAX_PAPERS_PER_DEPTH={MAX_PAPERS_PER_DEPTH} 大于 MAX_ANALYSIS_PAPERS={MAX_ANALYSIS_PAPERS}，"
+                            f"多出的论文会被下载但不会被分析")
+        if any(r['candidates'] < MAX_PAPERS_PER_DEPTH for r in rounds):
+            warnings.append("部分轮次的候选论文少于 MAX_PAPERS_PER_DEPTH，增加查询数或 PAPERS_PER_QUERY 才能用满每轮名额")
+        return warnings
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes}分{secs}秒" if hours else f"{minutes}分{secs}秒"
+
+
+def print_estimate(estimate: Dict, deadline_minutes: Optional[float] = None, token_budget: Optional[int] = None):
+    """打印估算结果，给出截止时间/token预算时同时检查是否能在预算内完成"""
+    print("\n" + "=" * 60)
+    print("📐 运行估算（按当前config.py配置，假设跑满全部轮次）")
+    print("=" * 60)
+    if estimate['history_runs']:
+        print(f"📈 单位开销已用最近 {estimate['history_runs']} 次运行的实测统计校准")
+    else:
+        print("📈 没有历史运行统计，使用默认单位开销（完成一次运行后估算会更准确）")
+
+    for r in estimate['rounds']:
+        requests = ', '.join(f"{source}: {count}" for source, count in r['requests'].items() if count)
+        print(f"\n🔄 第{r['round']}轮: {r['queries']} 个查询 → 约 {r['candidates']} 篇候选, "
+              f"处理 {r['papers_processed']} 篇, 分析 {r['papers_analyzed']} 篇")
+        print(f"   ⏱️ 约 {_format_duration(r['seconds'])} (其中分析 {_format_duration(r['analysis_seconds'])})")
+        print(f"   🌐 HTTP请求: {requests}")
+        print(f"   🧠 LLM调用: " + ', '.join(f"{MODELS_BY_ROLE[role]}: {calls} 次 / {r['tokens'][role]:,} tokens"
+                                           for role, calls in r['llm_calls'].items()))
+
+    print(f"\n📊 合计")
+    print(f"   ⏱️ 预计用时: {_format_duration(estimate['total_seconds'])}")
+    print(f"   🌐 HTTP请求: " + ', '.join(f"{source}: {count}" for source, count in estimate['total_requests'].items()))
+    for role, stats in estimate['llm'].items():
+        label = '分析' if role == 'analysis' else '总结'
+        print(f"   🧠 {label}模型 {stats['model']}: {stats['calls']} 次调用, 约 {stats['tokens']:,} tokens")
+    print(f"   🔢 token合计: 约 {estimate['total_tokens']:,}")
+
+    if deadline_minutes and estimate['total_seconds'] > deadline_minutes * 60:
+        print(f"   ⚠️ 预计用时超过截止时间 {deadline_minutes:g} 分钟，预算模式会缩减后续轮次")
+    if token_budget and estimate['total_tokens'] > token_budget:
+        print(f"   ⚠️ 预计token超过预算 {token_budget:,}，预算模式会缩减后续轮次")
+
+    if estimate['warnings']:
+        print(f"\n🚨 配置提示:")
+        for warning in estimate['warnings']:
+            print(f"   - {warning}")
+    print("=" * 60)
@@ -0,0 +1,125 @@
+"""
+持久化搜索结果缓存
+各搜索来源（Google Scholar、scholarly、DBLP、arXiv）的结果按 来源 + 规范化查询 + 结果数 + 起始日期
+保存在SQLite数据库中，每个来源有各自的有效期（SEARCH_CACHE_TTL_HOURS）。
+同一主题的重复查询、各轮反复出现的备用查询直接从缓存返回，不再发出请求、不占用Google Scholar的限速额度。
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import SEARCH_CACHE_DB, SEARCH_CACHE_TTL_HOURS
+
+# 未在SEARCH_CACHE_TTL_HOURS中配置的来源的有效期（小时）
+DEFAULT_TTL_HOURS = 24
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    source TEXT NOT NULL,
+    query TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    since TEXT NOT NULL,
+    papers TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (source, query, max_results, since)
+);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询（小写、合并空白），大小写或空格不同的同一查询共用缓存"""
+    return re.sub(r'\s+', ' ', query.strip().lower())
+
+
+def _json_default(obj):
+    # 搜索结果中的发表时间保存为ISO字符串（paper_searcher导入本模块，不能复用run_checkpoint的序列化）
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _restore_published(paper: Dict) -> Dict:
+    if isinstance(paper.get('published'), str):
+        try:
+            paper['published'] = datetime.fromisoformat(paper['published'])
+        except ValueError:
+            pass
+    return paper
+
+
+def _since_key(since: Optional[datetime]) -> str:
+    # 来源只按日期（Scholar/scholarly按年份）下推，精确到日即可
+    return since.date().isoformat() if since else ''
+
+
+class SearchCache:
+    """跨运行的搜索结果缓存（每次操作使用独立连接，可被多个线程与进程共享）"""
+
+    def __init__(self, db_path: str = SEARCH_CACHE_DB, ttl_hours: Optional[Dict[str, float]] = None):
+        self.db_path = str(db_path)
+        self.ttl_hours = SEARCH_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.purge_expired()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ttl_seconds(self, source: str) -> float:
+        return self.ttl_hours.get(source, DEFAULT_TTL_HOURS) * 3600
+
+    def _count(self, source: str, hit: bool):
+        with self._lock:
+            counts = self.hits if hit else self.misses
+            counts[source] = counts.get(source, 0) + 1
+
+    def lookup(self, source: str, query: str, max_results: int, since: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """查询缓存的搜索结果，未命中或已过期时返回None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT papers, created_at FROM searches WHERE source = ? AND query = ? AND max_results = ? AND since = ?",
+                (source, normalize_query(query), max_results, _since_key(since))
+            ).fetchone()
+        if row is None or time.time() - row['created_at'] > self._ttl_seconds(source):
+            self._count(source, False)
+            return None
+        self._count(source, True)
+        return [_restore_published(paper) for paper in json.loads(row['papers'])]
+
+    def put(self, source: str, query: str, max_results: int, since: Optional[datetime], papers: List[Dict]):
+        """保存一次完整的搜索结果"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO searches (source, query, max_results, since, papers, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (source, normalize_query(query), max_results, _since_key(since),
+                 json.dumps(papers, ensure_ascii=False, default=_json_default), time.time())
+            )
+
+    def purge_expired(self) -> int:
+        """删除已过期的结果，返回删除的条数"""
+        now = time.time()
+        removed = 0
+        with self._connect() as conn:
+            sources = [row['source'] for row in conn.execute("SELECT DISTINCT source FROM searches")]
+            for source in sources:
+                removed += conn.execute("DELETE FROM searches WHERE source = ? AND created_at < ?",
+                                        (source, now - self._ttl_seconds(source))).rowcount
+        return removed
+
+    def stats(self) -> Dict:
+        """各来源的命中与未命中次数"""
+        with self._lock:
+            return {'hits': dict(self.hits), 'misses': dict(self.misses)}
@@ -0,0 +1,204 @@
+"""
+推测式预取
+本轮论文分析仍在进行时，先用普通模型根据已完成的部分分析草拟缺失领域和下一轮查询，
+在后台提前搜索并下载提取论文；真实的充分性评估完成后，根据草拟领域与真实缺失领域的
+重合度决定保留（直接作为下一轮的查询和候选论文）或丢弃推测结果。
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+from cancellation import CancellationToken, OperationCancelled
+from config import (
+    DEPTH_SEARCH_QUERIES,
+    SPECULATIVE_MIN_ANALYSES,
+    SPECULATIVE_PREFETCH_PAPERS,
+    SPECULATIVE_ACCEPT_OVERLAP,
+)
+
+# 单个真实缺失领域与草拟领域的字符二元组覆盖率达到该值即视为已覆盖
+AREA_MATCH_THRESHOLD = 0.4
+
+
+def _char_bigrams(text: str) -> set:
+    compact = "".join((text or "").lower().split())
+    if len(compact) < 2:
+        return {compact} if compact else set()
+    return {compact[i:i + 2] for i in range(len(compact) - 1)}
+
+
+def area_overlap(draft_areas: List[str], real_areas: List[str]) -> float:
+    """真实缺失领域中被草拟领域覆盖的比例（字符二元组匹配，中英文均适用）"""
+    if not draft_areas or not real_areas:
+        return 0.0
+    draft_bigrams = [_char_bigrams(area) for area in draft_areas]
+    covered = 0
+    for real in real_areas:
+        real_bigrams = _char_bigrams(real)
+        if not real_bigrams:
+            continue
+        best = max(len(real_bigrams & draft) / len(real_bigrams) for draft in draft_bigrams)
+        if best >= AREA_MATCH_THRESHOLD:
+            covered += 1
+    return covered / len(real_areas)
+
+
+class SpeculativePrefetcher:
+    """在轮次边界用推测工作掩盖下一轮的查询生成、搜索与下载延迟"""
+
+    def __init__(self, ai_client, searcher, processor, research_topic: str, filters, download_dir: str,
+                 registry=None, min_analyses: int = SPECULATIVE_MIN_ANALYSES,
+                 prefetch_papers: int = SPECULATIVE_PREFETCH_PAPERS,
+                 accept_overlap: float = SPECULATIVE_ACCEPT_OVERLAP,
+                 cancel_token: Optional[CancellationToken] = None):
+        self.ai_client = ai_client
+        self.searcher = searcher
+        self.processor = processor
+        self.research_topic = research_topic
+        self.filters = filters
+        self.download_dir = download_dir
+        self.registry = registry
+        self.min_analyses = max(1, min_analyses)
+        self.prefetch_papers = prefetch_papers
+        self.accept_overlap = accept_overlap
+        self.history: List[Dict] = []  # 每轮推测的保留/丢弃记录
+        self.cancel_token = cancel_token  # 运行级取消令牌，每轮推测使用其子令牌
+
+        self._lock = threading.Lock()
+        self._round_num = None
+        self._thread = None
+        self._cancel = self._new_round_token()
+        self._draft_done = threading.Event()
+        self._search_done = threading.Event()
+        self._analyses: List[Dict] = []
+        self._new_analyses = 0
+        self._queries_used: List[str] = []
+        self._draft: Dict = {}
+
+    def _new_round_token(self) -> CancellationToken:
+        return self.cancel_token.child() if self.cancel_token is not None else CancellationToken()
+
+    def begin_round(self, round_num: int, all_queries_used: List[str], previous_analyses: List[Dict]):
+        """开始为下一轮推测（丢弃尚未使用的上一次推测）"""
+        self._cancel.cancel("新一轮推测开始")
+        with self._lock:
+            self._round_num = round_num
+            self._thread = None
+            self._cancel = self._new_round_token()
+            self._draft_done = threading.Event()
+            self._search_done = threading.Event()
+            self._analyses = list(previous_analyses)
+            self._new_analyses = 0
+            self._queries_used = list(all_queries_used)
+            self._draft = {'areas': [], 'queries': [], 'papers': [], 'prefetched': 0, 'error': None}
+
+    def observe_analysis(self, record: Dict):
+        """本轮每完成一篇分析调用一次，达到阈值后启动推测"""
+        with self._lock:
+            if self._round_num is None:
+                return
+            self._analyses.append(record)
+            self._new_analyses += 1
+            ready = self._new_analyses >= self.min_analyses
+        if ready:
+            self.launch()
+
+    def launch(self):
+        """启动推测（已启动时忽略），本轮分析全部完成后也会调用以确保推测已开始"""
+        with self._lock:
+            if self._round_num is None or self._thread is not None or not self._analyses:
+                return
+            analyses = list(self._analyses)
+            queries_used = list(self._queries_used)
+            self._thread = threading.Thread(
+                target=self._speculate,
+                args=(analyses, queries_used, self._cancel, self._draft_done, self._search_done, self._draft),
+                name=f"speculative-round{self._round_num + 1}",
+                daemon=True,
+            )
+            thread = self._thread
+        print(f"🔮 基于 {len(analyses)} 篇已完成分析，开始推测第{self._round_num + 1}轮查询...")
+        thread.start()
+
+    def _speculate(self, analyses, queries_used, cancel, draft_done, search_done, draft):
+        # 绑定本轮推测的取消令牌：推测被丢弃时进行中的请求与下载立即中止
+        ai_client = self.ai_client.with_cancel_token(cancel)
+        searcher = self.searcher.with_cancel_token(cancel)
+        processor = self.processor.with_cancel_token(cancel)
+        papers = []
+        try:
+            areas = ai_client.draft_missing_areas(self.research_topic, analyses)
+            draft['areas'] = areas
+            if areas and not cancel.cancelled:
+                draft['queries'] = ai_client.generate_depth_search_queries(
+                    self.research_topic, areas, queries_used, num_queries=DEPTH_SEARCH_QUERIES
+                )
+            draft_done.set()
+            if draft['queries'] and not cancel.cancelled:
+                print(f"🔮 推测查询: {draft['queries']}，后台搜索中...")
+                papers = searcher.search_multiple_queries_enhanced(draft['queries'], self.filters)
+                draft['papers'] = papers
+        except OperationCancelled:
+            pass
+        except Exception as e:
+            draft['error'] = str(e)
+            print(f"⚠️ 推测失败: {e}")
+        finally:
+            draft_done.set()
+            search_done.set()
+
+        # 提前下载并提取排名靠前的论文（结果进入处理器的共享文本缓存）
+        for paper in papers[:self.prefetch_papers]:
+            if cancel.cancelled:
+                break
+            if self.registry is not None and self.registry.is_known(paper):
+                continue
+            try:
+                if processor.process_paper(dict(paper), download_dir=self.download_dir):
+                    draft['prefetched'] += 1
+            except OperationCancelled:
+                break
+            except Exception as e:
+                print(f"⚠️ 预取失败: {paper.get('title', 'Unknown')} - {e}")
+
+    def resolve(self, missing_areas: List[str], should_continue: bool) -> Optional[Dict]:
+        """真实评估完成后保留或丢弃推测结果，保留时返回{'queries': [...], 'papers': [...]}"""
+        with self._lock:
+            thread = self._thread
+            round_num = self._round_num
+            draft = self._draft
+            cancel, draft_done, search_done = self._cancel, self._draft_done, self._search_done
+            self._round_num = None
+        if thread is None:
+            return None
+
+        report = {'round': round_num, 'draft_areas': [], 'draft_queries': [], 'overlap': 0.0,
+                  'accepted': False, 'reason': ''}
+        if not should_continue:
+            cancel.cancel('搜索结束')
+            report['reason'] = '搜索结束'
+        else:
+            draft_done.wait()
+            report['draft_areas'] = draft['areas']
+            report['draft_queries'] = draft['queries']
+            report['overlap'] = round(area_overlap(draft['areas'], missing_areas), 2)
+            if draft['error']:
+                report['reason'] = f"推测失败: {draft['error']}"
+            elif not draft['queries']:
+                report['reason'] = '未生成推测查询'
+            elif report['overlap'] < self.accept_overlap:
+                report['reason'] = f"与真实缺失领域重合度不足 ({report['overlap']:.2f} < {self.accept_overlap})"
+            else:
+                report['accepted'] = True
+                report['reason'] = f"与真实缺失领域重合度 {report['overlap']:.2f}"
+
+        if report['accepted']:
+            search_done.wait()
+            report['papers'] = len(draft['papers'])
+            report['prefetched_so_far'] = draft['prefetched']
+            print(f"🔮 保留推测结果: {report['reason']}，直接使用 {len(draft['papers'])} 篇预搜索论文")
+        else:
+            cancel.cancel(report['reason'])
+            print(f"🔮 丢弃推测结果: {report['reason']}")
+        self.history.append(report)
+        return {'queries': draft['queries'], 'papers': draft['papers']} if report['accepted'] else None
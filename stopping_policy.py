@@ -0,0 +1,104 @@
+"""
+边际收益提前终止
+每轮评估后记录充分性评分的变化、本轮真正新增论文的比例和本轮token开销，
+据此估计再搜索一轮的预期评分提升/每token；低于配置值时提前结束搜索，
+避免评分停在平台期时仍然跑满全部轮次。
+"""
+
+from typing import Dict, List, Optional
+
+from config import (
+    ADEQUACY_EVALUATION_THRESHOLD,
+    MARGINAL_GAIN_MIN_PER_100K_TOKENS,
+    MARGINAL_GAIN_MIN_ROUNDS,
+    MARGINAL_GAIN_SMOOTHING,
+)
+
+
+class MarginalGainStoppingPolicy:
+    """根据评分趋势、新论文比例与每轮开销判断继续搜索是否值得"""
+
+    def __init__(self, ai_client, min_gain_per_100k_tokens: float = MARGINAL_GAIN_MIN_PER_100K_TOKENS,
+                 min_rounds: int = MARGINAL_GAIN_MIN_ROUNDS, smoothing: float = MARGINAL_GAIN_SMOOTHING):
+        self.ai_client = ai_client
+        self.min_gain_per_100k_tokens = min_gain_per_100k_tokens
+        self.min_rounds = max(2, min_rounds)
+        self.smoothing = min(1.0, max(0.0, smoothing))
+        self.signals: List[Dict] = []  # 每轮的判断依据
+        self._round_start_tokens = None
+        self._previous_score: Optional[float] = None
+        self._smoothed_delta: Optional[float] = None
+        self._smoothed_tokens: Optional[float] = None
+
+    def _smooth(self, previous: Optional[float], value: float) -> float:
+        if previous is None:
+            return value
+        return self.smoothing * value + (1 - self.smoothing) * previous
+
+    def begin_round(self):
+        """每轮开始时记录token用量起点"""
+        self._round_start_tokens = self.ai_client.get_tokens_used()
+
+    def observe_round(self, round_num: int, adequacy_score: float, registry_report: Dict) -> Dict:
+        """记录本轮评估结果，返回本轮信号（含是否建议结束）"""
+        round_tokens = 0
+        if self._round_start_tokens is not None:
+            round_tokens = max(0, self.ai_client.get_tokens_used() - self._round_start_tokens)
+        new_papers = registry_report.get('new_papers', 0)
+        skipped_known = registry_report.get('skipped_known', 0)
+        seen = new_papers + skipped_known
+        novelty_rate = new_papers / seen if seen else 0.0
+
+        score_delta = None
+        if self._previous_score is not None:
+            score_delta = adequacy_score - self._previous_score
+            self._smoothed_delta = self._smooth(self._smoothed_delta, score_delta)
+        self._smoothed_tokens = self._smooth(self._smoothed_tokens, round_tokens)
+        self._previous_score = adequacy_score
+
+        # 预期提升：平滑后的评分增量（不超过距阈值的余量）按新论文比例折算
+        headroom = max(0.0, ADEQUACY_EVALUATION_THRESHOLD - adequacy_score)
+        expected_gain = None
+        gain_per_100k = None
+        if self._smoothed_delta is not None:
+            expected_gain = min(max(self._smoothed_delta, 0.0), headroom) * novelty_rate
+            if self._smoothed_tokens:
+                gain_per_100k = expected_gain / (self._smoothed_tokens / 100000)
+
+        signals = {
+            'round': round_num,
+            'adequacy_score': round(adequacy_score, 4),
+            'score_delta': round(score_delta, 4) if score_delta is not None else None,
+            'smoothed_score_delta': round(self._smoothed_delta, 4) if self._smoothed_delta is not None else None,
+            'new_papers': new_papers,
+            'skipped_known': skipped_known,
+            'novelty_rate': round(novelty_rate, 3),
+            'round_tokens': round_tokens,
+            'smoothed_round_tokens': int(self._smoothed_tokens),
+            'expected_gain': round(expected_gain, 4) if expected_gain is not None else None,
+            'gain_per_100k_tokens': round(gain_per_100k, 4) if gain_per_100k is not None else None,
+            'min_gain_per_100k_tokens': self.min_gain_per_100k_tokens,
+            'stop': False,
+            'reason': '',
+        }
+        observed_rounds = len(self.signals) + 1
+        if observed_rounds < self.min_rounds or gain_per_100k is None:
+            signals['reason'] = '评估轮数不足，暂不判断边际收益'
+        elif gain_per_100k < self.min_gain_per_100k_tokens:
+            signals['stop'] = True
+            signals['reason'] = (f"边际收益过低 (每10万token预期提升 {gain_per_100k:.4f} < "
+                                 f"{self.min_gain_per_100k_tokens}, 新论文比例 {novelty_rate:.0%})")
+        else:
+            signals['reason'] = f"边际收益充足 (每10万token预期提升 {gain_per_100k:.4f})"
+        self.signals.append(signals)
+        return signals
+
+    def restore_round(self, signals: Optional[Dict]):
+        """从检查点恢复已完成轮次的信号"""
+        if not signals:
+            return
+        if signals.get('score_delta') is not None:
+            self._smoothed_delta = self._smooth(self._smoothed_delta, signals['score_delta'])
+        self._smoothed_tokens = self._smooth(self._smoothed_tokens, signals.get('round_tokens', 0))
+        self._previous_score = signals['adequacy_score']
+        self.signals.append(signals)
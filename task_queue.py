@@ -0,0 +1,317 @@
+"""
+持久化任务队列
+下载提取任务与单篇论文分析任务写入SQLite数据库（多台机器时放在共享文件系统上），
+任意节点上的 `python task_worker.py` 认领任务、执行并写回结果；协调进程只提交任务并等待完成。
+认领使用带租约的BEGIN IMMEDIATE事务，工作进程失联后租约过期，任务自动重新排队。
+
+注意: 共享文件系统需要支持POSIX文件锁（NFSv4等），因此不使用WAL模式。
+"""
+
+import copy
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config import TASK_QUEUE_DB, TASK_LEASE_SECONDS, TASK_MAX_ATTEMPTS, TASK_POLL_INTERVAL
+from paper_store import materialize_texts
+from run_checkpoint import json_default, restore_datetimes
+
+# 任务类型
+TASK_PROCESS = 'process'  # 下载PDF并提取文本（EnhancedPDFProcessor.process_paper）
+TASK_ANALYZE = 'analyze'  # 单篇论文分析（DeepSeekClient.analyze_paper_text）
+
+# 任务状态
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, kind, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_run ON tasks (run_id, status);
+"""
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, default=json_default)
+
+
+def _loads(text: Optional[str]):
+    return restore_datetimes(json.loads(text)) if text else None
+
+
+class TaskQueue:
+    """SQLite任务队列（每次操作使用独立连接，可被多个进程、多台机器同时访问）"""
+
+    def __init__(self, db_path: str = TASK_QUEUE_DB, lease_seconds: float = TASK_LEASE_SECONDS,
+                 max_attempts: int = TASK_MAX_ATTEMPTS):
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float, task_ids: Optional[List[int]] = None):
+        # 租约过期且已用完重试次数的任务标记为失败（task_ids指定时只检查这些任务）
+        query = ("UPDATE tasks SET status = ?, error = ?, updated_at = ? "
+                 "WHERE status = ? AND lease_until < ? AND attempts >= ?")
+        params = (STATUS_FAILED, "工作进程失联且已达到最大尝试次数", now, STATUS_RUNNING, now, self.max_attempts)
+        if task_ids is not None:
+            query += f" AND id IN ({', '.join('?' for _ in task_ids)})"
+            params += tuple(task_ids)
+        conn.execute(query, params)
+
+    def submit_many(self, run_id: str, kind: str, payloads: List[Dict]) -> List[int]:
+        """批量提交任务，返回任务ID（顺序与payloads一致）"""
+        now = time.time()
+        task_ids = []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for payload in payloads:
+                cursor = conn.execute(
+                    "INSERT INTO tasks (run_id, kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, kind, _dumps(payload), now, now)
+                )
+                task_ids.append(cursor.lastrowid)
+            conn.execute("COMMIT")
+        return task_ids
+
+    def claim(self, worker: str, kinds: Optional[List[str]] = None) -> Optional[Dict]:
+        """认领一个待执行（或租约已过期）的任务，没有任务时返回None"""
+        kinds = kinds or [TASK_PROCESS, TASK_ANALYZE]
+        now = time.time()
+        placeholders = ', '.join('?' for _ in kinds)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                f"SELECT * FROM tasks WHERE kind IN ({placeholders}) "
+                f"AND (status = ? OR (status = ? AND lease_until < ?)) ORDER BY id LIMIT 1",
+                (*kinds, STATUS_PENDING, STATUS_RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = ?, worker = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? "
+                "WHERE id = ?",
+                (STATUS_RUNNING, worker, now + self.lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+        task = self._task(row)
+        task['attempts'] += 1
+        return task
+
+    def heartbeat(self, task_id: int, worker: str) -> bool:
+        """延长任务租约，任务已被其他工作进程接管或已结束时返回False"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (now + self.lease_seconds, now, task_id, worker, STATUS_RUNNING)
+            )
+            return cursor.rowcount > 0
+
+    def complete(self, task_id: int, worker: str, result: Dict) -> bool:
+        """写回任务结果（只接受当前持有租约的工作进程）"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (STATUS_DONE, _dumps(result), now, task_id, worker, STATUS_RUNNING)
+            )
+            return cursor.rowcount > 0
+
+    def fail(self, task_id: int, worker: str, error: str, retry: bool = True):
+        """任务执行失败：未达到最大尝试次数时重新排队，否则标记为失败"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END, "
+                "error = ?, lease_until = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                (retry, self.max_attempts, STATUS_PENDING, STATUS_FAILED, error, now, task_id, worker, STATUS_RUNNING)
+            )
+
+    def release(self, task_id: int, worker: str):
+        """工作进程退出时归还未完成的任务（不计入尝试次数）"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts - 1, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (STATUS_PENDING, now, task_id, worker, STATUS_RUNNING)
+            )
+
+    def cancel_run(self, run_id: str) -> int:
+        """取消运行中尚未被认领的任务，返回取消的任务数（执行中的任务完成后结果被忽略）"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = ?, updated_at = ? WHERE run_id = ? AND status = ?",
+                (STATUS_CANCELLED, time.time(), run_id, STATUS_PENDING)
+            )
+            return cursor.rowcount
+
+    def get(self, task_id: int) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._task(row) if row else None
+
+    def wait_for(self, task_ids: List[int], cancel_token=None, on_finished: Callable[[Dict], None] = None,
+                 poll_interval: float = TASK_POLL_INTERVAL) -> Dict[int, Dict]:
+        """
+        等待任务全部结束，每个任务结束时调用on_finished；取消时返回已结束的任务。
+        每次轮询都检查这些任务的租约：没有工作进程再认领时，失联且已用完重试次数的任务也会结束等待。
+        """
+        finished: Dict[int, Dict] = {}
+        remaining = set(task_ids)
+        while remaining:
+            placeholders = ', '.join('?' for _ in remaining)
+            with self._connect() as conn:
+                self._expire_leases(conn, time.time(), list(remaining))
+                rows = conn.execute(
+                    f"SELECT * FROM tasks WHERE id IN ({placeholders}) AND status IN (?, ?, ?)",
+                    (*remaining, *FINISHED_STATUSES)
+                ).fetchall()
+            for row in rows:
+                task = self._task(row)
+                finished[task['id']] = task
+                remaining.discard(task['id'])
+                if on_finished is not None:
+                    on_finished(task)
+            if not remaining:
+                break
+            if cancel_token is not None:
+                if cancel_token.wait(poll_interval):
+                    break
+            else:
+                time.sleep(poll_interval)
+        return finished
+
+    def stats(self, run_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """按任务类型与状态统计任务数"""
+        query = "SELECT kind, status, COUNT(*) AS count FROM tasks"
+        params = ()
+        if run_id is not None:
+            query += " WHERE run_id = ?"
+            params = (run_id,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " GROUP BY kind, status", params).fetchall()
+        stats: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            stats.setdefault(row['kind'], {})[row['status']] = row['count']
+        return stats
+
+    @staticmethod
+    def _task(row: sqlite3.Row) -> Dict:
+        task = dict(row)
+        task['payload'] = _loads(task['payload'])
+        task['result'] = _loads(task['result'])
+        return task
+
+
+class DistributedTaskExecutor:
+    """协调进程一侧：把下载提取与单篇分析提交到任务队列并等待工作进程完成"""
+
+    def __init__(self, task_queue: TaskQueue, run_id: str, paper_store=None):
+        self.task_queue = task_queue
+        self.run_id = run_id
+        self.paper_store = paper_store  # 可选，取回的全文放入内存受限的全文存储
+        self.cancel_token = None
+        self.process_task_ids: Dict[str, int] = {}  # 论文标题 -> 下载提取任务ID（分析任务从该任务读取全文）
+
+    def with_cancel_token(self, token) -> 'DistributedTaskExecutor':
+        """返回绑定取消令牌的执行器副本（共享任务ID映射）"""
+        bound = copy.copy(self)
+        bound.cancel_token = token
+        return bound
+
+    def _wait(self, task_ids: List[int], batch_name: str, on_finished: Callable[[Dict], None]) -> Dict[int, Dict]:
+        print(f"📮 已提交 {len(task_ids)} 个{batch_name}任务到队列 {self.task_queue.db_path}，等待工作进程执行...")
+        finished = self.task_queue.wait_for(task_ids, self.cancel_token, on_finished)
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            cancelled = self.task_queue.cancel_run(self.run_id)
+            print(f"🛑 已取消 {cancelled} 个尚未开始的{batch_name}任务")
+        return finished
+
+    def process_papers(self, papers: List[Dict], download_dir: str, process_options: Optional[Dict] = None) -> List[Dict]:
+        """分布式下载提取，返回处理成功的论文（顺序与输入一致）"""
+        if not papers:
+            return []
+        payloads = [{'paper': paper, 'download_dir': download_dir, 'process_options': process_options or {}}
+                    for paper in papers]
+        task_ids = self.task_queue.submit_many(self.run_id, TASK_PROCESS, payloads)
+
+        def on_finished(task):
+            title = task['payload']['paper'].get('title', 'Unknown')
+            if task['status'] == STATUS_DONE and task['result'].get('paper'):
+                print(f"✅ [{task['worker']}] 处理成功: {title}")
+            elif task['status'] != STATUS_CANCELLED:
+                print(f"❌ [{task['worker']}] 处理失败: {title} {task['error'] or ''}")
+
+        finished = self._wait(task_ids, "下载提取", on_finished)
+        processed_papers = []
+        for task_id in task_ids:
+            task = finished.get(task_id)
+            if not task or task['status'] != STATUS_DONE or not task['result'].get('paper'):
+                continue
+            paper = task['result']['paper']
+            self.process_task_ids[paper['title']] = task_id
+            if self.paper_store is not None:
+                self.paper_store.put(paper)
+            processed_papers.append(paper)
+        return processed_papers
+
+    def analyze_papers(self, papers: List[Dict], on_analysis: Callable[[Dict], None] = None) -> List[Dict]:
+        """分布式单篇分析，返回分析记录（按完成顺序）"""
+        if not papers:
+            return []
+        payloads = []
+        for paper in papers:
+            source_task = self.process_task_ids.get(paper['title'])
+            if source_task is not None:
+                # 全文已保存在下载提取任务的结果中，分析任务只携带元数据
+                light = {k: v for k, v in paper.items() if k not in ('extracted_text', 'text_chunks')}
+                payloads.append({'paper': light, 'source_task': source_task})
+            else:
+                payloads.append({'paper': materialize_texts([paper])[0]})
+        task_ids = self.task_queue.submit_many(self.run_id, TASK_ANALYZE, payloads)
+
+        analyses = []
+
+        def on_finished(task):
+            title = task['payload']['paper'].get('title', 'Unknown')
+            if task['status'] == STATUS_DONE:
+                analyses.append(task['result']['analysis'])
+                print(f"  ✅ [{task['worker']}] 完成分析: {title}")
+                if on_analysis:
+                    on_analysis(task['result']['analysis'])
+            elif task['status'] != STATUS_CANCELLED:
+                print(f"  ❌ [{task['worker']}] 分析失败: {title} {task['error'] or ''}")
+
+        self._wait(task_ids, "分析", on_finished)
+        return analyses
@@ -0,0 +1,130 @@
+"""
+分布式任务工作进程
+从共享任务队列认领下载提取任务与单篇分析任务，在本机执行后把结果写回队列。
+可在多台共享同一文件系统的机器上各启动若干个:
+    python task_worker.py --db /mnt/shared/task_queue.sqlite3
+协调进程使用 python main_DeepResearch.py --distributed 提交任务。
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+from config import TASK_QUEUE_DB, TASK_POLL_INTERVAL
+from deepseek_client import DeepSeekClient
+from paper_store import materialize_texts
+from pdf_processor import EnhancedPDFProcessor
+from research_pipeline import build_analysis_record
+from task_queue import TaskQueue, TASK_PROCESS, TASK_ANALYZE
+
+
+class TaskWorker:
+    """认领并执行任务的工作进程（单线程执行，可启动多个进程提高并发）"""
+
+    def __init__(self, task_queue: TaskQueue, worker_id: Optional[str] = None, kinds=None):
+        self.task_queue = task_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.kinds = kinds or [TASK_PROCESS, TASK_ANALYZE]
+        self.ai_client = DeepSeekClient() if TASK_ANALYZE in self.kinds else None
+        self.processor = EnhancedPDFProcessor() if TASK_PROCESS in self.kinds else None
+        self.completed = 0
+        self.failed = 0
+
+    def execute_task(self, task: Dict) -> Dict:
+        """执行一个任务，返回写回队列的结果"""
+        payload = task['payload']
+        if task['kind'] == TASK_PROCESS:
+            os.makedirs(payload['download_dir'], exist_ok=True)
+            processed = self.processor.process_paper(
+                payload['paper'], download_dir=payload['download_dir'], **payload['process_options']
+            )
+            return {'paper': materialize_texts([processed])[0] if processed else None}
+
+        paper = payload['paper']
+        if payload.get('source_task') is not None:
+            # 全文从对应下载提取任务的结果中读取
+            source = self.task_queue.get(payload['source_task'])
+            if source and source['result'] and source['result'].get('paper'):
+                paper = source['result']['paper']
+        analysis = self.ai_client.analyze_paper_text(paper['title'], paper['abstract'], paper.get('text_chunks', []),
+                                                     paper=paper)
+        return {'analysis': build_analysis_record(paper, analysis)}
+
+    def _heartbeat(self, task_id: int, stop: threading.Event):
+        """任务执行期间定期延长租约"""
+        interval = max(1.0, self.task_queue.lease_seconds / 3)
+        while not stop.wait(interval):
+            if not self.task_queue.heartbeat(task_id, self.worker_id):
+                print(f"⚠️ 任务 {task_id} 的租约已失效，结果将不会被采纳")
+                return
+
+    def run_once(self) -> bool:
+        """认领并执行一个任务，没有可执行任务时返回False"""
+        task = self.task_queue.claim(self.worker_id, self.kinds)
+        if task is None:
+            return False
+
+        title = task['payload']['paper'].get('title', 'Unknown')
+        print(f"🔧 [{self.worker_id}] 执行{task['kind']}任务 {task['id']} (第{task['attempts']}次尝试): {title}")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task['id'], stop), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.execute_task(task)
+        except KeyboardInterrupt:
+            self.task_queue.release(task['id'], self.worker_id)
+            print(f"↩️ 已归还任务 {task['id']}")
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            self.task_queue.fail(task['id'], self.worker_id, str(e))
+            self.failed += 1
+            print(f"❌ 任务 {task['id']} 失败: {e}")
+            return True
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if self.task_queue.complete(task['id'], self.worker_id, result):
+            self.completed += 1
+            print(f"✅ 任务 {task['id']} 完成")
+        else:
+            print(f"⚠️ 任务 {task['id']} 已被取消或由其他工作进程接管，丢弃结果")
+        return True
+
+    def run(self, idle_exit: Optional[float] = None, poll_interval: float = TASK_POLL_INTERVAL):
+        """循环执行任务；idle_exit秒内没有新任务时退出（None表示一直运行）"""
+        print(f"👷 工作进程 {self.worker_id} 已启动，任务类型: {', '.join(self.kinds)}，队列: {self.task_queue.db_path}")
+        idle_since = time.time()
+        try:
+            while True:
+                if self.run_once():
+                    idle_since = time.time()
+                    continue
+                if idle_exit is not None and time.time() - idle_since >= idle_exit:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("\n⏹️ 工作进程已停止")
+        print(f"📊 工作进程 {self.worker_id}: 完成 {self.completed} 个任务, 失败 {self.failed} 个")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="深研星图-分布式任务工作进程")
+    parser.add_argument('--db', default=TASK_QUEUE_DB, help='任务队列数据库路径（多机运行时位于共享文件系统）')
+    parser.add_argument('--kinds', nargs='+', choices=[TASK_PROCESS, TASK_ANALYZE],
+                        default=[TASK_PROCESS, TASK_ANALYZE], help='本进程执行的任务类型')
+    parser.add_argument('--worker-id', help='工作进程标识（默认: 主机名-进程号）')
+    parser.add_argument('--idle-exit', type=float, help='空闲指定秒数后退出（默认一直运行）')
+    args = parser.parse_args()
+
+    worker = TaskWorker(TaskQueue(args.db), worker_id=args.worker_id, kinds=args.kinds)
+    worker.run(idle_exit=args.idle_exit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+--resume 恢复已完成轮次时不应改写结果目录中的论文记录（text_file全文路径必须保留）
+运行: python -m pytest -q tests
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main_DeepResearch as m  # noqa: E402
+from paper_searcher import SearchFilters  # noqa: E402
+from run_checkpoint import RunCheckpoint  # noqa: E402
+
+
+class FakeAI:
+    cancel_token = None
+
+    def __init__(self, interrupt_round=None):
+        self.interrupt_round = interrupt_round
+        self.rounds = 0
+
+    def get_model_stats(self):
+        return {}
+
+    def with_cancel_token(self, token):
+        return self
+
+    def with_load_shedder(self, shedder):
+        return self
+
+    def with_deferred_retries(self):
+        return self
+
+    def generate_search_queries(self, *args, **kwargs):
+        return ['q1']
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            if name == 'analyze_papers_concurrently':
+                self.rounds += 1
+                if self.rounds == self.interrupt_round:
+                    raise KeyboardInterrupt
+                return [{'paper': p['title'], 'analysis': 'an', 'citations': 0} for p in args[0]]
+            if name == 'evaluate_research_adequacy':
+                return "评分: 0.5"
+            return "text"
+        return call
+
+
+class FakeSearcher:
+    cancel_token = None
+
+    def __init__(self):
+        self.searches = 0
+
+    def get_search_stats(self):
+        return {"sources": {}, "requests_by_host": {}}
+
+    def with_cancel_token(self, token):
+        return self
+
+    def with_load_shedder(self, shedder):
+        return self
+
+    def search_multiple_queries_enhanced(self, queries, filters):
+        self.searches += 1
+        return [{'title': f'Round {self.searches} paper {i}', 'abstract': 'a', 'source': 'arxiv', 'citations': i}
+                for i in range(2)]
+
+    def display_search_results(self, *args, **kwargs):
+        pass
+
+
+class FakeProcessor:
+    cancel_token = None
+    paper_store = None
+
+    def get_process_stats(self):
+        return {"papers": 0}
+
+    def with_cancel_token(self, token):
+        return self
+
+    def with_load_shedder(self, shedder):
+        return self
+
+    def process_paper(self, paper, download_dir=None, **kwargs):
+        text = f"full text of {paper['title']} " * 50
+        return dict(paper, extracted_text=text, text_length=len(text), text_chunks=[text])
+
+
+def _round_papers(run_id: str, round_num: int):
+    path = Path(m.OUTPUT_DIR) / "runs" / run_id / "papers" / f"round{round_num}.jsonl"
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+
+def test_resume_keeps_completed_round_outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(m, 'SEARCH_DEPTH', 2)
+    monkeypatch.setattr(m, 'ENABLE_SPECULATIVE_PREFETCH', False)
+    monkeypatch.setattr(m, 'ENABLE_MARGINAL_GAIN_STOPPING', False)
+    monkeypatch.setattr(m, 'ENABLE_PROGRESSIVE_ANALYSIS', False)
+
+    checkpoint = RunCheckpoint.create("resume topic", str(tmp_path / "checkpoints"))
+    filters = SearchFilters()
+    checkpoint.save_run_info(str(tmp_path / "downloads"), filters)
+    try:
+        # 第2轮分析时中断，第1轮已完成并写入结果目录
+        m.run_research(FakeAI(interrupt_round=2), FakeSearcher(), FakeProcessor(), None, "resume topic",
+                       filters, checkpoint.download_dir, checkpoint)
+    except KeyboardInterrupt:
+        pass
+    before = _round_papers(checkpoint.run_id, 1)
+    assert all(paper.get('text_file') for paper in before)
+
+    resumed = RunCheckpoint.load(checkpoint.run_id, str(tmp_path / "checkpoints"))
+    results = m.run_research(FakeAI(), FakeSearcher(), FakeProcessor(), None, resumed.research_topic,
+                             resumed.filters, resumed.download_dir, resumed)
+
+    after = _round_papers(checkpoint.run_id, 1)
+    assert after == before
+    run_dir = Path(m.OUTPUT_DIR) / "runs" / checkpoint.run_id
+    for paper in after:
+        assert (run_dir / paper['text_file']).read_text(encoding='utf-8').startswith("full text of Round 1")
+    assert all(paper.get('text_file') for paper in _round_papers(checkpoint.run_id, 2))
+    assert results['total_papers_processed'] == 4
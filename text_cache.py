@@ -0,0 +1,91 @@
+"""
+提取文本共享缓存
+同一进程中的多个研究主题共享PDF下载与文本提取结果：同一篇论文只下载、提取一次，
+正在被其他主题处理的论文会等待其结果而不是重复下载。
+"""
+
+import threading
+from typing import Callable, Dict, Optional
+
+from paper_registry import paper_identity_keys
+
+# 缓存中保存的处理结果字段
+TEXT_FIELDS = ('local_path', 'extracted_text', 'text_length', 'text_chunks')
+
+
+class ExtractedTextCache:
+    """按论文规范身份缓存下载与提取结果（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}  # 身份键 -> 文本字段
+        self._inflight: Dict[str, threading.Event] = {}  # 身份键 -> 处理中事件
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, keys) -> Optional[Dict]:
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def lookup(self, paper: Dict) -> Optional[Dict]:
+        """只查询缓存，命中时把文本字段写入paper并返回"""
+        keys = paper_identity_keys(paper)
+        with self._lock:
+            entry = self._lookup(keys)
+            if entry is None:
+                return None
+            self.hits += 1
+        return self._apply(paper, entry)
+
+    def get_or_process(self, paper: Dict, process: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """命中缓存时把文本字段写入paper并返回，否则调用process处理并缓存结果"""
+        keys = paper_identity_keys(paper)
+        if not keys:
+            return process()
+
+        while True:
+            with self._lock:
+                entry = self._lookup(keys)
+                if entry is not None:
+                    self.hits += 1
+                    return self._apply(paper, entry)
+                event = next((self._inflight[key] for key in keys if key in self._inflight), None)
+                if event is None:
+                    event = threading.Event()
+                    for key in keys:
+                        self._inflight[key] = event
+                    self.misses += 1
+                    break
+            # 其他主题正在处理同一篇论文，等待其完成后重新查询缓存
+            event.wait()
+
+        try:
+            result = process()
+            if result:
+                entry = {field: result.get(field) for field in TEXT_FIELDS}
+                with self._lock:
+                    for key in keys + paper_identity_keys(result):
+                        self._entries[key] = entry
+            return result
+        finally:
+            with self._lock:
+                for key in keys:
+                    if self._inflight.get(key) is event:
+                        del self._inflight[key]
+            event.set()
+
+    @staticmethod
+    def _apply(paper: Dict, entry: Dict) -> Dict:
+        for field in TEXT_FIELDS:
+            value = entry.get(field)
+            paper[field] = list(value) if isinstance(value, list) else value
+        print(f"♻️ 使用共享缓存中的文本: {paper.get('title', 'Unknown')}")
+        return paper
+
+    def stats(self) -> Dict:
+        with self._lock:
+            unique_papers = len({id(entry) for entry in self._entries.values()})
+        return {'unique_papers': unique_papers, 'hits': self.hits, 'misses': self.misses}
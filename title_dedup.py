@@ -0,0 +1,397 @@
+"""
+标题近重复检测
+逐一与全部已保留标题做模糊匹配的去重是O(n²)的，并且每次比较都重新清理两个标题。
+这里每个标题只清理一次，由两个前缀过滤倒排索引生成候选，只对候选执行与 fuzzy_match_title 相同的模糊匹配：
+- 单词索引：共享单词（按长度加权）足以使token_set_ratio的交集比较达到阈值的标题
+- n-gram索引：共享n-gram（长度 DEDUP_GRAM_SIZE）的IDF权重不少于较小一方的 DEDUP_MIN_GRAM_OVERLAP 的标题（拼写、单复数、截断等）
+候选的模糊匹配与逐对比较相同，区别只在于哪些标题对会被比较：
+- 单词索引是必要条件，token_set_ratio由交集与某一方比较达到阈值的标题对一定会成为候选
+- n-gram索引是经验规则，ratio、partial_ratio等命中的标题对若共享n-gram不足则会漏掉（较短标题与较长标题的partial_ratio命中无法用共享特征保证）
+默认参数在 --verify 2000 的对比中判定全部一致；调大 DEDUP_MIN_GRAM_OVERLAP 会更快，但可能出现遗漏。
+
+基准测试（与逐对模糊匹配的判定对比）:
+    python title_dedup.py --benchmark 50000 --verify 2000
+"""
+
+import argparse
+import math
+import random
+import re
+import time
+from collections import Counter
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from fuzzywuzzy import fuzz, utils
+
+from config import DEDUP_GRAM_SIZE, DEDUP_MIN_GRAM_OVERLAP
+
+
+def clean_title(text: str) -> str:
+    """清理文本用于匹配（小写、特殊字符替换为空格、合并空白），与搜索器的_clean_text_for_matching一致"""
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def title_grams(clean: str, size: int = DEDUP_GRAM_SIZE) -> Set[str]:
+    """按单词（两端补空格）切分的字符n-gram集合，与单词顺序无关"""
+    grams = set()
+    for token in clean.split():
+        padded = f" {token} "
+        grams.update(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+    return grams
+
+
+def match_key(clean: str) -> Tuple[str, str]:
+    """已清理标题的匹配键：(清理结果, token类算法的预处理结果)，每个标题只预处理一次"""
+    return clean, utils.full_process(clean, force_ascii=True)
+
+
+def fuzzy_score_reaches(key1: Tuple[str, str], key2: Tuple[str, str], threshold: int) -> bool:
+    """两个匹配键的模糊匹配（四种算法取最高分，与fuzzy_match_title一致），按开销从低到高计算，达到阈值即返回"""
+    (clean1, processed1), (clean2, processed2) = key1, key2
+    # token类算法直接使用预处理结果；预处理后为空的标题token_set_ratio为0
+    return (fuzz.ratio(clean1, clean2) >= threshold
+            or fuzz.token_sort_ratio(processed1, processed2, full_process=False) >= threshold
+            or (bool(processed1 and processed2)
+                and fuzz.token_set_ratio(processed1, processed2, full_process=False) >= threshold)
+            or fuzz.partial_ratio(clean1, clean2) >= threshold)
+
+
+class _Weights(dict):
+    """特征 -> 权重，不在表中的特征按missing计算"""
+
+    def __init__(self, weights: Dict[str, float], missing: Callable[[str], float]):
+        super().__init__(weights)
+        self.missing = missing
+
+    def __missing__(self, feature: str) -> float:
+        weight = self[feature] = self.missing(feature)
+        return weight
+
+
+class _PrefixIndex:
+    """
+    加权特征集合的前缀过滤索引：查找与给定集合共享的特征权重不少于 min(两者的required) 的已索引记录。
+    每条记录按 rank 排序（稀有的在前），前缀之外的特征权重之和小于required，
+    因此满足条件的记录对中，required较小的一方的前缀必然与另一方共享特征。
+    倒排表给出的候选用numpy一次性求共享特征权重，不逐个做集合交集。
+    """
+
+    def __init__(self, weights: _Weights, rank: Callable[[str], tuple], min_overlap: float):
+        self.weights = weights
+        self.rank = rank
+        self.min_overlap = min_overlap
+        self._ids: Dict[str, int] = {}  # 特征 -> 特征编号
+        self._feature_weights = np.zeros(1024)  # 特征编号 -> 权重
+        self._query = np.zeros(1024)  # 查询时：特征编号 -> 查询中该特征的权重（其余为0）
+        self._flat = np.zeros(4096, dtype=np.int32)  # 各记录的特征编号首尾相接
+        self._starts = np.zeros(1024, dtype=np.int32)  # 记录编号 -> 在_flat中的起点
+        self._lengths = np.zeros(1024, dtype=np.int32)  # 记录编号 -> 特征数
+        self._required = np.zeros(1024)  # 记录编号 -> required
+        self._count = 0
+        self._full: Dict[str, List[int]] = {}  # 特征 -> 含该特征的记录
+        self._prefix: Dict[str, List[int]] = {}  # 特征 -> 前缀中含该特征的记录
+
+    def prepare(self, features: Set[str]) -> tuple:
+        """计算一次、供candidates与add共用的记录：(特征集合, required, 前缀特征)"""
+        total = sum(map(self.weights.__getitem__, features))
+        required = self.min_overlap * total
+        remaining = total
+        prefix = []
+        for feature in sorted(features, key=self.rank):
+            if remaining < required:
+                break
+            prefix.append(feature)
+            remaining -= self.weights[feature]
+        return features, required, prefix
+
+    def candidates(self, entry: tuple) -> List[int]:
+        # required不小于本记录的已索引记录必然含有本记录前缀中的特征，较小的记录在其自身前缀中含有本记录的特征
+        features, required, own_prefix = entry
+        full, prefix_postings = self._full, self._prefix
+        record_ids = set(chain.from_iterable(map(full.__getitem__, full.keys() & own_prefix)))
+        record_ids.update(chain.from_iterable(map(prefix_postings.__getitem__, prefix_postings.keys() & features)))
+        if not record_ids:
+            return []
+        record_ids = np.fromiter(record_ids, dtype=np.int32, count=len(record_ids))
+        # 共享特征权重：取出候选的全部特征编号，按查询的特征权重累加
+        feature_ids = [self._ids[feature] for feature in features if feature in self._ids]
+        self._query[feature_ids] = self._feature_weights[feature_ids]
+        lengths = self._lengths[record_ids]
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(self._starts[record_ids] - offsets, lengths) + np.arange(offsets[-1] + lengths[-1],
+                                                                                       dtype=np.int32)
+        overlaps = np.add.reduceat(self._query[self._flat[positions]], offsets)
+        self._query[feature_ids] = 0
+        return record_ids[overlaps >= np.minimum(self._required[record_ids], required)].tolist()
+
+    def add(self, entry: tuple) -> int:
+        features, required, prefix = entry
+        record_id = self._count
+        ids = self._ids
+        for feature in features:
+            if feature not in ids:
+                ids[feature] = len(ids)
+                self._feature_weights = _grow(self._feature_weights, len(ids))
+                self._feature_weights[ids[feature]] = self.weights[feature]
+        self._query = _grow(self._query, len(ids))
+        start = self._starts[record_id - 1] + self._lengths[record_id - 1] if record_id else 0
+        self._flat = _grow(self._flat, start + len(features))
+        self._flat[start:start + len(features)] = [ids[feature] for feature in features]
+        self._starts, self._lengths, self._required = (
+            _grow(array, record_id + 1) for array in (self._starts, self._lengths, self._required))
+        self._starts[record_id], self._lengths[record_id], self._required[record_id] = start, len(features), required
+        self._count += 1
+        for feature in features:
+            self._full.setdefault(feature, []).append(record_id)
+        for feature in prefix:
+            self._prefix.setdefault(feature, []).append(record_id)
+        return record_id
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """容量不足size时按倍数扩容（新位置为0）"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _token_set_overlap(threshold: int) -> float:
+    """
+    token_set_ratio中交集与一侧的比较达到阈值的必要条件：共同单词（含分隔空格）至少覆盖该侧标题的该比例。
+    共同单词排序拼接为s，一侧为s加上其余单词，两者的ratio为 2|s| / (|s| + |一侧|)（分数四舍五入）
+    """
+    ratio = max(0.0, (threshold - 0.5) / 100)
+    return ratio / (2 - ratio)
+
+
+class TitleDeduplicator:
+    """
+    已保留标题的近重复索引：is_duplicate 判断新标题是否与已保留标题重复，add 保留标题。
+    候选来自两个前缀过滤索引：单词索引（按单词长度加权，覆盖token_set_ratio中交集与一侧比较的命中）与
+    n-gram索引（按IDF加权，覆盖拼写、单复数等字符级差异）。
+    frequencies 为一批标题中各单词/n-gram的出现次数（见for_titles），用于把稀有特征放在前缀中并为n-gram加权；
+    不提供时（流水线逐篇接收论文）n-gram按个数计算，候选更多。fuzzy=False时只做规范化后的精确匹配。
+    """
+
+    def __init__(self, threshold: int, fuzzy: bool = True, frequencies: Optional[Dict[str, int]] = None,
+                 min_gram_overlap: float = DEDUP_MIN_GRAM_OVERLAP, gram_size: int = DEDUP_GRAM_SIZE):
+        self.threshold = threshold
+        self.fuzzy = fuzzy
+        self.gram_size = gram_size
+        frequencies = frequencies or {}
+        most = max(frequencies.values(), default=1)
+        self._keys: List[Tuple[str, str]] = []  # 记录编号 -> 匹配键
+        self._exact: Set[str] = set()
+        self._last_features = (None, None)
+        self._title_grams: Dict[str, Set[str]] = {}  # for_titles已切分的n-gram，首次使用时取出
+        self._words = _PrefixIndex(_Weights({}, lambda word: len(word) + 1),
+                                   lambda word: (frequencies.get(word, 0), word), _token_set_overlap(threshold))
+        gram_weights = _Weights({gram: math.log(1 + most / count) for gram, count in frequencies.items()},
+                                lambda gram: math.log(1 + most))
+        self._grams = _PrefixIndex(gram_weights, lambda gram: (-gram_weights[gram], gram), min_gram_overlap)
+        self.comparisons = 0
+
+    @classmethod
+    def for_titles(cls, titles: Iterable[str], threshold: int, **kwargs) -> 'TitleDeduplicator':
+        """统计一批待去重标题的单词与n-gram频率（批量去重时候选最少）"""
+        gram_size = kwargs.get('gram_size', DEDUP_GRAM_SIZE)
+        frequencies = Counter()
+        grams = {}
+        for title in titles:
+            clean = clean_title(title or '')
+            grams[clean] = title_grams(clean, gram_size)
+            frequencies.update(clean.split())
+            frequencies.update(grams[clean])
+        index = cls(threshold, frequencies=frequencies, **kwargs)
+        index._title_grams = grams
+        return index
+
+    def _features(self, clean: str):
+        # is_duplicate之后通常紧接着对同一标题调用add，保留最近一次的结果
+        if self._last_features[0] != clean:
+            key = match_key(clean)
+            grams = self._title_grams.pop(clean, None) or title_grams(clean, self.gram_size)
+            # 单词取token类算法的预处理结果，与token_set_ratio切分出的单词一致
+            self._last_features = (clean, (key, self._words.prepare(set(key[1].split())), self._grams.prepare(grams)))
+        return self._last_features[1]
+
+    def is_duplicate(self, title: str) -> bool:
+        clean = clean_title(title or '')
+        if not clean:
+            return False
+        if not self.fuzzy or clean in self._exact:
+            return clean in self._exact
+        key, words, grams = self._features(clean)
+        compared = set()
+        # 单词索引的候选已命中时不再查询n-gram索引
+        candidates = chain.from_iterable(index.candidates(entry) for index, entry in
+                                         ((self._words, words), (self._grams, grams)))
+        for record_id in candidates:
+            if record_id in compared:
+                continue
+            compared.add(record_id)
+            self.comparisons += 1
+            if fuzzy_score_reaches(key, self._keys[record_id], self.threshold):
+                return True
+        return False
+
+    def add(self, title: str):
+        clean = clean_title(title or '')
+        if not clean or clean in self._exact:
+            return
+        self._exact.add(clean)
+        if not self.fuzzy:
+            return
+        key, words, grams = self._features(clean)
+        self._keys.append(key)
+        self._words.add(words)
+        self._grams.add(grams)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+
+# ---- 基准测试 ----
+
+_BENCH_WORDS = (
+    "deep learning neural network networks graph attention transformer transformers language model models "
+    "large scale efficient robust adversarial training self supervised contrastive representation representations "
+    "learning reinforcement policy optimization gradient descent stochastic convergence analysis theory bounds "
+    "generalization federated privacy preserving differential vision image images segmentation detection object "
+    "recognition video generation diffusion generative adversarial variational autoencoder bayesian inference "
+    "probabilistic causal discovery time series forecasting anomaly retrieval augmented question answering "
+    "knowledge distillation pruning quantization sparse mixture experts multimodal speech translation "
+    "benchmark dataset evaluation survey towards understanding scalable fast approximate exact algorithm"
+).split()
+_BENCH_GLUE = ["for", "of", "with", "via", "in", "on", "and", "a", "the", "using"]
+# 英文字母频率（生成专有词时按频率取字母）
+_BENCH_LETTERS = "etaoinshrdlcumwfgypbvkjxqz"
+_BENCH_LETTER_WEIGHTS = [12.7, 9.1, 8.2, 7.5, 7.0, 6.7, 6.3, 6.1, 6.0, 4.3, 4.0, 2.8, 2.8, 2.4, 2.4, 2.2, 2.0,
+                         2.0, 1.9, 1.5, 1.0, 0.8, 0.2, 0.2, 0.1, 0.1]
+
+
+def _synthetic_vocabulary(rng: random.Random, size: int = 20000) -> List[str]:
+    """领域常用词 + 随机拼出的专有词（方法名、任务名等），按Zipf分布取词时常用词出现得最多"""
+    words = list(_BENCH_WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choices(_BENCH_LETTERS, _BENCH_LETTER_WEIGHTS, k=rng.randint(3, 10))))
+    return words
+
+
+def _synthetic_titles(count: int, seed: int = 0) -> List[str]:
+    """随机生成的论文标题，约30%是已有标题的变体（大小写/标点、拼写错误、副标题、单词顺序、截断）"""
+    rng = random.Random(seed)
+    vocabulary = _synthetic_vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    titles: List[str] = []
+    for _ in range(count):
+        if titles and rng.random() < 0.3:
+            words = rng.choice(titles).split()
+            variant = rng.randrange(5)
+            if variant == 0:
+                title = ' '.join(words).upper() if rng.random() < 0.5 else ': '.join([' '.join(words[:2]), ' '.join(words[2:])])
+            elif variant == 1:
+                i = rng.randrange(len(words))
+                word = words[i]
+                if len(word) > 3:
+                    j = rng.randrange(len(word))
+                    words[i] = word[:j] + rng.choice('abcdefghijklmnopqrstuvwxyz') + word[j + 1:]
+                title = ' '.join(words)
+            elif variant == 2:
+                title = ' '.join(words) + ': ' + ' '.join(rng.sample(_BENCH_WORDS, 3))
+            elif variant == 3:
+                i = rng.randrange(len(words) - 1)
+                words[i], words[i + 1] = words[i + 1], words[i]
+                title = ' '.join(words)
+            else:
+                title = ' '.join(words[:max(3, len(words) - 2)])
+        else:
+            words = []
+            for word in rng.choices(vocabulary, weights, k=rng.randint(4, 10)):
+                words.append(word)
+                if rng.random() < 0.25:
+                    words.append(rng.choice(_BENCH_GLUE))
+            title = ' '.join(words).capitalize()
+        titles.append(title)
+    return titles
+
+
+def _dedup_indexed(titles: List[str], threshold: int, **kwargs) -> List[bool]:
+    index = TitleDeduplicator.for_titles(titles, threshold, **kwargs)
+    decisions = []
+    for title in titles:
+        duplicate = index.is_duplicate(title)
+        decisions.append(duplicate)
+        if not duplicate:
+            index.add(title)
+    return decisions
+
+
+def _fuzzy_match_title(title1: str, title2: str, threshold: int) -> bool:
+    clean1, clean2 = clean_title(title1), clean_title(title2)
+    return max(fuzz.ratio(clean1, clean2), fuzz.partial_ratio(clean1, clean2),
+               fuzz.token_sort_ratio(clean1, clean2), fuzz.token_set_ratio(clean1, clean2)) >= threshold
+
+
+def _dedup_pairwise(titles: List[str], threshold: int) -> List[bool]:
+    """原有的逐对比较（每次比较都重新清理两个标题，四种算法全部计算）"""
+    kept: List[str] = []
+    decisions = []
+    for title in titles:
+        duplicate = any(_fuzzy_match_title(title, seen, threshold) for seen in kept)
+        decisions.append(duplicate)
+        if not duplicate:
+            kept.append(title)
+    return decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="深研星图-标题近重复检测基准测试")
+    parser.add_argument('--benchmark', type=int, default=50000, help='生成的标题数')
+    parser.add_argument('--verify', type=int, default=2000, help='与逐对模糊匹配对比判定的标题数（0表示不对比）')
+    parser.add_argument('--threshold', type=int, default=85, help='模糊匹配阈值（默认 similarity_threshold + 10）')
+    parser.add_argument('--gram-size', type=int, default=DEDUP_GRAM_SIZE, help='n-gram长度（默认取配置）')
+    parser.add_argument('--min-gram-overlap', type=float, default=DEDUP_MIN_GRAM_OVERLAP,
+                        help='n-gram候选的最小共享比例（默认取配置）')
+    parser.add_argument('--target-seconds', type=float, default=60, help='索引去重的耗时目标（超出时退出码为1）')
+    args = parser.parse_args()
+    options = {'gram_size': args.gram_size, 'min_gram_overlap': args.min_gram_overlap}
+
+    failed = False
+    titles = _synthetic_titles(args.benchmark)
+    start = time.time()
+    decisions = _dedup_indexed(titles, args.threshold, **options)
+    seconds = time.time() - start
+    print(f"⚡ 索引去重 {len(titles)} 个标题: {seconds:.1f}秒, 重复 {sum(decisions)} 个")
+    if seconds > args.target_seconds:
+        print(f"❌ 超出耗时目标 {args.target_seconds:.0f}秒")
+        failed = True
+
+    if args.verify:
+        sample = titles[:args.verify]
+        start = time.time()
+        indexed = _dedup_indexed(sample, args.threshold, **options)
+        indexed_seconds = time.time() - start
+        start = time.time()
+        pairwise = _dedup_pairwise(sample, args.threshold)
+        pairwise_seconds = time.time() - start
+        mismatches = [i for i, (a, b) in enumerate(zip(indexed, pairwise)) if a != b]
+        print(f"🔍 前 {len(sample)} 个标题: 索引 {indexed_seconds:.2f}秒, 逐对 {pairwise_seconds:.1f}秒, "
+              f"判定不一致 {len(mismatches)} 个")
+        for i in mismatches:
+            print(f"❌ 第{i}个标题判定不一致（索引: {'重复' if indexed[i] else '保留'}, "
+                  f"逐对: {'重复' if pairwise[i] else '保留'}）: {sample[i]}")
+        failed = failed or bool(mismatches)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
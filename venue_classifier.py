@@ -0,0 +1,117 @@
+"""
+会议/期刊分类
+由搜索器的 conference_mappings 一次性构建单词倒排索引，把论文的会议信息字符串映射为规范会议ID集合
+（conference_mappings的键，例如 'NeurIPS'、'CVPR'），结果按字符串缓存。
+会议筛选、排除与排序只需判断规范ID集合与所选会议是否相交，开销与选择的会议数量无关。
+
+匹配规则：
+- 较长的别名（如 "Neural Information Processing Systems"）：会议信息中出现的别名单词（按长度加权）
+  占别名的比例不少于 min_coverage（模糊匹配时为 similarity_threshold / 100，精确匹配时为1），
+  Google Scholar截断的会议名（"Advances in neural information processing …"）也能匹配
+- 较短的别名（如 "ICML"、"S&P"）：必须作为完整的单词/短语出现，"oracle" 不再匹配 "ACL"
+"""
+
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+from title_dedup import clean_title
+
+# 规范化后不超过该长度的别名按完整短语匹配
+SHORT_ALIAS_LENGTH = 4
+# 缓存的会议信息字符串数上限（超过后清空重建）
+VENUE_CACHE_SIZE = 20000
+
+
+def _token_weight(token: str) -> int:
+    return len(token) + 1
+
+
+class VenueClassifier:
+    """会议别名索引（线程安全，搜索器的各个绑定副本共享同一个实例）"""
+
+    def __init__(self, mappings: Dict[str, List[str]]):
+        self._lock = threading.Lock()
+        self._aliases: List[tuple] = []  # (规范化别名, 单词集合, 总权重, 规范ID集合)
+        self._alias_ids: Dict[str, int] = {}  # 规范化别名 -> 别名编号
+        self._token_index: Dict[str, List[int]] = {}  # 单词 -> 含该单词的较长别名
+        self._phrase_index: Dict[str, List[int]] = {}  # 首个单词 -> 以其开头的较短别名
+        self._canonical: Dict[str, str] = {}  # 规范化会议名 -> 规范ID
+        self._cache: Dict[tuple, FrozenSet[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        for conf, names in mappings.items():
+            self._register(conf, [conf] + list(names))
+
+    def _register(self, conf: str, names: Iterable[str]):
+        self._canonical.setdefault(clean_title(conf), conf)
+        for name in names:
+            alias = clean_title(name)
+            if not alias:
+                continue
+            alias_id = self._alias_ids.get(alias)
+            if alias_id is not None:
+                self._aliases[alias_id][3].add(conf)
+                continue
+            alias_id = self._alias_ids[alias] = len(self._aliases)
+            tokens = set(alias.split())
+            self._aliases.append((alias, tokens, sum(map(_token_weight, tokens)), {conf}))
+            if len(alias) <= SHORT_ALIAS_LENGTH:
+                self._phrase_index.setdefault(alias.split()[0], []).append(alias_id)
+            else:
+                for token in tokens:
+                    self._token_index.setdefault(token, []).append(alias_id)
+
+    def resolve(self, conferences: Iterable[str]) -> Set[str]:
+        """把所选会议名（不区分大小写）解析为规范ID，未收录的会议按名称本身作为新的别名加入索引"""
+        resolved = set()
+        for conf in conferences or []:
+            key = clean_title(conf)
+            if not key:
+                continue
+            canonical = self._canonical.get(key)
+            if canonical is None:
+                with self._lock:
+                    self._register(conf, [conf])
+                    self._cache.clear()
+                canonical = conf
+            resolved.add(canonical)
+        return resolved
+
+    def classify(self, venue_text: str, min_coverage: float = 1.0) -> FrozenSet[str]:
+        """会议信息字符串匹配到的全部规范会议ID"""
+        key = (venue_text, min_coverage)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        clean = clean_title(venue_text or '')
+        tokens = set(clean.split())
+        padded = f" {clean} "
+        matched: Set[str] = set()
+        covered: Dict[int, int] = {}
+        for token in tokens:
+            for alias_id in self._token_index.get(token, ()):
+                covered[alias_id] = covered.get(alias_id, 0) + _token_weight(token)
+            for alias_id in self._phrase_index.get(token, ()):
+                alias, _, _, confs = self._aliases[alias_id]
+                if f" {alias} " in padded:
+                    matched.update(confs)
+        for alias_id, weight in covered.items():
+            _, _, total, confs = self._aliases[alias_id]
+            if weight >= min_coverage * total - 1e-9:
+                matched.update(confs)
+        result = frozenset(matched)
+        with self._lock:
+            if len(self._cache) >= VENUE_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def matches(self, venue_text: str, conferences: Iterable[str], min_coverage: float = 1.0) -> bool:
+        """会议信息是否属于所选会议之一"""
+        return bool(self.classify(venue_text, min_coverage) & self.resolve(conferences))
+
+    def stats(self) -> Dict:
+        return {'aliases': len(self._aliases), 'cached_venues': len(self._cache),
+                'hits': self.hits, 'misses': self.misses}